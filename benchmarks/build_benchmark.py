@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the site build for the photosi-catalog-site-builder.
+Generates a synthetic catalog and times every phase of the build separately
+(parsing, relation collection, graph generation, rendering and writing), so a
+regression shows up in the phase that caused it.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from parser.catalog_index import CatalogIndex
+from generators.site_generator import SiteGenerator, sidebar_data
+from utils.graph_utils import compact_graph_data
+from synthetic_catalog import generate_catalog
+
+# Phases of the build, in order
+PHASES = ['parse', 'relations', 'graphs', 'render', 'write']
+
+def run_phases(input_directory, output_directory, graph_format='full'):
+    """
+    Build the site of a catalog, timing every phase separately.
+    
+    Args:
+        input_directory (str): Directory containing the AsyncAPI files.
+        output_directory (str): Directory where the site is written.
+        graph_format (str): Format of the graph data files, 'full' or 'compact'.
+    
+    Returns:
+        tuple: Seconds spent in every phase by name, and number of pages.
+    """
+    generator = SiteGenerator(input_directory, output_directory, graph_format=graph_format)
+    timings = {}
+    
+    # Load the service and channel files, and only the headers of the message files, as the build does
+    start = time.perf_counter()
+    message_files, service_files, channel_files = CatalogIndex._scan(Path(input_directory), generator.service_parser)
+    generator.document_cache.preload(service_files + channel_files)
+    generator.document_cache.preload_headers([message_file for _, _, message_file in message_files])
+    timings['parse'] = time.perf_counter() - start
+    
+    # Build the models and collect the publishers and consumers of every event
+    start = time.perf_counter()
+    catalog = CatalogIndex.build(input_directory, generator.service_parser, generator.event_parser)
+    timings['relations'] = time.perf_counter() - start
+    
+    # Graph data of every page
+    start = time.perf_counter()
+    graphs = {}
+    for service in catalog.services.values():
+        graphs[f"{service.id}.json"] = service.to_graph_data()
+    for event in catalog.events.values():
+        safe_id = event.name.replace(":", "_").replace(".", "_")
+        graphs[f"{event.type}_{safe_id}.json"] = event.to_graph_data(*catalog.get_relations(event))
+    timings['graphs'] = time.perf_counter() - start
+    
+    # HTML of every page
+    start = time.perf_counter()
+    pages = {}
+    sidebar_data_file, _ = sidebar_data(catalog.service_names)
+    for service in catalog.services.values():
+        pages[f"services/{service.id}.html"] = generator.service_page_generator.render(
+            service, sidebar_data_url=f"/{sidebar_data_file}")
+    for event in catalog.events.values():
+        safe_id = event.name.replace(":", "_").replace(".", "_")
+        pages[f"events/{event.type}_{safe_id}.html"] = generator.event_page_generator.render(
+            event, *catalog.get_relations(event))
+    timings['render'] = time.perf_counter() - start
+    
+    # Pages and graph data files
+    start = time.perf_counter()
+    output_directory = Path(output_directory)
+    graph_data_path = output_directory / 'static' / 'js' / 'graph-data'
+    graph_data_path.mkdir(parents=True, exist_ok=True)
+    for file_name, graph_data in graphs.items():
+        with open(graph_data_path / file_name, 'w', encoding='utf-8') as f:
+            if graph_format == 'compact':
+                json.dump(compact_graph_data(graph_data), f, separators=(',', ':'))
+            else:
+                json.dump(graph_data, f, indent=2)
+    for page, output in pages.items():
+        output_file = output_directory / page
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(output)
+    timings['write'] = time.perf_counter() - start
+    
+    return timings, len(pages)
+
+def run_full_build(input_directory, output_directory, graph_format='full'):
+    """
+    Time a full build, as run by main.py.
+    
+    Args:
+        input_directory (str): Directory containing the AsyncAPI files.
+        output_directory (str): Directory where the site is written.
+        graph_format (str): Format of the graph data files, 'full' or 'compact'.
+    
+    Returns:
+        float: Seconds spent in the build.
+    """
+    start = time.perf_counter()
+    # The build reports its progress, keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        SiteGenerator(input_directory, output_directory, graph_format=graph_format).generate_all()
+    return time.perf_counter() - start
+
+def measure_catalog_memory(input_directory, output_directory):
+    """
+    Measure the memory allocated while indexing the catalog, with tracemalloc.
+    
+    Args:
+        input_directory (str): Directory containing the AsyncAPI files.
+        output_directory (str): Directory where the site would be written, nothing is written.
+    
+    Returns:
+        tuple: Peak of the memory allocated by build_catalog and memory still held when it
+            returns, by the index and the cached documents, in bytes.
+    """
+    generator = SiteGenerator(input_directory, output_directory)
+    tracemalloc.start()
+    try:
+        catalog = generator.build_catalog()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del catalog
+    return peak, retained
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the phases of the site build.")
+    parser.add_argument("--services", type=int, default=300, help="Number of services.")
+    parser.add_argument("--events-per-type", type=int, default=400, help="Number of events of every type.")
+    parser.add_argument("--fan-out", type=int, default=6, help="Average number of events sent by a service.")
+    parser.add_argument("--fan-in", type=int, default=6, help="Average number of events received by a service.")
+    parser.add_argument("--skew", type=float, default=1.0,
+                        help="Zipf exponent of the event popularity, 0 for uniform.")
+    parser.add_argument("--description-words", type=int, default=30, help="Number of words in every description.")
+    parser.add_argument("--graph-format", choices=['full', 'compact'], default='full',
+                        help="Format of the graph data files.")
+    parser.add_argument("--catalog", help="Existing catalog to build instead of a synthetic one.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of every phase, the best one is reported.")
+    args = parser.parse_args()
+    
+    work_directory = Path(tempfile.mkdtemp(prefix='catalog-benchmark-'))
+    try:
+        input_directory = args.catalog
+        if input_directory is None:
+            input_directory = work_directory / 'catalog'
+            counts = generate_catalog(input_directory, args.services, args.events_per_type, args.fan_out,
+                                      args.fan_in, args.skew, args.description_words)
+            print(f"Synthetic catalog: {counts['services']} services, {counts['events']} events, "
+                  f"{counts['files']} files")
+        
+        best = {}
+        num_pages = 0
+        for run in range(args.repeat):
+            output_directory = work_directory / f"phases-{run}"
+            timings, num_pages = run_phases(input_directory, output_directory, args.graph_format)
+            for phase, elapsed in timings.items():
+                best[phase] = min(best.get(phase, elapsed), elapsed)
+            shutil.rmtree(output_directory)
+        
+        full_build = None
+        for run in range(args.repeat):
+            output_directory = work_directory / f"build-{run}"
+            elapsed = run_full_build(input_directory, output_directory, args.graph_format)
+            full_build = elapsed if full_build is None else min(full_build, elapsed)
+            shutil.rmtree(output_directory)
+        
+        with contextlib.redirect_stdout(io.StringIO()):
+            peak, retained = measure_catalog_memory(input_directory, work_directory / 'memory')
+        
+        print(f"{'phase':<12} {'best (s)':>9} {'ms/page':>8}")
+        for phase in PHASES:
+            print(f"{phase:<12} {best[phase]:>9.3f} {best[phase] / num_pages * 1e3:>8.3f}")
+        print(f"{'total':<12} {sum(best.values()):>9.3f} {sum(best.values()) / num_pages * 1e3:>8.3f}")
+        print(f"{'full build':<12} {full_build:>9.3f} {full_build / num_pages * 1e3:>8.3f}")
+        print(f"build_catalog memory (tracemalloc): peak {peak / 2**20:.1f} MB, "
+              f"held after it {retained / 2**20:.1f} MB")
+    finally:
+        shutil.rmtree(work_directory)
+
+if __name__ == "__main__":
+    main()
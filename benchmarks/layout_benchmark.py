@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the layered graph layout for the photosi-catalog-site-builder.
+Lays out random directed graphs of growing size and reports the time per node,
+a graph of 500 nodes should take well under a second.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from utils.graph_utils import layered_layout
+
+def random_graph(num_nodes, num_edges, seed=1):
+    """
+    Create a random acyclic graph, with the edges going from lower to higher node numbers.
+    
+    Args:
+        num_nodes (int): Number of nodes.
+        num_edges (int): Number of edges.
+        seed (int): Seed of the random generator, for repeatable runs.
+    
+    Returns:
+        tuple: Ids of the nodes and edges as (source_id, target_id).
+    """
+    rnd = random.Random(seed)
+    nodes = [f"n{i}" for i in range(num_nodes)]
+    edges = []
+    for _ in range(num_edges):
+        source, target = sorted(rnd.sample(range(num_nodes), 2))
+        edges.append((nodes[source], nodes[target]))
+    return nodes, edges
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the layered graph layout.")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[100, 250, 500, 1000],
+                        help="Numbers of nodes of the random graphs, every graph has twice as many edges.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size, the best one is reported.")
+    args = parser.parse_args()
+    
+    print(f"{'nodes':>6} {'edges':>6} {'best (s)':>9} {'us/node':>8}")
+    for size in args.sizes:
+        best = None
+        for run in range(args.repeat):
+            # Layouts are cached by the shape of the graph, every run lays out a different graph
+            nodes, edges = random_graph(size, size * 2, seed=run + 1)
+            start = time.perf_counter()
+            layered_layout(nodes, edges)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        
+        print(f"{size:>6} {size * 2:>6} {best:>9.3f} {best / size * 1e6:>8.1f}")
+
+if __name__ == "__main__":
+    main()
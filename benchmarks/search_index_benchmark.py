@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the search index construction for the photosi-catalog-site-builder.
+Builds the index of synthetic catalogs of growing size and reports the time per document,
+which stays flat while construction scales linearly.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from models.event import Event
+from models.service import Service
+from generators.search_index import SearchIndexGenerator
+
+WORDS = [
+    'order', 'print', 'photo', 'album', 'customer', 'payment', 'shipment', 'invoice',
+    'product', 'cart', 'coupon', 'refund', 'stock', 'label', 'upload', 'render',
+]
+
+def synthetic_catalog(num_events, seed=1):
+    """
+    Create the services and events of a synthetic catalog.
+    
+    Args:
+        num_events (int): Number of events, the catalog has one service every ten events.
+        seed (int): Seed of the random generator, for repeatable runs.
+    
+    Returns:
+        tuple: Lists of services and events.
+    """
+    rnd = random.Random(seed)
+    services = []
+    for i in range(max(1, num_events // 10)):
+        words = rnd.sample(WORDS, 4)
+        services.append(Service(f"{words[0]}-service-{i}", f"{words[0].title()} Service {i}",
+                                f"Handles {' '.join(words)} https://github.com/photosi/{words[0]}-{i}"))
+    
+    events = []
+    for i in range(num_events):
+        event_type = ('message', 'request', 'command')[i % 3]
+        words = rnd.sample(WORDS, 3)
+        name = f"{words[0].title()}:{words[1].title()}{words[2].title()}{i}"
+        events.append(Event(f"{event_type}{i}", name, event_type, f"The {words[1]} was {words[2]}ed"))
+    
+    return services, events
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the search index construction.")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[2500, 5000, 10000, 20000, 40000],
+                        help="Numbers of events of the synthetic catalogs.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size, the best one is reported.")
+    args = parser.parse_args()
+    
+    print(f"{'events':>8} {'documents':>10} {'terms':>8} {'shards':>7} {'best (s)':>9} {'us/doc':>7}")
+    for size in args.sizes:
+        services, events = synthetic_catalog(size)
+        documents = SearchIndexGenerator('.').collect_documents(services, events)
+        
+        best = None
+        for _ in range(args.repeat):
+            # A new generator, which has not tokenized the documents yet
+            generator = SearchIndexGenerator('.')
+            start = time.perf_counter()
+            shards = generator.build(documents)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        
+        num_terms = sum(len(terms) for terms in shards.values())
+        print(f"{size:>8} {len(documents):>10} {num_terms:>8} {len(shards):>7} {best:>9.3f} "
+              f"{best / len(documents) * 1e6:>7.1f}")
+
+if __name__ == "__main__":
+    main()
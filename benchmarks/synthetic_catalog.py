@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Synthetic catalog generator for the photosi-catalog-site-builder.
+Writes an AsyncAPI catalog with the services/, channels/ and messages/ layout the
+parsers expect, with a configurable size, fan-in/fan-out and description length.
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+
+import yaml
+
+# Event types, as in the messages/<type> directories
+EVENT_TYPES = ['message', 'request', 'command']
+
+WORDS = [
+    'order', 'print', 'photo', 'album', 'customer', 'payment', 'shipment', 'invoice',
+    'product', 'cart', 'coupon', 'refund', 'stock', 'label', 'upload', 'render',
+    'the', 'is', 'was', 'for', 'with', 'when', 'after', 'before',
+]
+
+def _description(rnd, num_words, link):
+    """
+    Create a description of random words.
+    
+    Args:
+        rnd (Random): Random generator.
+        num_words (int): Number of words.
+        link (str): GitHub path appended to the description, as in the real catalog.
+    
+    Returns:
+        str: The description.
+    """
+    words = [rnd.choice(WORDS) for _ in range(num_words)]
+    return f"{' '.join(words).capitalize()} https://github.com/photosi/{link}"
+
+def _pick_events(rnd, num_events, count, weights):
+    """
+    Pick distinct event indexes, following the popularity weights.
+    
+    Args:
+        rnd (Random): Random generator.
+        num_events (int): Number of events.
+        count (int): Number of events to pick.
+        weights (list): Cumulative popularity weight of every event, or None for a uniform choice.
+    
+    Returns:
+        list: Sorted indexes of the picked events.
+    """
+    count = min(count, num_events)
+    if weights is None:
+        return sorted(rnd.sample(range(num_events), count))
+    
+    picked = set()
+    while len(picked) < count:
+        picked.update(rnd.choices(range(num_events), cum_weights=weights, k=count - len(picked)))
+    return sorted(picked)
+
+def generate_catalog(root, num_services=50, events_per_type=100, fan_out=4, fan_in=4,
+                     skew=0.0, description_words=30, num_directories=20, seed=1):
+    """
+    Write a synthetic AsyncAPI catalog.
+    
+    Every event has a message file and a channel file, in one of the message
+    directories. Every service sends and receives a random number of events,
+    on average fan_out and fan_in: with skew 0 every event is equally likely,
+    with a higher skew the popularity follows a Zipf law and a few hub events
+    get most of the publishers and consumers.
+    
+    Args:
+        root (str): Directory of the catalog, created if it doesn't exist.
+        num_services (int): Number of services.
+        events_per_type (int): Number of events of every type.
+        fan_out (int): Average number of events sent by a service.
+        fan_in (int): Average number of events received by a service.
+        skew (float): Exponent of the Zipf law of the event popularity, 0 for uniform.
+        description_words (int): Number of words in every description.
+        num_directories (int): Number of message directories.
+        seed (int): Seed of the random generator, for repeatable catalogs.
+    
+    Returns:
+        dict: Number of services, events and files written.
+    """
+    rnd = random.Random(seed)
+    root = Path(root)
+    
+    channel_refs = []
+    num_files = 0
+    for event_type in EVENT_TYPES:
+        for i in range(events_per_type):
+            directory = f"dir{i % num_directories}"
+            container_id = f"{event_type}{i}"
+            file_name = f"{event_type}.{container_id}.yaml"
+            
+            message_file = root / 'messages' / event_type / directory / file_name
+            message_file.parent.mkdir(parents=True, exist_ok=True)
+            message_file.write_text(yaml.safe_dump({
+                'components': {
+                    'messages': {
+                        container_id: {
+                            'title': f"{directory.capitalize()}:{event_type.capitalize()}Event{i}",
+                            'description': _description(rnd, description_words, f"{directory}-{i}"),
+                            'payload': {
+                                'type': 'object',
+                                'properties': {f"field{k}": {'type': 'string'} for k in range(5)},
+                            },
+                        }
+                    }
+                }
+            }, sort_keys=False), encoding='utf-8')
+            
+            channel_id = f"{event_type}{directory}{container_id}"
+            channel_file = root / 'channels' / directory / file_name
+            channel_file.parent.mkdir(parents=True, exist_ok=True)
+            channel_file.write_text(yaml.safe_dump({
+                'channels': {
+                    channel_id: {
+                        'address': f"{directory}.{container_id}",
+                        'messages': {
+                            container_id: {
+                                '$ref': f"../../messages/{event_type}/{directory}/{file_name}#/components/messages/{container_id}"
+                            }
+                        },
+                    }
+                }
+            }, sort_keys=False), encoding='utf-8')
+            
+            channel_refs.append(f"../channels/{directory}/{file_name}#/channels/{channel_id}")
+            num_files += 2
+    
+    # Shuffle the popularity ranks, so the hubs are spread over types and directories
+    weights = None
+    if skew > 0:
+        ranks = list(range(len(channel_refs)))
+        rnd.shuffle(ranks)
+        weights = []
+        total = 0.0
+        for rank in ranks:
+            total += 1.0 / (rank + 1) ** skew
+            weights.append(total)
+    
+    services_dir = root / 'services'
+    services_dir.mkdir(parents=True, exist_ok=True)
+    for s in range(num_services):
+        operations = {}
+        for action, mean in (('send', fan_out), ('receive', fan_in)):
+            count = rnd.randint(0, 2 * mean)
+            for index in _pick_events(rnd, len(channel_refs), count, weights):
+                operations[f"{action}Event{index}"] = {
+                    'action': action,
+                    'channel': {'$ref': channel_refs[index]},
+                }
+        
+        (services_dir / f"service-{s}.yaml").write_text(yaml.safe_dump({
+            'info': {
+                'title': f"Service {s}",
+                'description': _description(rnd, description_words, f"service-{s}"),
+            },
+            'operations': operations,
+        }, sort_keys=False), encoding='utf-8')
+        num_files += 1
+    
+    return {
+        'services': num_services,
+        'events': len(channel_refs),
+        'files': num_files,
+    }
+
+def main():
+    """Write a synthetic catalog from the command line."""
+    parser = argparse.ArgumentParser(description="Generate a synthetic AsyncAPI catalog.")
+    parser.add_argument("output", help="Directory of the catalog.")
+    parser.add_argument("--services", type=int, default=50, help="Number of services.")
+    parser.add_argument("--events-per-type", type=int, default=100, help="Number of events of every type.")
+    parser.add_argument("--fan-out", type=int, default=4, help="Average number of events sent by a service.")
+    parser.add_argument("--fan-in", type=int, default=4, help="Average number of events received by a service.")
+    parser.add_argument("--skew", type=float, default=0.0,
+                        help="Zipf exponent of the event popularity, 0 for uniform.")
+    parser.add_argument("--description-words", type=int, default=30, help="Number of words in every description.")
+    parser.add_argument("--directories", type=int, default=20, help="Number of message directories.")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the random generator.")
+    args = parser.parse_args()
+    
+    if Path(args.output).exists() and any(Path(args.output).iterdir()):
+        print(f"Error: {args.output} is not empty")
+        sys.exit(1)
+    
+    counts = generate_catalog(args.output, args.services, args.events_per_type, args.fan_out, args.fan_in,
+                              args.skew, args.description_words, args.directories, args.seed)
+    print(f"Generated {counts['services']} services and {counts['events']} events "
+          f"({counts['files']} files) in {args.output}")
+
+if __name__ == "__main__":
+    main()
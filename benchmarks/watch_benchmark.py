@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the --watch rebuilds for the photosi-catalog-site-builder.
+Builds a synthetic catalog with staging, as --watch does, then edits the description
+of one message file at a time and reports the time of every rebuild and of its phases.
+"""
+
+import argparse
+import contextlib
+import io
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from generators.site_generator import SiteGenerator
+from generators.watcher import CatalogWatcher
+from utils.build_profile import BuildProfile
+from synthetic_catalog import generate_catalog
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the rebuilds of --watch after a single-file edit.")
+    parser.add_argument("--services", type=int, default=300, help="Number of services.")
+    parser.add_argument("--events-per-type", type=int, default=1000, help="Number of events of every type.")
+    parser.add_argument("--catalog", help="Existing catalog to build instead of a synthetic one, it is copied.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of edits, the best rebuild is reported.")
+    args = parser.parse_args()
+    
+    work_directory = Path(tempfile.mkdtemp(prefix='watch-benchmark-'))
+    try:
+        input_directory = work_directory / 'catalog'
+        if args.catalog is not None:
+            shutil.copytree(args.catalog, input_directory)
+        else:
+            counts = generate_catalog(input_directory, args.services, args.events_per_type)
+            print(f"Synthetic catalog: {counts['services']} services, {counts['events']} events, "
+                  f"{counts['files']} files")
+        
+        profile = BuildProfile()
+        generator = SiteGenerator(input_directory, work_directory / 'site', profile=profile, staging=True,
+                                  write_threads=4)
+        watcher = CatalogWatcher(generator, interval=0)
+        watcher.changed_files()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            watcher.rebuild()
+        print(f"{'first build':<20} {time.perf_counter() - start:>9.3f}")
+        
+        # Edit the same message file every time, as when working on one event
+        message_file = sorted((input_directory / 'messages').rglob('*.yaml'))[0]
+        content = message_file.read_text()
+        best = None
+        best_phases = {}
+        for run in range(args.repeat):
+            message_file.write_text(content.replace('description:', f"description: Edit {run}.", 1))
+            profile.phases.clear()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                watcher.rebuild(watcher.changed_files())
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best:
+                best = elapsed
+                best_phases = {phase: timings[0] for phase, timings in profile.phases.items()}
+        
+        print(f"{'rebuild':<20} {best:>9.3f}")
+        for phase, elapsed in best_phases.items():
+            print(f"  {phase:<18} {elapsed:>9.3f}")
+    finally:
+        shutil.rmtree(work_directory)
+
+if __name__ == "__main__":
+    main()
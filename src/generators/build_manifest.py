@@ -0,0 +1,218 @@
+"""
+Build manifest module for the photosi-catalog-site-builder.
+Records which input files every generated file depends on, to support incremental builds.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from generators.output_writer import OutputWriter
+
+# Bump this whenever the generated output changes, so the next build is a full one
+MANIFEST_VERSION = 1
+
+MANIFEST_FILENAME = '.build-manifest.json'
+
+class BuildManifest:
+    """Dependency manifest mapping every output to the inputs it was built from."""
+    
+    def __init__(self, input_directory, output_directory, file_hashes=None):
+        """
+        Initialize the build manifest.
+        
+        Args:
+            input_directory (str): Directory containing the AsyncAPI files.
+            output_directory (str): Directory where the generated site is saved.
+            file_hashes (dict, optional): Canonical paths and content hashes of the input files,
+                shared between builds of the same input directory.
+        """
+        self.input_directory = Path(os.path.realpath(input_directory))
+        self.output_directory = Path(output_directory)
+        self.manifest_file = self.output_directory / MANIFEST_FILENAME
+        self._output_prefix = os.path.join(self.output_directory, '')
+        
+        # State of the previous build
+        self.previous_inputs = {}
+        self.previous_outputs = {}
+        
+        # State of the current build
+        self.inputs = {}
+        self.outputs = {}
+        
+        # Path -> [canonical path, key, signature, content hash], the hash is valid while
+        # the file keeps the same signature
+        self.file_hashes = file_hashes if file_hashes is not None else {}
+    
+    def load(self, previous=None):
+        """
+        Load the manifest written by the previous build, if any.
+        
+        Args:
+            previous (BuildManifest, optional): Manifest saved by the previous build of the same
+                generator, used instead of reading the file again.
+        
+        Returns:
+            bool: True if a compatible manifest was found.
+        """
+        if previous is not None:
+            self.previous_inputs = previous.inputs
+            self.previous_outputs = previous.outputs
+            return True
+        
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        
+        if data.get('version') != MANIFEST_VERSION:
+            return False
+        
+        self.previous_inputs = data.get('inputs', {})
+        self.previous_outputs = data.get('outputs', {})
+        return True
+    
+    def save(self):
+        """Write the manifest of the current build."""
+        data = {
+            'version': MANIFEST_VERSION,
+            'inputs': self.inputs,
+            'outputs': self.outputs,
+        }
+        os.makedirs(self.output_directory, exist_ok=True)
+        
+        # The manifest may be a hard link to the published one, the writer replaces it only if changed
+        OutputWriter().write_text(self.manifest_file, json.dumps(data, separators=(',', ':'), sort_keys=True))
+    
+    def file_input(self, file_path, key=None):
+        """
+        Register an input file and compute its content hash.
+        
+        Args:
+            file_path (str): Path to the input file.
+            key (str, optional): Key of the input, defaults to the path relative to the input directory.
+        
+        Returns:
+            str: Key of the input in the manifest.
+        """
+        entry = self.file_hashes.get(os.fspath(file_path))
+        if entry is None:
+            real_path = os.path.realpath(file_path)
+            entry = [real_path, None, None, None]
+            self.file_hashes[os.fspath(file_path)] = entry
+        
+        real_path = entry[0]
+        if key is None:
+            if entry[1] is None:
+                entry[1] = Path(real_path).relative_to(self.input_directory).as_posix()
+            key = entry[1]
+        
+        if key not in self.inputs:
+            # Hash the content only if the file changed since it was last hashed
+            stat = os.stat(real_path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if entry[2] != signature:
+                with open(real_path, 'rb') as f:
+                    entry[3] = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+                entry[2] = signature
+            self.inputs[key] = entry[3]
+        
+        return key
+    
+    def value_input(self, key, value):
+        """
+        Register a derived input, such as the list of services shown in the sidebar.
+        
+        Args:
+            key (str): Key of the input in the manifest, starting with '@'.
+            value (object): JSON-serialisable value the output depends on.
+        
+        Returns:
+            str: Key of the input in the manifest.
+        """
+        encoded = json.dumps(value, sort_keys=True).encode('utf-8')
+        self.inputs[key] = hashlib.blake2b(encoded, digest_size=16).hexdigest()
+        return key
+    
+    def is_dirty(self, output_key, input_keys):
+        """
+        Check whether an output must be rebuilt.
+        
+        An output is up to date only if it was built by the previous run from
+        exactly the same inputs, none of which changed, and its files still exist.
+        
+        Args:
+            output_key (str): Key of the output in the manifest.
+            input_keys (iterable): Keys of the inputs the output depends on.
+        
+        Returns:
+            bool: True if the output must be rebuilt.
+        """
+        previous = self.previous_outputs.get(output_key)
+        if previous is None:
+            return True
+        
+        input_keys = sorted(set(input_keys))
+        if previous['inputs'] != input_keys:
+            return True
+        
+        for key in input_keys:
+            if self.previous_inputs.get(key) != self.inputs.get(key):
+                return True
+        
+        return not all(os.path.exists(self._output_prefix + f) for f in previous['files'])
+    
+    def record(self, output_key, files, input_keys):
+        """
+        Record an output of the current build.
+        
+        Args:
+            output_key (str): Key of the output in the manifest.
+            files (list): Paths of the generated files, relative to the output directory.
+            input_keys (iterable): Keys of the inputs the output depends on.
+        """
+        self.outputs[output_key] = {
+            'files': sorted(files),
+            'inputs': sorted(set(input_keys)),
+        }
+    
+    def previous_files(self, output_key):
+        """
+        Get the files an output had in the previous build.
+        
+        Args:
+            output_key (str): Key of the output in the manifest.
+        
+        Returns:
+            list: Paths of the files, relative to the output directory.
+        """
+        previous = self.previous_outputs.get(output_key)
+        return list(previous['files']) if previous is not None else []
+    
+    def remove_stale_outputs(self):
+        """
+        Delete the files of the previous build that the current build no longer produces.
+        
+        These are the files of the outputs that disappeared and the files an
+        output doesn't have anymore, such as the shards of a smaller index.
+        
+        Returns:
+            list: Paths of the deleted files.
+        """
+        current_files = set()
+        for output in self.outputs.values():
+            current_files.update(output['files'])
+        
+        removed = []
+        for output in self.previous_outputs.values():
+            for relative_path in output['files']:
+                if relative_path in current_files:
+                    continue
+                file_path = self.output_directory / relative_path
+                if file_path.exists():
+                    os.remove(file_path)
+                    removed.append(str(file_path))
+        
+        return removed
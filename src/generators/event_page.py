@@ -4,68 +4,47 @@ Generates HTML pages for event documentation.
 """
 
 import os
-import re
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
+
+from generators.output_writer import OutputWriter
+from generators.template_environment import create_environment, github_to_link
 
 class EventPageGenerator:
     """Generator for event documentation pages."""
     
-    def __init__(self, output_directory):
+    def __init__(self, output_directory, env=None, writer=None):
         """
         Initialize the event page generator.
         
         Args:
             output_directory (str): Directory where the generated pages will be saved.
+            env (Environment, optional): Template environment shared by the page generators.
+            writer (OutputWriter, optional): Writer shared by the generators of the build.
         """
         self.output_directory = Path(output_directory)
         
-        # Set up Jinja2 environment
-        templates_dir = Path(__file__).parent.parent / 'templates'
-        self.env = Environment(loader=FileSystemLoader(templates_dir))
-        
-        # Add custom filter to convert GitHub URLs to links
-        self.env.filters['github_to_link'] = self.github_to_link
+        # Use the environment shared by the build, or a private one
+        self.env = env if env is not None else create_environment()
+        self.writer = writer if writer is not None else OutputWriter()
         
-    def github_to_link(self, text):
+    def render(self, event, publishing_services=None, consuming_services=None):
         """
-        Convert GitHub URLs in text to HTML links.
+        Render the HTML page for an event.
         
         Args:
-            text (str): The text containing GitHub URLs.
-            
-        Returns:
-            str: Text with GitHub URLs converted to HTML links.
-        """
-        # Pattern to match GitHub URLs
-        pattern = r'(https://github\.com/[\w\-\.]+/[\w\-\.]+(?:\.git)?)'
-        
-        # Replace URLs with HTML links
-        return re.sub(pattern, r'<a href="\1" target="_blank">\1</a>', text)
-        
-    def generate(self, event, publishing_services=None, consuming_services=None, all_events=None):
-        """
-        Generate the HTML page for an event.
-        
-        Args:
-            event (Event): Event object to generate the page for.
+            event (Event): Event object to render the page for.
             publishing_services (list): List of services that publish this event.
             consuming_services (list): List of services that consume this event.
-            all_events (list): List of all event names for the sidebar.
             
         Returns:
-            str: Path to the generated page.
+            str: The HTML of the page.
         """
-        # Ensure the output directory exists
-        events_dir = self.output_directory / 'events'
-        os.makedirs(events_dir, exist_ok=True)
-        
         # Get event dictionary
         event_dict = event.to_dict()
         
         # Process description to convert GitHub URLs to links
         if 'description' in event_dict:
-            event_dict['description'] = self.github_to_link(event_dict['description'])
+            event_dict['description'] = github_to_link(event_dict['description'])
         
         # Prepare the context for the template
         # Replace any : or . in the event.name with _ for safety in the filename
@@ -74,22 +53,36 @@ class EventPageGenerator:
             'event': event_dict,
             'graph_data_url': f'/static/js/graph-data/{event.type}_{safe_name}.json',
             'publishing_services': publishing_services or [],
-            'consuming_services': consuming_services or [],
-            'all_events': all_events or []
+            'consuming_services': consuming_services or []
         }
         
         # Get the template
         template = self.env.get_template('event_page.html')
         
         # Render the template
-        output = template.render(**context)
+        return template.render(**context)
+    
+    def generate(self, event, publishing_services=None, consuming_services=None):
+        """
+        Generate the HTML page for an event.
+        
+        Args:
+            event (Event): Event object to generate the page for.
+            publishing_services (list): List of services that publish this event.
+            consuming_services (list): List of services that consume this event.
+            
+        Returns:
+            str: Path to the generated page.
+        """
+        # Ensure the output directory exists
+        events_dir = self.output_directory / 'events'
+        os.makedirs(events_dir, exist_ok=True)
+        
+        output = self.render(event, publishing_services, consuming_services)
         
         # Write the output to a file - use a safe version of the event name for the filename
         # Replace any : or . in the event.name with _ for safety in the filename
         # Make sure we use the same safe name format throughout the application
         safe_name = event.name.replace(":", "_").replace(".", "_")
         output_file = events_dir / f"{event.type}_{safe_name}.html"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(output)
-            
-        return str(output_file)
+        return self.writer.write_text(output_file, output)
@@ -6,28 +6,46 @@ Generates an HTML page with a table of all events.
 import os
 from pathlib import Path
 from collections import defaultdict
-from jinja2 import Environment, FileSystemLoader
+
+from generators.output_writer import OutputWriter
+from generators.template_environment import create_environment
+
+# Number of rows in a shard of the table data, a multiple of every page size the table offers
+TABLE_SHARD_SIZE = 100
 
 class EventTableGenerator:
     """Generator for the event table page."""
     
-    def __init__(self, output_directory):
+    def __init__(self, output_directory, env=None, shard_size=TABLE_SHARD_SIZE, writer=None):
         """
         Initialize the event table generator.
         
         Args:
             output_directory (str): Directory where the generated page will be saved.
+            env (Environment, optional): Template environment shared by the page generators.
+            shard_size (int): Number of rows in a shard of the table data.
+            writer (OutputWriter, optional): Writer shared by the generators of the build.
         """
         self.output_directory = Path(output_directory)
+        self.shard_size = shard_size
         
-        # Set up Jinja2 environment
-        templates_dir = Path(__file__).parent.parent / 'templates'
-        self.env = Environment(loader=FileSystemLoader(templates_dir))
+        # Use the environment shared by the build, or a private one
+        self.env = env if env is not None else create_environment()
+        self.writer = writer if writer is not None else OutputWriter()
         
+        # Rows of every shard written by the last build, so a rebuild encodes only the changed shards,
+        # and paths of all the data files of the last table generated
+        self._shards = {}
+        self.data_files = set()
+    
     def generate(self, events, event_relations):
         """
         Generate the HTML page with the event table.
         
+        The page is a light shell: the rows are written as JSON shards of
+        shard_size events per type, sorted by name, and the page fetches
+        only the shards of the rows it shows.
+        
         Args:
             events (list): List of all event objects.
             event_relations (dict): Dictionary with event relations (publishing and consuming services).
@@ -35,9 +53,10 @@ class EventTableGenerator:
         Returns:
             str: Path to the generated page.
         """
-        # Ensure the output directory exists
+        # Ensure the output directories exist
         events_dir = self.output_directory / 'events'
-        os.makedirs(events_dir, exist_ok=True)
+        data_dir = events_dir / 'table-data'
+        os.makedirs(data_dir, exist_ok=True)
         
         # Prepare event data for the template
         event_data = []
@@ -85,19 +104,22 @@ class EventTableGenerator:
         # Sort events by name
         event_data.sort(key=lambda x: x['name'])
         
-        # Calculate pagination data
-        page_size = 10  # Default page size
-        total_events = len(event_data)
-        total_pages = (total_events + page_size - 1) // page_size  # Ceiling division
+        # Write the rows of every event type in shards, the page loads only the visible ones
+        data_files = self._write_table_data(event_data, data_dir)
+        
+        # Remove the shards of a previous build that aren't needed anymore
+        for data_file in data_dir.glob('*.json'):
+            if data_file not in data_files:
+                os.remove(data_file)
+        self.data_files = data_files
         
         # Prepare the context for the template
         context = {
-            'events': event_data,
-            'total_events': total_events,
+            'total_events': len(event_data),
             'message_count': message_count,
             'request_count': request_count,
             'command_count': command_count,
-            'total_pages': total_pages
+            'table_data_url': '/events/table-data'
         }
         
         # Get the template
@@ -108,7 +130,48 @@ class EventTableGenerator:
         
         # Write the output to a file
         output_file = events_dir / "table.html"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(output)
+        return self.writer.write_text(output_file, output)
+    
+    def _write_table_data(self, event_data, data_dir):
+        """
+        Write the rows of the event table as JSON shards, with an index of the shards.
+        
+        Every row is [name, id, producers, consumers], where producers and consumers
+        are lists of [service id, service title].
+        
+        Args:
+            event_data (list): Rows of the table, sorted by name.
+            data_dir (Path): Directory where the shards are saved.
+        
+        Returns:
+            set: Paths of the written files.
+        """
+        rows_by_type = {'message': [], 'request': [], 'command': []}
+        for event in event_data:
+            rows_by_type.setdefault(event['type'], []).append([
+                event['name'],
+                event['id'],
+                [[service.id, service.title] for service in event['publishing_services']],
+                [[service.id, service.title] for service in event['consuming_services']],
+            ])
+        
+        data_files = set()
+        written_shards = {}
+        index = {'shard_size': self.shard_size, 'types': {}}
+        for event_type, rows in rows_by_type.items():
+            shards = [rows[i:i + self.shard_size] for i in range(0, len(rows), self.shard_size)]
+            index['types'][event_type] = {'count': len(rows), 'shards': len(shards)}
             
-        return str(output_file)
+            for number, shard in enumerate(shards):
+                shard_file = data_dir / f"{event_type}-{number}.json"
+                if self._shards.get(shard_file) != shard or not shard_file.exists():
+                    self.writer.write_json(shard_file, shard)
+                data_files.add(shard_file)
+                written_shards[shard_file] = shard
+        
+        index_file = data_dir / 'index.json'
+        self.writer.write_json(index_file, index)
+        data_files.add(index_file)
+        
+        self._shards = written_shards
+        return data_files
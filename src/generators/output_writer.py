@@ -0,0 +1,287 @@
+"""
+Output writer module for the photosi-catalog-site-builder.
+Writes the files of the generated site, leaving untouched the files whose content didn't change.
+"""
+
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class OutputWriter:
+    """
+    Writer shared by the generators for all the files of the site.
+    
+    A file whose content is unchanged is not written again, so it keeps its
+    modification time and sync tools don't transfer it. A changed file is
+    written to a temporary file that replaces it, so the old file is never
+    modified in place: it may be a hard link shared with the published site.
+    
+    With threads > 0 the files are written by a pool of background threads,
+    so rendering goes on while the disk is busy. At most max_pending writes
+    are queued, write_text blocks when the queue is full, and flush waits for
+    the queued writes and reports the ones that failed.
+    """
+    
+    def __init__(self, threads=0, max_pending=256):
+        """
+        Initialize the writer with empty counters.
+        
+        Args:
+            threads (int): Number of background writer threads, 0 to write synchronously.
+            max_pending (int): Maximum number of writes queued for the background threads.
+        """
+        self.threads = threads
+        self.max_pending = max_pending
+        self.files_written = 0
+        self.bytes_written = 0
+        self.files_unchanged = 0
+        
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._errors = []
+    
+    def write_text(self, file_path, text):
+        """
+        Write a text file, encoded as UTF-8, unless it already has this content.
+        
+        With background threads the file is only queued, it is written by the time flush returns.
+        
+        Args:
+            file_path (str): Path to the file, its directory must exist.
+            text (str): Content of the file.
+        
+        Returns:
+            str: Path to the file.
+        """
+        data = text.encode('utf-8')
+        if self.threads <= 0:
+            self._write(file_path, data)
+            return str(file_path)
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='output-writer')
+            self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._slots.acquire()
+        self._executor.submit(self._write_queued, file_path, data)
+        return str(file_path)
+    
+    def flush(self):
+        """
+        Wait until all the queued writes are done and stop the writer threads.
+        
+        The threads are started again by the next queued write. Worker processes
+        must be forked after a flush, so they don't inherit locks held by the threads.
+        
+        Raises:
+            OSError: If some files could not be written.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        
+        errors, self._errors = self._errors, []
+        if errors:
+            details = '; '.join(f"{file_path}: {error}" for file_path, error in errors[:5])
+            raise OSError(f"Failed to write {len(errors)} files: {details}")
+    
+    def _write_queued(self, file_path, data):
+        """
+        Write a queued file in a background thread, collecting the error if it fails.
+        
+        Args:
+            file_path (str): Path to the file.
+            data (bytes): Content of the file.
+        """
+        try:
+            self._write(file_path, data)
+        except Exception as e:
+            with self._lock:
+                self._errors.append((str(file_path), e))
+        finally:
+            self._slots.release()
+    
+    def _write(self, file_path, data):
+        """
+        Write a file unless it already has this content.
+        
+        Args:
+            file_path (str): Path to the file.
+            data (bytes): Content of the file.
+        """
+        if _has_content(file_path, data):
+            with self._lock:
+                self.files_unchanged += 1
+            return
+        
+        temporary_path = f"{file_path}.tmp"
+        try:
+            with open(temporary_path, 'wb') as f:
+                f.write(data)
+            os.replace(temporary_path, file_path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+        with self._lock:
+            self.files_written += 1
+            self.bytes_written += len(data)
+    
+    def write_json(self, file_path, data, indent=None):
+        """
+        Write a JSON file, without whitespace unless indented.
+        
+        Args:
+            file_path (str): Path to the file, its directory must exist.
+            data (object): Data to serialize.
+            indent (int, optional): Indentation of the JSON.
+        
+        Returns:
+            str: Path to the file.
+        """
+        separators = (',', ':') if indent is None else None
+        return self.write_text(file_path, json.dumps(data, indent=indent, separators=separators))
+    
+    def copy_file(self, source, destination):
+        """
+        Copy a file with its metadata, unless the copy has the same size and modification time.
+        
+        Args:
+            source (str): Path to the file to copy.
+            destination (str): Path to the copy, or to the directory it is copied to.
+        
+        Returns:
+            str: Path to the copy.
+        """
+        if os.path.isdir(destination):
+            destination = os.path.join(destination, os.path.basename(source))
+        
+        source_stat = os.stat(source)
+        try:
+            destination_stat = os.stat(destination)
+            if (destination_stat.st_size, destination_stat.st_mtime_ns) == (source_stat.st_size, source_stat.st_mtime_ns):
+                with self._lock:
+                    self.files_unchanged += 1
+                return str(destination)
+        except OSError:
+            pass
+        
+        temporary_path = f"{destination}.tmp"
+        shutil.copy2(source, temporary_path)
+        os.replace(temporary_path, destination)
+        with self._lock:
+            self.files_written += 1
+            self.bytes_written += source_stat.st_size
+        return str(destination)
+    
+    def add_counts(self, files_written, bytes_written, files_unchanged=0):
+        """
+        Add the files written by another writer, e.g. in a worker process.
+        
+        Args:
+            files_written (int): Number of files written.
+            bytes_written (int): Number of bytes written.
+            files_unchanged (int): Number of files left unchanged.
+        """
+        with self._lock:
+            self.files_written += files_written
+            self.bytes_written += bytes_written
+            self.files_unchanged += files_unchanged
+
+def _has_content(file_path, data):
+    """
+    Check whether a file exists with exactly the given content.
+    
+    The size is compared first, so most changed files are detected without reading them.
+    
+    Args:
+        file_path (str): Path to the file.
+        data (bytes): The content.
+    
+    Returns:
+        bool: True if the file has the content.
+    """
+    try:
+        if os.path.getsize(file_path) != len(data):
+            return False
+        with open(file_path, 'rb') as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+def link_tree(source, destination):
+    """
+    Copy a directory tree with hard links instead of copying the files.
+    
+    The copy shares the files with the source, so it must only be changed by
+    replacing or removing files, as OutputWriter does. Where hard links aren't
+    supported the files are copied.
+    
+    Args:
+        source (str): Directory to copy.
+        destination (str): Directory of the copy, it must not exist.
+    """
+    for directory, _, file_names in os.walk(source):
+        target_directory = os.path.join(destination, os.path.relpath(directory, source))
+        os.makedirs(target_directory, exist_ok=True)
+        for file_name in file_names:
+            source_file = os.path.join(directory, file_name)
+            target_file = os.path.join(target_directory, file_name)
+            try:
+                os.link(source_file, target_file)
+            except OSError:
+                shutil.copy2(source_file, target_file)
+
+def sync_tree(source, destination):
+    """
+    Update a hard-linked copy of a directory tree, made by link_tree, to match the source again.
+    
+    Only the entries that differ are changed: a file is linked again if it is
+    not the same inode as in the source, and the entries the source no longer
+    has are removed. The inodes are read from the directory listings, without
+    a system call per file, so syncing a copy that is almost up to date costs
+    much less than copying the tree again.
+    
+    Args:
+        source (str): Directory to copy.
+        destination (str): Directory of the copy, it must exist.
+    """
+    with os.scandir(source) as entries:
+        source_entries = {entry.name: entry for entry in entries}
+    with os.scandir(destination) as entries:
+        destination_entries = {entry.name: entry for entry in entries}
+    
+    for name, entry in source_entries.items():
+        target = os.path.join(destination, name)
+        existing = destination_entries.pop(name, None)
+        is_directory = entry.is_dir(follow_symlinks=False)
+        
+        # An entry that changed between file and directory is removed first
+        if existing is not None and existing.is_dir(follow_symlinks=False) != is_directory:
+            if is_directory:
+                os.remove(target)
+            else:
+                shutil.rmtree(target)
+            existing = None
+        
+        if is_directory:
+            if existing is None:
+                link_tree(entry.path, target)
+            else:
+                sync_tree(entry.path, target)
+        elif existing is None or existing.inode() != entry.inode():
+            if existing is not None:
+                os.remove(target)
+            try:
+                os.link(entry.path, target)
+            except OSError:
+                shutil.copy2(entry.path, target)
+    
+    # The entries left are not in the source anymore
+    for entry in destination_entries.values():
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path)
+        else:
+            os.remove(entry.path)
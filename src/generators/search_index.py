@@ -0,0 +1,284 @@
+"""
+Search index module for the photosi-catalog-site-builder.
+Generates the inverted index used by the site search, split in shards by term prefix.
+"""
+
+import os
+import re
+from bisect import bisect_left, insort
+from pathlib import Path
+
+from generators.output_writer import OutputWriter
+
+# Number of leading characters of a term that select its shard
+SEARCH_PREFIX_LENGTH = 2
+
+# Number of documents in a shard of the document list
+SEARCH_DOCUMENTS_PER_SHARD = 500
+
+# Weight of a term found in the title of a document, and in the other fields
+TITLE_WEIGHT = 2
+TEXT_WEIGHT = 1
+
+_WORD_PATTERN = re.compile(r'[A-Za-z0-9]+')
+_CAMEL_CASE_PATTERN = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+')
+
+def tokenize(text):
+    """
+    Split text into lowercase search terms.
+    
+    Every word is indexed as a whole and, if it is written in camel case,
+    also by its parts, so 'OrderCreated' is found by 'ordercreated' and 'created'.
+    
+    Args:
+        text (str): The text to split.
+    
+    Returns:
+        set: The search terms of the text.
+    """
+    terms = set()
+    for word in _WORD_PATTERN.findall(text or ''):
+        terms.add(word.lower())
+        for part in _CAMEL_CASE_PATTERN.findall(word):
+            terms.add(part.lower())
+    return {term for term in terms if len(term) >= SEARCH_PREFIX_LENGTH}
+
+class SearchIndexGenerator:
+    """Generator for the search index of services and events."""
+    
+    def __init__(self, output_directory, writer=None):
+        """
+        Initialize the search index generator.
+        
+        Args:
+            output_directory (str): Directory where the generated site will be saved.
+            writer (OutputWriter, optional): Writer shared by the generators of the build.
+        """
+        self.output_directory = Path(output_directory)
+        self.writer = writer if writer is not None else OutputWriter()
+        
+        # Terms of every document by searchable text, and the documents and shards of the last
+        # index, so a rebuild tokenizes, indexes and writes only what changed
+        self._postings = {}
+        self._documents = []
+        self._shards = {}
+        
+        # Paths of the files of the last index generated
+        self.data_files = set()
+    
+    def collect_documents(self, services, events):
+        """
+        Collect the searchable documents of the catalog.
+        
+        Args:
+            services (list): List of all service objects.
+            events (list): List of all event objects.
+        
+        Returns:
+            list: Documents as (title, url, kind, title_text, other_text).
+        """
+        documents = []
+        for service in services:
+            documents.append((
+                service.title,
+                f"/services/{service.id}.html",
+                'service',
+                f"{service.title} {service.id}",
+                service.description,
+            ))
+        
+        # Events with the same name share a page, the last one wins as for the pages
+        event_documents = {}
+        for event in events:
+            safe_id = event.name.replace(":", "_").replace(".", "_")
+            url = f"/events/{event.type}_{safe_id}.html"
+            event_documents[url] = (event.name, url, event.type, event.name, f"{event.type} {event.description}")
+        documents.extend(event_documents.values())
+        
+        return documents
+    
+    def build(self, documents):
+        """
+        Build the inverted index of the documents.
+        
+        Every document is read once and its postings are appended in document
+        order, so the construction time grows linearly with the catalog.
+        
+        Args:
+            documents (list): Documents as returned by collect_documents.
+        
+        Returns:
+            dict: Shards of the index by term prefix, each mapping a term to its
+                postings, a list of (document id, weight).
+        """
+        shards = {}
+        postings = {}
+        for document_id, document in enumerate(documents):
+            key = document[3:]
+            terms = postings[key] = postings.get(key) or self._postings.get(key) or self._terms(*key)
+            for term, weight in terms:
+                shard = shards.setdefault(term[:SEARCH_PREFIX_LENGTH], {})
+                shard.setdefault(term, []).append((document_id, weight))
+        
+        # Only the documents of the current catalog are kept
+        self._postings = postings
+        return shards
+    
+    def update(self, documents):
+        """
+        Update the shards of the last index with the documents that changed.
+        
+        The postings of the terms a changed document lost are removed from the
+        shards and those of the terms it gained are inserted, so the cost grows
+        with the number of changed documents, not with the catalog.
+        
+        Args:
+            documents (list): Documents as returned by collect_documents.
+        
+        Returns:
+            set: Prefixes of the shards that changed, or None if the documents were added,
+                removed or mostly changed, and the index must be built again.
+        """
+        if not self._documents or len(documents) != len(self._documents):
+            return None
+        changed_ids = [document_id for document_id, (previous, current) in enumerate(zip(self._documents, documents))
+                       if previous[3:] != current[3:]]
+        if len(changed_ids) > len(documents) // 4:
+            return None
+        
+        prefixes = set()
+        for document_id in changed_ids:
+            # Only the terms added, removed or weighted differently change the postings
+            previous_terms = set(self._postings[self._documents[document_id][3:]])
+            key = documents[document_id][3:]
+            terms = self._postings[key] = self._postings.get(key) or self._terms(*key)
+            
+            for term, weight in previous_terms.difference(terms):
+                prefix = term[:SEARCH_PREFIX_LENGTH]
+                shard = self._shards[prefix]
+                postings = shard[term]
+                del postings[bisect_left(postings, (document_id,))]
+                if not postings:
+                    del shard[term]
+                    if not shard:
+                        del self._shards[prefix]
+                prefixes.add(prefix)
+            for term, weight in terms:
+                if (term, weight) in previous_terms:
+                    continue
+                prefix = term[:SEARCH_PREFIX_LENGTH]
+                insort(self._shards.setdefault(prefix, {}).setdefault(term, []), (document_id, weight))
+                prefixes.add(prefix)
+        
+        # Only the documents of the current catalog are kept
+        if changed_ids:
+            keys = {document[3:] for document in documents}
+            self._postings = {key: terms for key, terms in self._postings.items() if key in keys}
+        return prefixes
+    
+    def _terms(self, title_text, other_text):
+        """
+        Get the weighted terms of a document.
+        
+        Args:
+            title_text (str): Text of the title of the document.
+            other_text (str): Other searchable text of the document.
+        
+        Returns:
+            list: Terms and their weights, sorted by term.
+        """
+        weights = dict.fromkeys(tokenize(other_text), TEXT_WEIGHT)
+        for term in tokenize(title_text):
+            weights[term] = weights.get(term, 0) + TITLE_WEIGHT
+        
+        # The order of a set changes between runs, sort the terms for reproducible shards
+        return sorted(weights.items())
+    
+    def _changed_prefixes(self, documents, previous_postings):
+        """
+        Get the shards that differ from the last index generated.
+        
+        Args:
+            documents (list): Documents of the new index, whose terms are already known.
+            previous_postings (dict): Terms of the documents of the last index.
+        
+        Returns:
+            set: Prefixes of the terms of the documents added, removed or changed,
+                or None if no index was generated before.
+        """
+        if not self._documents:
+            return None
+        
+        prefixes = set()
+        for document_id in range(max(len(documents), len(self._documents))):
+            previous = self._documents[document_id] if document_id < len(self._documents) else None
+            current = documents[document_id] if document_id < len(documents) else None
+            if previous == current:
+                continue
+            for document in (previous, current):
+                if document is not None:
+                    key = document[3:]
+                    terms = self._postings.get(key) or previous_postings.get(key) or self._terms(*key)
+                    prefixes.update(term[:SEARCH_PREFIX_LENGTH] for term, _ in terms)
+        return prefixes
+    
+    def generate(self, services, events):
+        """
+        Generate the search index files.
+        
+        The index is written to static/search: index.json describes the shards,
+        terms/<prefix>.json holds the terms starting with a prefix and
+        documents-<n>.json the titles and URLs of the documents.
+        
+        Args:
+            services (list): List of all service objects.
+            events (list): List of all event objects.
+        
+        Returns:
+            str: Path to the index description file.
+        """
+        search_dir = self.output_directory / 'static' / 'search'
+        terms_dir = search_dir / 'terms'
+        os.makedirs(terms_dir, exist_ok=True)
+        
+        documents = self.collect_documents(services, events)
+        changed_prefixes = self.update(documents)
+        if changed_prefixes is None:
+            previous_postings = self._postings
+            self._shards = self.build(documents)
+            changed_prefixes = self._changed_prefixes(documents, previous_postings)
+        shards = self._shards
+        
+        # The terms are sorted, so an updated shard is the same as a rebuilt one
+        written_files = set()
+        for prefix, terms in shards.items():
+            shard_file = terms_dir / f"{prefix}.json"
+            if changed_prefixes is None or prefix in changed_prefixes or not shard_file.exists():
+                self.writer.write_json(shard_file, dict(sorted(terms.items())))
+            written_files.add(shard_file)
+        
+        for start in range(0, len(documents), SEARCH_DOCUMENTS_PER_SHARD):
+            shard = documents[start:start + SEARCH_DOCUMENTS_PER_SHARD]
+            documents_file = search_dir / f"documents-{start // SEARCH_DOCUMENTS_PER_SHARD}.json"
+            if (shard != self._documents[start:start + SEARCH_DOCUMENTS_PER_SHARD] or changed_prefixes is None
+                    or not documents_file.exists()):
+                self.writer.write_json(documents_file, [[title, url, kind] for title, url, kind, _, _ in shard])
+            written_files.add(documents_file)
+        self._documents = documents
+        
+        index_file = search_dir / 'index.json'
+        self.writer.write_json(index_file, {
+            'prefix_length': SEARCH_PREFIX_LENGTH,
+            'documents_per_shard': SEARCH_DOCUMENTS_PER_SHARD,
+            'document_count': len(documents),
+            'shards': sorted(shards),
+        })
+        written_files.add(index_file)
+        
+        # Remove the shards of a previous build that aren't needed anymore
+        for data_file in list(search_dir.glob('*.json')) + list(terms_dir.glob('*.json')):
+            if data_file not in written_files:
+                os.remove(data_file)
+        self.data_files = written_files
+        
+        return str(index_file)
@@ -3,119 +3,219 @@ Site generator module for the photosi-catalog-site-builder.
 Coordinates the generation of the entire documentation site.
 """
 
-import os
 import json
-import yaml
+import os
+import shutil
+import time
 from pathlib import Path
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
+from parser.catalog_index import CatalogIndex
+from parser.document_cache import DocumentCache
+from parser.parse_cache import ParseCache
 from parser.service_parser import ServiceParser
 from parser.event_parser import EventParser
 from generators.service_page import ServicePageGenerator
 from generators.event_page import EventPageGenerator
 from generators.event_table import EventTableGenerator
+from generators.search_index import SearchIndexGenerator
+from generators.topology import TopologyGenerator
+from generators.build_manifest import BuildManifest
+from generators.output_writer import OutputWriter, link_tree, sync_tree
+from generators.static_assets import StaticAssets, fingerprint
+from parser.catalog_snapshot import CatalogSnapshot, snapshot_path
+from generators.template_environment import TEMPLATES_DIRECTORY, create_environment
+from utils.build_profile import BuildProfile
+from utils.graph_utils import compact_graph_data
+
+# Shared file with the lists shown in the sidebar, relative to the output directory; it is published
+# under a content-hashed name like the static assets, so browsers never keep an old copy
+SIDEBAR_DATA_FILE = 'static/js/sidebar-data.json'
+
+def sidebar_data(service_names):
+    """
+    Get the content of the sidebar data file and its content-hashed path.
+    
+    Args:
+        service_names (list): Sorted names of all the services.
+    
+    Returns:
+        tuple: Path to the file, relative to the output directory, and its JSON content.
+    """
+    content = json.dumps({'services': service_names}, separators=(',', ':'))
+    return fingerprint(SIDEBAR_DATA_FILE, content.encode('utf-8')), content
 
 class SiteGenerator:
     """Generator for the entire documentation site."""
     
-    def __init__(self, input_directory, output_directory):
+    def __init__(self, input_directory, output_directory, cache_directory=None, jobs=1, graph_format='full',
+                 profile=None, staging=False, write_threads=0, assets_manifest=None):
         """
         Initialize the site generator.
         
         Args:
             input_directory (str): Directory containing the AsyncAPI files.
             output_directory (str): Directory where the generated site will be saved.
+            cache_directory (str, optional): Directory for the persistent parse cache.
+            jobs (int): Number of worker processes used to parse files and render pages.
+            graph_format (str): Format of the graph data files, 'full' or 'compact'.
+            profile (BuildProfile, optional): Profile the phases of the build are measured in.
+            staging (bool): Build in a staging directory next to the output directory, published
+                by publish_output, instead of writing the site in place.
+            write_threads (int): Number of background threads writing the output files while
+                the pages are rendered, 0 to write them synchronously.
+            assets_manifest (dict, optional): Asset manifest of the parent generator, used by the
+                render workers instead of minifying and hashing the static files again.
         """
         self.input_directory = Path(input_directory)
+        
+        # With staging the generators write to the staging directory, the site is published when complete
+        self.site_directory = Path(output_directory)
+        self.staging = staging
+        self._staging_prepared = False
+        self._spare_directory = None
+        if staging:
+            output_directory = self.site_directory.parent / f".{self.site_directory.name}.staging"
         self.output_directory = Path(output_directory)
+        self.cache_directory = cache_directory
+        self.jobs = jobs
+        self.graph_format = graph_format
+        self.profile = profile if profile is not None else BuildProfile()
+        
+        # Initialize parsers sharing one cache, so each YAML file is loaded once
+        parse_cache = ParseCache(cache_directory) if cache_directory else None
+        self.document_cache = DocumentCache(parse_cache=parse_cache)
+        self.service_parser = ServiceParser(input_directory, self.document_cache)
+        self.event_parser = EventParser(input_directory, self.document_cache)
         
-        # Initialize parsers
-        self.service_parser = ServiceParser(input_directory)
-        self.event_parser = EventParser(input_directory)
+        # Initialize page generators sharing one template environment, so each template is compiled once,
+        # and one writer, which counts the files written; the pages refer to the fingerprinted static files
+        self.assets = StaticAssets(manifest=assets_manifest)
+        self.template_environment = create_environment(cache_directory, self.assets)
+        self.writer = OutputWriter(threads=write_threads)
+        self.service_page_generator = ServicePageGenerator(output_directory, self.template_environment, self.writer)
+        self.event_page_generator = EventPageGenerator(output_directory, self.template_environment, self.writer)
+        self.event_table_generator = EventTableGenerator(output_directory, self.template_environment,
+                                                         writer=self.writer)
+        self.search_index_generator = SearchIndexGenerator(output_directory, self.writer)
+        self.topology_generator = TopologyGenerator(output_directory, self.template_environment, self.writer)
         
-        # Initialize page generators
-        self.service_page_generator = ServicePageGenerator(output_directory)
-        self.event_page_generator = EventPageGenerator(output_directory)
-        self.event_table_generator = EventTableGenerator(output_directory)
+        # Index of the catalog, built on first use, and its snapshot saved by every build outside the site
+        self.catalog = None
+        self.snapshot = CatalogSnapshot(snapshot_path(self.site_directory, cache_directory), input_directory)
         
-        # Cache for all events and their relations
-        self.event_relations = None
-        self.all_events = None
+        # Content hashes of the input files and manifest of the last build, reused by the next builds
+        # of this generator
+        self.file_hashes = {}
+        self._manifest = None
+    
+    def prepare_output(self):
+        """
+        Prepare the staging directory for a build, if staging is enabled.
         
-    def _collect_event_relations(self):
+        The staging directory starts as a hard-linked copy of the published site:
+        creating it copies no file, and the files the build doesn't change keep
+        their inode and modification time when the staging directory is published.
+        The build directory kept by the previous publish_output, if any, is synced
+        with the site instead, which changes only the files the last build wrote.
+        Calling it again before publish_output does nothing.
         """
-        Collect relationships between events and services.
-        This builds a mapping of events to the services that publish or consume them.
+        if not self.staging or self._staging_prepared:
+            return
+        
+        with self.profile.phase('staging'):
+            # A staging directory left by an interrupted build is discarded
+            if self.output_directory.exists():
+                shutil.rmtree(self.output_directory)
+            spare_directory, self._spare_directory = self._spare_directory, None
+            if self.site_directory.exists() and spare_directory is not None and spare_directory.is_dir():
+                os.rename(spare_directory, self.output_directory)
+                sync_tree(self.site_directory, self.output_directory)
+            elif self.site_directory.exists():
+                link_tree(self.site_directory, self.output_directory)
+            else:
+                os.makedirs(self.output_directory)
+        self._staging_prepared = True
+    
+    def publish_output(self, keep_previous=False):
+        """
+        Replace the published site with the staging directory, if staging is enabled.
+        
+        The output path is a symbolic link to the directory of the current build.
+        The staging directory is renamed to a build directory and the link is
+        replaced with one to it by a single rename, so the output path always
+        exists and readers of the site never see a partially written build.
+        The directories of the previous builds are then deleted.
+        
+        An output directory written by an earlier version, or with --no-staging,
+        is moved aside once to turn the output path into a link.
+        
+        Args:
+            keep_previous (bool): Keep the directory of the build just replaced, the next
+                prepare_output syncs it instead of linking the whole site again.
+        """
+        # The queued files must be in the staging directory before it is published
+        self.writer.flush()
+        if not self.staging or not self._staging_prepared:
+            return
+        
+        parent_directory = self.site_directory.parent
+        build_prefix = f".{self.site_directory.name}.build-"
+        build_directory = parent_directory / f"{build_prefix}{time.time_ns()}"
+        os.rename(self.output_directory, build_directory)
+        
+        previous_directory = parent_directory / f".{self.site_directory.name}.previous"
+        replaced_directory = None
+        if self.site_directory.is_symlink():
+            replaced_directory = parent_directory / os.readlink(self.site_directory)
+        elif self.site_directory.is_dir():
+            if previous_directory.exists():
+                shutil.rmtree(previous_directory)
+            os.rename(self.site_directory, previous_directory)
+        
+        # The link is relative, so the parent directory can be moved
+        temporary_link = parent_directory / f".{self.site_directory.name}.link"
+        if temporary_link.is_symlink():
+            temporary_link.unlink()
+        os.symlink(build_directory.name, temporary_link)
+        os.replace(temporary_link, self.site_directory)
+        
+        if keep_previous and replaced_directory is not None and replaced_directory.name.startswith(build_prefix):
+            self._spare_directory = replaced_directory
+        for entry in [previous_directory, *parent_directory.glob(f"{build_prefix}*")]:
+            if entry not in (build_directory, self._spare_directory):
+                shutil.rmtree(entry, ignore_errors=True)
+        self._staging_prepared = False
+    
+    def build_catalog(self):
+        """
+        Build the index of the catalog, parsing every input file once.
         
         Returns:
-            dict: Dictionary mapping events to publishing and consuming services.
+            CatalogIndex: The index of services, events and their relations.
         """
-        if self.event_relations is not None:
-            return self.event_relations
-            
-        event_relations = defaultdict(lambda: {'publishing_services': [], 'consuming_services': []})
-        
-        # First collect all event titles and message containers from YAML files
-        message_containers_to_titles = {}
-        self.all_events = []
-        
-        # Parse all events to build a lookup map between titles and containers
-        for event_type in ['message', 'request', 'command']:
-            type_dir = self.input_directory / "messages" / event_type
-            if type_dir.exists():
-                for directory in type_dir.iterdir():
-                    if directory.is_dir():
-                        for yaml_file in directory.glob("*.yaml"):
-                            with open(yaml_file, 'r', encoding='utf-8') as f:
-                                data = yaml.safe_load(f)
-                                if 'components' in data and 'messages' in data['components']:
-                                    for container_id, msg_data in data['components']['messages'].items():
-                                        self.all_events.append(f"../../messages/{event_type}/{directory.name}/{yaml_file.name}#/components/messages/{container_id}")
-                                        if 'title' in msg_data:
-                                            title = msg_data['title']
-                                            message_containers_to_titles[container_id] = (event_type, title)
-        
-        # Get all services and their events
-        service_names = self.service_parser.list_all_services()
-        for service_name in service_names:
-            service = self.service_parser.parse(service_name)
-            
-            # Add to publishing services for each sent event
-            for event in service.sent_events:
-                # Try to map to a proper title if possible
-                event_key = (event.type, event.name)
-                
-                # If event.id is a container ID, look it up
-                if event.id in message_containers_to_titles:
-                    event_key = message_containers_to_titles[event.id]
-                
-                # Usa gli ID dei servizi per evitare duplicati
-                service_ids = [s.id for s in event_relations[event_key]['publishing_services']]
-                if service.id not in service_ids:
-                    event_relations[event_key]['publishing_services'].append(service)
-            
-            # Add to consuming services for each received event
-            for event in service.received_events:
-                # Try to map to a proper title if possible
-                event_key = (event.type, event.name)
-                
-                # If event.id is a container ID, look it up
-                if event.id in message_containers_to_titles:
-                    event_key = message_containers_to_titles[event.id]
-                
-                # Usa gli ID dei servizi per evitare duplicati
-                service_ids = [s.id for s in event_relations[event_key]['consuming_services']]
-                if service.id not in service_ids:
-                    event_relations[event_key]['consuming_services'].append(service)
-                    
-        # Print statistics for debugging
-        num_events = len(event_relations)
-        events_with_publishers = sum(1 for relations in event_relations.values() if relations['publishing_services'])
-        events_with_consumers = sum(1 for relations in event_relations.values() if relations['consuming_services'])
-        print(f"Found {num_events} events, {events_with_publishers} with publishers, {events_with_consumers} with consumers")
+        if self.catalog is not None:
+            return self.catalog
+        
+        # Forking the parse workers while writer threads are running could deadlock them
+        if self.jobs > 1:
+            self.writer.flush()
+        catalog = CatalogIndex.build(self.input_directory, self.service_parser, self.event_parser, self.jobs,
+                                     self.profile)
+        
+        # Statistics reported by --profile
+        relations = catalog.relations.values()
+        self.profile.count('services', len(catalog.services))
+        self.profile.count('related events', len(catalog.relations))
+        self.profile.count('events with publishers', sum(1 for related in relations if related['publishing_services']))
+        self.profile.count('events with consumers', sum(1 for related in relations if related['consuming_services']))
+        
+        # Report all the files that could not be parsed
+        for file_path, error in sorted(catalog.parse_errors.items()):
+            print(f"Error parsing {file_path}: {error}")
             
-        self.event_relations = event_relations
-        return event_relations
+        self.catalog = catalog
+        return catalog
     
     def generate_service_page(self, service_name):
         """
@@ -127,94 +227,145 @@ class SiteGenerator:
         Returns:
             str: Path to the generated service page.
         """
-        # Parse the service
-        service = self.service_parser.parse(service_name)
+        catalog = self._targeted_catalog(self.snapshot.load_service, service_name)
+        
+        # The sidebar lists all the services, sorted alphabetically
+        self.write_sidebar_data(catalog)
+        page = self._write_service_page(catalog.get_service(service_name), catalog)
+        self.writer.flush()
+        return page
+    
+    def _targeted_catalog(self, load_snapshot, key):
+        """
+        Get the index of the catalog for generating a single page.
         
-        # Get the list of all services for the sidebar and sort them alphabetically
-        all_services = sorted(self.service_parser.list_all_services())
+        The page is read from the snapshot of the last build when the files it
+        depends on are unchanged, so nothing is parsed; otherwise the whole catalog
+        is indexed and its snapshot saved for the next runs.
+        
+        Args:
+            load_snapshot (callable): Snapshot method reading the page, load_service or load_event.
+            key (str): Name of the service or reference of the event.
+        
+        Returns:
+            CatalogIndex: The full index, or a partial one read from the snapshot.
+        """
+        if self.catalog is not None:
+            return self.catalog
+        
+        catalog = load_snapshot(key)
+        if catalog is not None:
+            self.profile.count('pages read from the snapshot', 1)
+            return catalog
+        
+        catalog = self.build_catalog()
+        self.snapshot.save(catalog, self.file_hashes)
+        return catalog
+    
+    def write_sidebar_data(self, catalog):
+        """
+        Write the lists shown in the sidebar of every page to a shared JSON file.
+        
+        Pages load this file client-side, so they don't embed the lists themselves.
+        
+        Args:
+            catalog (CatalogIndex): Index of the catalog.
+        
+        Returns:
+            str: Path to the sidebar data file.
+        """
+        relative_path, content = sidebar_data(catalog.service_names)
+        sidebar_data_file = self.output_directory / relative_path
+        os.makedirs(sidebar_data_file.parent, exist_ok=True)
+        
+        return self.writer.write_text(sidebar_data_file, content)
+    
+    def _write_service_page(self, service, catalog):
+        """
+        Write the graph data and the page of an already parsed service.
+        
+        Args:
+            service (Service): Service to generate documentation for.
+            catalog (CatalogIndex): Index of the catalog, with the names of all the services.
             
-        # Generate the graph data
+        Returns:
+            str: Path to the generated service page.
+        """
+        # Generate the graph data, with the display names of the events
         graph_data = service.to_graph_data()
         
-        # Ensure the display names (titles) are used in the graph
-        for node in graph_data['nodes']:
-            if node['type'] != 'services' and 'data' in node and 'message' in node['data']:
-                message_data = node['data']['message']['data']
-                if 'name' in message_data:
-                    # Make sure the proper title is used for display
-                    if message_data['name'] == message_data['id']:
-                        # If the name is the same as ID, try to format it better
-                        display_name = message_data['id']
-                        # Remove any prefix like "message" or "request" from the ID for display
-                        prefixes = ['message', 'request', 'command']
-                        for prefix in prefixes:
-                            if display_name.lower().startswith(prefix):
-                                display_name = display_name[len(prefix):]
-                                break
-                        message_data['display_name'] = display_name
-                    else:
-                        # Use the proper title name for display
-                        message_data['display_name'] = message_data['name']
-        
         # Save the graph data as JSON
+        self._write_graph_data(graph_data, f"{service.id}.json")
+        
+        # Generate the service page, the sidebar lists are loaded from the shared file
+        sidebar_data_file, _ = sidebar_data(catalog.service_names)
+        return self.service_page_generator.generate(service, sidebar_data_url=f"/{sidebar_data_file}")
+        
+    def _write_graph_data(self, graph_data, file_name):
+        """
+        Write graph data as JSON in the configured format.
+        
+        Args:
+            graph_data (dict): Dictionary with nodes and edges for graph visualization.
+            file_name (str): Name of the file in the graph-data directory.
+        """
         graph_data_path = self.output_directory / 'static' / 'js' / 'graph-data'
         os.makedirs(graph_data_path, exist_ok=True)
         
-        with open(graph_data_path / f"{service_name}.json", 'w', encoding='utf-8') as f:
-            json.dump(graph_data, f, indent=2)
-            
-        # Generate the service page with the list of all services
-        return self.service_page_generator.generate(service, all_services)
-        
+        if self.graph_format == 'compact':
+            self.writer.write_json(graph_data_path / file_name, compact_graph_data(graph_data))
+        else:
+            self.writer.write_json(graph_data_path / file_name, graph_data, indent=2)
+    
     def generate_event_page(self, event_file):
         """
         Generate the documentation page for an event.
         
         Args:
-            event_file (str): path to the async api file of the event.
+            event_file (str): AsyncAPI ref of the event, or 'type:name'.
             
         Returns:
             str: Path to the generated event page.
         """
-        # Collect event relationships
-        event_relations = self._collect_event_relations()
+        catalog = self._targeted_catalog(self.snapshot.load_event, event_file)
         
-        # Parse the event
+        # Find the event
         # ../../messages/command/batcher-service/schedule.cleaneroldbatch.yaml#/components/messages/cleaneroldbatch
-        event = self.event_parser.parse(event_file)
+        event = catalog.find_event(event_file)
+        if event is None:
+            event = self.event_parser.parse(event_file)
         
-        # Get publishing and consuming services for this event
-        event_key = (event.type, event.name)
-        publishing_services = []
-        consuming_services = []
+        page = self._write_event_page(event, catalog)
+        self.writer.flush()
+        return page
+    
+    def _write_event_page(self, event, catalog):
+        """
+        Write the graph data and the page of an already parsed event.
         
-        # Check if this event is in our relations database
-        if event_key in event_relations:
-            publishing_services = event_relations[event_key]['publishing_services']
-            consuming_services = event_relations[event_key]['consuming_services']
+        Args:
+            event (Event): Event to generate documentation for.
+            catalog (CatalogIndex): Index with the relations and the sidebar lists.
         
-        # Get all events for the sidebar
-        all_events = sorted([(event_type, event_id) for event_type, event_id in event_relations.keys()], 
-                            key=lambda x: x[1])  # Sort by event ID
+        Returns:
+            str: Path to the generated event page.
+        """
+        # Get publishing and consuming services for this event
+        publishing_services, consuming_services = catalog.get_relations(event)
         
         # Generate graph data for this event
         graph_data = event.to_graph_data(publishing_services, consuming_services)
         
         # Save the graph data as JSON - use a safe version of the event name for the filename
-        graph_data_path = self.output_directory / 'static' / 'js' / 'graph-data'
-        os.makedirs(graph_data_path, exist_ok=True)
-        
         # Use a safe version of the event name - replace : and . with _
         safe_id = event.name.replace(":", "_").replace(".", "_")
-        with open(graph_data_path / f"{event.type}_{safe_id}.json", 'w', encoding='utf-8') as f:
-            json.dump(graph_data, f, indent=2)
+        self._write_graph_data(graph_data, f"{event.type}_{safe_id}.json")
         
         # Generate the event page
         return self.event_page_generator.generate(
             event, 
             publishing_services=publishing_services, 
-            consuming_services=consuming_services,
-            all_events=all_events
+            consuming_services=consuming_services
         )
         
     def collect_all_events(self):
@@ -222,42 +373,296 @@ class SiteGenerator:
         Collect all events from the input directory.
         
         Returns:
-            list: List of tuples (event_type, event_id) for all events.
+            list: AsyncAPI refs of all events.
         """
-        # First collect events from services
-        self._collect_event_relations()
-        return self.all_events
+        return list(self.build_catalog().events)
     
-    def generate_all(self):
+    def _template_inputs(self, manifest, template_name):
+        """
+        Register the templates and the settings a page is rendered with as inputs of the build.
+        
+        Args:
+            manifest (BuildManifest): Manifest of the current build.
+            template_name (str): Name of the page template.
+        
+        Returns:
+            list: Keys of the template inputs.
+        """
+        return [
+            manifest.file_input(TEMPLATES_DIRECTORY / name, key=f"@templates/{name}")
+            for name in ('base.html', template_name)
+        ] + [manifest.value_input('@graph-format', self.graph_format),
+             manifest.value_input('@assets', self.assets.manifest)]
+    
+    def _service_inputs(self, manifest, service_name):
+        """
+        Register the files a service was parsed from as inputs of the build.
+        
+        Args:
+            manifest (BuildManifest): Manifest of the current build.
+            service_name (str): Name of the service.
+        
+        Returns:
+            list: Keys of the service inputs.
+        """
+        return [manifest.file_input(path) for path in self.catalog.service_dependencies[service_name]]
+    
+    def _data_files(self, generator):
+        """
+        Get the data files a generator wrote in its last run.
+        
+        Args:
+            generator (object): Event table, search index or topology generator.
+        
+        Returns:
+            list: Paths of the files, relative to the output directory.
+        """
+        return [path.relative_to(self.output_directory).as_posix() for path in generator.data_files]
+    
+    def _render_catalog_page(self, catalog, task):
+        """
+        Render one page from the catalog index.
+        
+        Args:
+            catalog (CatalogIndex): Index of the catalog.
+            task (tuple): Kind of page ('service' or 'event') and its key in the index.
+        
+        Returns:
+            str: Path to the generated page.
+        """
+        kind, key = task
+        if kind == 'service':
+            return self._write_service_page(catalog.services[key], catalog)
+        return self._write_event_page(catalog.events[key], catalog)
+    
+    def _render_pages(self, service_names, event_refs):
+        """
+        Render service and event pages, spreading them over worker processes if jobs > 1.
+        
+        The workers receive a read-only copy of the catalog index, so nothing is
+        parsed again, and the output is the same as the one of a serial build.
+        
+        Args:
+            service_names (list): Names of the services to render.
+            event_refs (list): AsyncAPI refs of the events to render.
+        
+        Returns:
+            list: Paths to the generated pages.
+        """
+        tasks = [('service', name) for name in service_names] + [('event', ref) for ref in event_refs]
+        
+        if self.jobs <= 1 or len(tasks) <= 1:
+            with self.profile.phase('service pages'):
+                pages = [self._render_catalog_page(self.catalog, ('service', name)) for name in service_names]
+            with self.profile.phase('event pages'):
+                pages.extend(self._render_catalog_page(self.catalog, ('event', ref)) for ref in event_refs)
+            return pages
+        
+        chunksize = max(1, len(tasks) // (self.jobs * 4))
+        with self.profile.phase('service and event pages'):
+            # The writer threads are stopped before the workers are forked, it starts them again when needed
+            self.writer.flush()
+            with ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_render_worker,
+                                     initargs=(self.input_directory, self.output_directory, self.cache_directory,
+                                               self.graph_format, self.catalog, self.assets.manifest)) as executor:
+                results = list(executor.map(_render_page, tasks, chunksize=chunksize))
+        
+        # Add the files written by the workers to the counters of the build
+        for _, counts in results:
+            self.writer.add_counts(*counts)
+        return [page for page, _ in results]
+    
+    def generate_all(self, incremental=False):
         """
         Generate documentation for all services and events.
         
+        Every build records in a manifest which input files each output depends on,
+        and deletes the files of the previous build it no longer produces. In
+        incremental mode only the outputs whose inputs changed since the previous
+        build, or whose files are missing, are regenerated.
+        
+        Args:
+            incremental (bool): Rebuild only the outputs affected by input changes.
+        
         Returns:
             list: Paths to all generated pages.
         """
         generated_pages = []
         
-        # Get all services
-        services = self.service_parser.list_all_services()
+        # The manifest of the previous build is loaded by full builds too, to remove its stale outputs
+        manifest = BuildManifest(self.input_directory, self.output_directory, self.file_hashes)
+        with self.profile.phase('manifest'):
+            if not manifest.load(self._manifest) and incremental:
+                print("No previous build manifest found, running a full build")
+        
+        # Index the catalog first, this records the inputs of every service and event
+        catalog = self.build_catalog()
         
-        # Generate pages for each service
-        for service_name in services:
-            service_page = self.generate_service_page(service_name)
-            generated_pages.append(service_page)
+        # Get all the services that could be parsed
+        services = list(catalog.services)
         
-        # Generate pages for all events
-        self.collect_all_events()
-        for event in self.all_events:
-            event_page = self.generate_event_page(event)
-            generated_pages.append(event_page)
+        # The sidebar data lists all the services, the pages load it client-side from its content-hashed
+        # name; the file of the previous list is removed as a stale output
+        sidebar_data_file, _ = sidebar_data(catalog.service_names)
+        services_key = manifest.value_input('@services', catalog.service_names)
+        if not incremental or manifest.is_dirty(sidebar_data_file, [services_key]):
+            with self.profile.phase('sidebar data'):
+                self.write_sidebar_data(catalog)
+        manifest.record(sidebar_data_file, [sidebar_data_file], [services_key])
+        
+        # Find the outputs to generate, the inputs of every output are hashed
+        with self.profile.phase('dependencies'):
+            service_template_keys = self._template_inputs(manifest, 'service_page.html')
             
-        # Generate event table page
-        all_events = []
-        for event_file in self.all_events:
-            event = self.event_parser.parse(event_file)
-            all_events.append(event)
+            # Find the service pages to generate
+            services_to_render = []
+            service_inputs = {service_name: self._service_inputs(manifest, service_name) for service_name in services}
+            for service_name in services:
+                output_key = f"services/{service_name}.html"
+                output_files = [output_key, f"static/js/graph-data/{service_name}.json"]
+                input_keys = service_template_keys + [services_key] + service_inputs[service_name]
+                
+                if not incremental or manifest.is_dirty(output_key, input_keys):
+                    services_to_render.append(service_name)
+                manifest.record(output_key, output_files, input_keys)
+            
+            # Group the event files by the page they produce, several files may produce the same page
+            event_template_keys = self._template_inputs(manifest, 'event_page.html')
+            event_outputs = {}
+            message_keys = set()
+            services_directory = os.fspath(self.service_parser.services_directory)
+            service_file_keys = {}
+            for event_ref, event in catalog.events.items():
+                publishing_services, consuming_services = catalog.get_relations(event)
+                
+                input_keys = [manifest.file_input(path) for path in catalog.event_dependencies[event_ref]]
+                message_keys.update(input_keys)
+                
+                # The page shows only the title of the related services, a change in their
+                # channels that affects this event also changes the set of related services
+                for service in publishing_services + consuming_services:
+                    service_key = service_file_keys.get(service.id)
+                    if service_key is None:
+                        service_file = os.path.join(services_directory, f"{service.id}.yaml")
+                        service_key = service_file_keys[service.id] = manifest.file_input(service_file)
+                    input_keys.append(service_key)
+                
+                safe_id = event.name.replace(":", "_").replace(".", "_")
+                output_key = f"events/{event.type}_{safe_id}.html"
+                output = event_outputs.setdefault(output_key, {
+                    'files': [output_key, f"static/js/graph-data/{event.type}_{safe_id}.json"],
+                    'inputs': set(event_template_keys),
+                    'events': [],
+                })
+                output['inputs'].update(input_keys)
+                output['events'].append(event_ref)
             
-        event_table_page = self.event_table_generator.generate(all_events, self.event_relations)
-        generated_pages.append(event_table_page)
+            # Find the event pages to generate
+            events_to_render = []
+            for output_key, output in event_outputs.items():
+                if not incremental or manifest.is_dirty(output_key, output['inputs']):
+                    # Events with the same name overwrite each other's page, the last one wins
+                    events_to_render.append(output['events'][-1])
+                manifest.record(output_key, output['files'], output['inputs'])
             
+        # Generate pages for services and events
+        generated_pages.extend(self._render_pages(services_to_render, events_to_render))
+        
+        # The event table and the search index show every event and service
+        catalog_inputs = set(message_keys)
+        for input_keys in service_inputs.values():
+            catalog_inputs.update(input_keys)
+        
+        table_key = "events/table.html"
+        table_inputs = set(self._template_inputs(manifest, 'event_table.html')) | catalog_inputs
+        
+        # Generate event table page; the outputs with data files record all of them, so a missing
+        # shard makes the output dirty, and the previous ones are kept when it is not regenerated
+        if not incremental or manifest.is_dirty(table_key, table_inputs):
+            with self.profile.phase('event table'):
+                event_table_page = self.event_table_generator.generate(list(catalog.events.values()),
+                                                                       catalog.relations)
+            generated_pages.append(event_table_page)
+            table_files = [table_key] + self._data_files(self.event_table_generator)
+        else:
+            table_files = manifest.previous_files(table_key)
+        manifest.record(table_key, table_files, table_inputs)
+        
+        # Generate the search index
+        search_key = "static/search/index.json"
+        if not incremental or manifest.is_dirty(search_key, catalog_inputs):
+            with self.profile.phase('search index'):
+                self.search_index_generator.generate(list(catalog.services.values()), list(catalog.events.values()))
+            search_files = self._data_files(self.search_index_generator)
+        else:
+            search_files = manifest.previous_files(search_key)
+        manifest.record(search_key, search_files, catalog_inputs)
+        
+        # Generate the topology page of the whole system
+        topology_key = "topology.html"
+        topology_inputs = set(self._template_inputs(manifest, 'topology.html')) | catalog_inputs
+        if not incremental or manifest.is_dirty(topology_key, topology_inputs):
+            with self.profile.phase('topology'):
+                generated_pages.append(self.topology_generator.generate(catalog))
+            topology_files = [topology_key] + self._data_files(self.topology_generator)
+        else:
+            topology_files = manifest.previous_files(topology_key)
+        manifest.record(topology_key, topology_files, topology_inputs)
+        
+        # Wait for the files still queued, the manifest is not saved if some could not be written
+        with self.profile.phase('flush writes'):
+            self.writer.flush()
+        
+        # Targeted runs read single pages from the snapshot of the catalog, which doesn't change
+        # if no input did
+        with self.profile.phase('snapshot'):
+            if manifest.inputs != manifest.previous_inputs or not os.path.exists(self.snapshot.snapshot_file):
+                self.snapshot.save(catalog, self.file_hashes)
+        
+        with self.profile.phase('manifest'):
+            for removed_file in manifest.remove_stale_outputs():
+                print(f"Removed {removed_file}")
+            if incremental:
+                total_pages = sum(1 for output_key in manifest.outputs if output_key.endswith('.html'))
+                print(f"Regenerated {len(generated_pages)} of {total_pages} pages")
+            manifest.save()
+        self._manifest = manifest
+        
         return generated_pages
+
+# State of a render worker process, set up once when the worker starts
+_worker = {}
+
+def _init_render_worker(input_directory, output_directory, cache_directory, graph_format, catalog,
+                        assets_manifest):
+    """
+    Initialize a render worker process.
+    
+    Args:
+        input_directory (str): Directory containing the AsyncAPI files.
+        output_directory (str): Directory where the generated site will be saved.
+        cache_directory (str): Directory for the persistent caches, or None.
+        graph_format (str): Format of the graph data files.
+        catalog (CatalogIndex): Read-only copy of the catalog index.
+        assets_manifest (dict): Asset manifest of the parent, the worker doesn't read the static files.
+    """
+    _worker['generator'] = SiteGenerator(input_directory, output_directory, cache_directory,
+                                         graph_format=graph_format, assets_manifest=assets_manifest)
+    _worker['generator'].catalog = catalog
+
+def _render_page(task):
+    """
+    Render one page in a worker process.
+    
+    Args:
+        task (tuple): Kind of page ('service' or 'event') and its key in the catalog index.
+    
+    Returns:
+        tuple: Path to the generated page, and numbers of files written, bytes written and files unchanged.
+    """
+    generator = _worker['generator']
+    writer = generator.writer
+    before = (writer.files_written, writer.bytes_written, writer.files_unchanged)
+    page = generator._render_catalog_page(generator.catalog, task)
+    after = (writer.files_written, writer.bytes_written, writer.files_unchanged)
+    return page, tuple(count - previous for count, previous in zip(after, before))
@@ -0,0 +1,334 @@
+"""
+Static assets module for the photosi-catalog-site-builder.
+Minifies the CSS and JavaScript files and publishes every static file under a content-hashed name.
+"""
+
+import hashlib
+import os
+import re
+from pathlib import Path
+
+# Directory containing the static files of the site
+STATIC_DIRECTORY = Path(__file__).parent.parent.parent / 'static'
+
+# Directories of static files, relative to STATIC_DIRECTORY, and the files they contain
+ASSET_PATTERNS = [
+    ('css', '*.css'),
+    ('js', '*.js'),
+    ('images', '*.*'),
+]
+
+# Manifest mapping every asset to its fingerprinted name, written next to the assets
+ASSET_MANIFEST_FILE = 'static/assets.json'
+
+# Name of a fingerprinted file: the original name with the hash before the extension
+FINGERPRINT_PATTERN = re.compile(r'^(.+)\.[0-9a-f]{10}(\.[^.]+)$')
+
+def fingerprint(file_path, content):
+    """
+    Get the content-hashed name of a file.
+    
+    Args:
+        file_path (str): Path of the file, e.g. 'js/search.js'.
+        content (bytes): Content of the file.
+    
+    Returns:
+        str: The path with the hash of the content before the extension, e.g. 'js/search.0123456789.js'.
+    """
+    digest = hashlib.blake2b(content, digest_size=5).hexdigest()
+    stem, suffix = os.path.splitext(file_path)
+    return f"{stem}.{digest}{suffix}"
+
+# Strings and comments of a stylesheet, the strings are copied unchanged
+_CSS_TOKEN_PATTERN = re.compile(r'("(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|/\*.*?\*/)', re.DOTALL)
+
+# Characters after which a '/' starts a regular expression literal instead of a division
+_JS_REGEX_PREFIX = set('(,=:[!&|?{};+-*%<>~^')
+
+# Contexts of a script whose lines are copied unchanged: template literals and continued strings
+_JS_STRING_CONTEXTS = ('`', '"', "'")
+
+def minify_css(text):
+    """
+    Remove the comments and the whitespace that doesn't change the meaning of a stylesheet.
+    
+    Quoted strings, such as the value of a 'content' property, are left unchanged.
+    
+    Args:
+        text (str): The stylesheet.
+    
+    Returns:
+        str: The minified stylesheet.
+    """
+    parts = []
+    code = []
+    for position, part in enumerate(_CSS_TOKEN_PATTERN.split(text)):
+        if position % 2 == 0:
+            code.append(part)
+        elif not part.startswith('/*'):
+            parts.append(_minify_css_code(''.join(code)))
+            parts.append(part)
+            code = []
+    parts.append(_minify_css_code(''.join(code)))
+    return ''.join(parts).strip()
+
+def _minify_css_code(text):
+    """
+    Remove the whitespace that doesn't change the meaning of a part of a stylesheet without strings.
+    
+    Args:
+        text (str): The part of the stylesheet.
+    
+    Returns:
+        str: The minified part.
+    """
+    text = re.sub(r'\s+', ' ', text)
+    # A space before ':' is significant in selectors, e.g. 'a :hover'
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    text = re.sub(r':\s+', ':', text)
+    return text.replace(';}', '}')
+
+def minify_js(text):
+    """
+    Remove the indentation, the blank lines and the lines that only contain comments from a script.
+    
+    The line breaks are kept, so automatic semicolon insertion works as in the
+    original script. A line with code is kept whole, except for a comment started
+    on a removed line, and the lines of a template literal or of a string continued
+    with a backslash are copied unchanged.
+    
+    Args:
+        text (str): The script.
+    
+    Returns:
+        str: The minified script.
+    """
+    lines = []
+    state = ()
+    keep_comment = False
+    for line in text.split('\n'):
+        line_state = state
+        state, has_code = _scan_js_line(line, line_state)
+        if line_state and line_state[-1] in _JS_STRING_CONTEXTS:
+            lines.append(line)
+            continue
+        if line_state and line_state[-1] == '*' and not keep_comment:
+            if not has_code:
+                continue
+            # The comment started on a removed line
+            line = line[line.index('*/') + 2:]
+        elif not has_code and not keep_comment:
+            continue
+        
+        line = line.lstrip() if state and state[-1] in _JS_STRING_CONTEXTS else line.strip()
+        if line:
+            lines.append(line)
+        # A comment started on a kept line is kept until its end
+        keep_comment = bool(state) and state[-1] == '*' and (keep_comment or has_code)
+    return '\n'.join(lines) + '\n'
+
+def _scan_js_line(line, state):
+    """
+    Follow the strings, template literals and comments of one line of a script.
+    
+    Args:
+        line (str): The line.
+        state (tuple): Open contexts at the start of the line: '`' for the text of a template
+            literal, '${' and '{' for the code inside it, a quote for a string continued
+            with a backslash and '*' for a block comment.
+    
+    Returns:
+        tuple: Open contexts at the end of the line, and whether the line contains
+            anything besides whitespace and comments.
+    """
+    stack = list(state)
+    has_code = False
+    previous = ''
+    position = 0
+    length = len(line)
+    while position < length:
+        context = stack[-1] if stack else None
+        char = line[position]
+        if context == '*':
+            end = line.find('*/', position)
+            if end < 0:
+                break
+            stack.pop()
+            position = end + 2
+            continue
+        if char.isspace():
+            position += 1
+            continue
+        
+        if context in _JS_STRING_CONTEXTS:
+            has_code = True
+            if char == '\\':
+                position += 1
+            elif char == context:
+                stack.pop()
+                previous = char
+            elif context == '`' and line.startswith('${', position):
+                stack.append('${')
+                position += 1
+        elif line.startswith('//', position):
+            break
+        elif line.startswith('/*', position):
+            stack.append('*')
+            position += 1
+        else:
+            has_code = True
+            if char in _JS_STRING_CONTEXTS:
+                stack.append(char)
+            elif char == '/' and (not previous or previous in _JS_REGEX_PREFIX
+                                  or re.search(r'\b(?:return|typeof|case|in|of|void|delete)\s*$', line[:position])):
+                position = _skip_js_regex(line, position) - 1
+            elif char == '{' and stack:
+                stack.append('{')
+            elif char == '}' and stack and stack[-1] in ('{', '${'):
+                stack.pop()
+            previous = char
+        position += 1
+    
+    # A string that is not continued with a backslash ends with the line
+    if stack and stack[-1] in ('"', "'") and not line.endswith('\\'):
+        stack.pop()
+    return tuple(stack), has_code
+
+def _skip_js_regex(line, position):
+    """
+    Find the end of a regular expression literal.
+    
+    Args:
+        line (str): The line.
+        position (int): Position of the opening '/'.
+    
+    Returns:
+        int: Position after the closing '/', or the end of the line.
+    """
+    in_class = False
+    position += 1
+    while position < len(line):
+        char = line[position]
+        if char == '\\':
+            position += 1
+        elif char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            return position + 1
+        position += 1
+    return position
+
+# Minifier of every text asset, by extension, the other assets are copied unchanged
+MINIFIERS = {
+    '.css': minify_css,
+    '.js': minify_js,
+}
+
+class StaticAssets:
+    """
+    The static files of the site, published under content-hashed names.
+    
+    A fingerprinted file never changes, so it can be cached by browsers forever:
+    a new version of an asset gets a new name, and the pages are rendered with
+    the URL of the current version through the asset_url template function.
+    """
+    
+    def __init__(self, static_directory=STATIC_DIRECTORY, manifest=None):
+        """
+        Minify and fingerprint the static files.
+        
+        Args:
+            static_directory (str): Directory containing the static files.
+            manifest (dict, optional): Asset manifest of another instance for the same files, e.g. the
+                one of the parent of a worker process; the files are not read again, so the instance
+                only gives the URLs of the assets and has no files to write.
+        """
+        self.static_directory = Path(static_directory)
+        
+        # Asset path -> fingerprinted path, relative to the static directory
+        self.manifest = dict(manifest) if manifest is not None else {}
+        
+        # Fingerprinted path -> source file and minified content, None for a file copied unchanged
+        self._files = {}
+        if manifest is not None:
+            return
+        
+        for directory, pattern in ASSET_PATTERNS:
+            for source in sorted((self.static_directory / directory).glob(pattern)):
+                self._add(source, f"{directory}/{source.name}")
+    
+    def _add(self, source, asset_path):
+        """
+        Fingerprint one static file.
+        
+        Args:
+            source (Path): Path to the file.
+            asset_path (str): Path of the asset, relative to the static directory.
+        """
+        minify = MINIFIERS.get(source.suffix)
+        if minify is not None:
+            content = minify(source.read_text(encoding='utf-8'))
+            fingerprinted_path = fingerprint(asset_path, content.encode('utf-8'))
+        else:
+            content = None
+            fingerprinted_path = fingerprint(asset_path, source.read_bytes())
+        
+        self.manifest[asset_path] = fingerprinted_path
+        self._files[fingerprinted_path] = (source, content)
+    
+    def url(self, asset_path):
+        """
+        Get the URL of the current version of an asset, used by the templates as asset_url.
+        
+        Args:
+            asset_path (str): Path of the asset, relative to the static directory, e.g. 'js/search.js'.
+        
+        Returns:
+            str: Absolute URL of the fingerprinted file, or of the original file if it is not an asset.
+        """
+        return f"/static/{self.manifest.get(asset_path, asset_path)}"
+    
+    def write(self, output_directory, writer):
+        """
+        Write the fingerprinted files and the asset manifest, and delete the old versions.
+        
+        A fingerprinted file that already exists has the same content, so it is
+        left untouched. Fingerprinted files of other names, such as the sidebar
+        data, are not deleted.
+        
+        Args:
+            output_directory (str): Directory of the site.
+            writer (OutputWriter): Writer of the site files.
+        
+        Returns:
+            list: Paths to the old versions that were deleted.
+        """
+        output_static_directory = Path(output_directory) / 'static'
+        for fingerprinted_path, (source, content) in self._files.items():
+            output_file = output_static_directory / fingerprinted_path
+            if output_file.exists():
+                writer.add_counts(0, 0, 1)
+                continue
+            
+            os.makedirs(output_file.parent, exist_ok=True)
+            if content is None:
+                writer.copy_file(source, output_file)
+            else:
+                writer.write_text(output_file, content)
+        
+        writer.write_json(Path(output_directory) / ASSET_MANIFEST_FILE, self.manifest, indent=2)
+        
+        # The pages of this build only refer to the current versions
+        removed_files = []
+        current_files = set(self.manifest.values())
+        for directory, _ in ASSET_PATTERNS:
+            for output_file in sorted((output_static_directory / directory).glob('*.*')):
+                relative_path = f"{directory}/{output_file.name}"
+                match = FINGERPRINT_PATTERN.match(output_file.name)
+                if (match and relative_path not in current_files
+                        and f"{directory}/{match.group(1)}{match.group(2)}" in self.manifest):
+                    output_file.unlink()
+                    removed_files.append(str(output_file))
+        return removed_files
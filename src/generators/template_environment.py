@@ -0,0 +1,74 @@
+"""
+Template environment module for the photosi-catalog-site-builder.
+Provides the Jinja2 environment and the filters shared by all the page generators.
+"""
+
+import os
+import re
+from pathlib import Path
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+# Directory containing the page templates
+TEMPLATES_DIRECTORY = Path(__file__).parent.parent / 'templates'
+
+def github_to_link(text):
+    """
+    Convert GitHub URLs in text to HTML links.
+    
+    Args:
+        text (str): The text containing GitHub URLs.
+    
+    Returns:
+        str: Text with GitHub URLs converted to HTML links.
+    """
+    # Pattern to match GitHub URLs
+    pattern = r'(https://github\.com/[\w\-\.]+/[\w\-\.]+(?:\.git)?)'
+    
+    # Replace URLs with HTML links
+    return re.sub(pattern, r'<a href="\1" target="_blank">\1</a>', text)
+
+# Custom filters available in every template
+FILTERS = {
+    'github_to_link': github_to_link,
+}
+
+def static_url(asset_path):
+    """
+    Get the URL of a static file that is not fingerprinted.
+    
+    Args:
+        asset_path (str): Path of the file, relative to the static directory.
+    
+    Returns:
+        str: Absolute URL of the file.
+    """
+    return f"/static/{asset_path}"
+
+def create_environment(cache_directory=None, assets=None):
+    """
+    Create the Jinja2 environment shared by the page generators of a build.
+    
+    Templates are compiled once per environment. With a cache directory the
+    compiled templates are also stored on disk, so later builds and render
+    worker processes load them instead of compiling them again.
+    
+    The templates refer to the static files with asset_url, which returns the
+    URL of the fingerprinted file when the assets are given.
+    
+    Args:
+        cache_directory (str, optional): Directory for the persistent template bytecode cache.
+        assets (StaticAssets, optional): Fingerprinted static files of the site.
+    
+    Returns:
+        Environment: The Jinja2 environment.
+    """
+    bytecode_cache = None
+    if cache_directory:
+        bytecode_directory = Path(cache_directory) / 'templates'
+        os.makedirs(bytecode_directory, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(str(bytecode_directory))
+    
+    env = Environment(loader=FileSystemLoader(TEMPLATES_DIRECTORY), bytecode_cache=bytecode_cache)
+    env.filters.update(FILTERS)
+    env.globals['asset_url'] = assets.url if assets is not None else static_url
+    return env
@@ -0,0 +1,172 @@
+"""
+Topology generator module for the photosi-catalog-site-builder.
+Generates the global graph of the system, with the events grouped in clusters by message directory.
+"""
+
+import os
+import re
+from pathlib import Path
+
+from generators.output_writer import OutputWriter
+from generators.template_environment import create_environment
+
+class TopologyGenerator:
+    """Generator for the global topology page and its graph data."""
+    
+    def __init__(self, output_directory, env=None, writer=None):
+        """
+        Initialize the topology generator.
+        
+        Args:
+            output_directory (str): Directory where the generated site will be saved.
+            env (Environment, optional): Template environment shared by the page generators.
+            writer (OutputWriter, optional): Writer shared by the generators of the build.
+        """
+        self.output_directory = Path(output_directory)
+        
+        # Use the environment shared by the build, or a private one
+        self.env = env if env is not None else create_environment()
+        self.writer = writer if writer is not None else OutputWriter()
+        
+        # Paths of the data files of the last topology generated
+        self.data_files = set()
+    
+    def build(self, catalog):
+        """
+        Build the service-event graph of the whole catalog, with the events grouped by directory.
+        
+        The overview has a node for every service and every cluster, and one edge
+        for every service and cluster they are related through, with the number of
+        events published and consumed. The details of a cluster have its events and
+        their edges to the services.
+        
+        Args:
+            catalog (CatalogIndex): Index of the catalog.
+        
+        Returns:
+            tuple: The overview and the details of every cluster, by cluster id.
+        """
+        service_ids = catalog.service_names
+        service_indexes = {service_id: index for index, service_id in enumerate(service_ids)}
+        
+        # Events with the same name share a page, the last one wins as for the pages
+        events = {}
+        for event_ref, event in catalog.events.items():
+            events[(event.type, event.name)] = (event_ref, event)
+        
+        clusters = {}
+        for event_key in sorted(events, key=lambda key: key[1]):
+            event_ref, event = events[event_key]
+            directory = _event_directory(event_ref, event)
+            cluster = clusters.get(directory)
+            if cluster is None:
+                label = event.name.split(':', 1)[0] if ':' in event.name else directory
+                cluster = clusters[directory] = {
+                    'id': None,
+                    'label': label,
+                    'events': [],
+                    'edges': [],
+                }
+            
+            event_index = len(cluster['events'])
+            safe_id = event.name.replace(":", "_").replace(".", "_")
+            cluster['events'].append([event.type, event.name, f"/events/{event.type}_{safe_id}.html"])
+            
+            publishing_services, consuming_services = catalog.get_relations(event)
+            for service in publishing_services:
+                cluster['edges'].append([service.id, event_index, 'publishes'])
+            for service in consuming_services:
+                cluster['edges'].append([service.id, event_index, 'consumes'])
+        
+        # Aggregate the edges of every cluster by service
+        overview = {
+            'services': [[service_id, catalog.services[service_id].title] for service_id in service_ids],
+            'clusters': [],
+            'edges': [],
+        }
+        cluster_ids = set()
+        for cluster_index, directory in enumerate(sorted(clusters)):
+            cluster = clusters[directory]
+            
+            # The id names the data file of the cluster, directories like 'a.b' and 'a_b' get different ids
+            cluster_id = base_id = re.sub(r'[^A-Za-z0-9_-]', '_', directory)
+            suffix = 1
+            while cluster_id in cluster_ids:
+                suffix += 1
+                cluster_id = f"{base_id}-{suffix}"
+            cluster_ids.add(cluster_id)
+            cluster['id'] = cluster_id
+            overview['clusters'].append([cluster['id'], cluster['label'], len(cluster['events'])])
+            
+            counts = {}
+            for service_id, _, role in cluster['edges']:
+                published, consumed = counts.get(service_id, (0, 0))
+                if role == 'publishes':
+                    published += 1
+                else:
+                    consumed += 1
+                counts[service_id] = (published, consumed)
+            
+            for service_id in sorted(counts, key=service_indexes.get):
+                overview['edges'].append([service_indexes[service_id], cluster_index, *counts[service_id]])
+        
+        return overview, {cluster['id']: cluster for cluster in clusters.values()}
+    
+    def generate(self, catalog):
+        """
+        Generate the topology page, its overview data and the details of every cluster.
+        
+        Args:
+            catalog (CatalogIndex): Index of the catalog.
+        
+        Returns:
+            str: Path to the generated page.
+        """
+        data_dir = self.output_directory / 'static' / 'js' / 'topology'
+        os.makedirs(data_dir, exist_ok=True)
+        
+        overview, clusters = self.build(catalog)
+        
+        written_files = set()
+        for cluster_id, cluster in clusters.items():
+            cluster_file = data_dir / f"cluster-{cluster_id}.json"
+            self.writer.write_json(cluster_file, cluster)
+            written_files.add(cluster_file)
+        
+        overview_file = data_dir / 'overview.json'
+        self.writer.write_json(overview_file, overview)
+        written_files.add(overview_file)
+        
+        # Remove the clusters of a previous build that aren't needed anymore
+        for data_file in data_dir.glob('*.json'):
+            if data_file not in written_files:
+                os.remove(data_file)
+        self.data_files = written_files
+        
+        # Render the page, the graph is drawn client-side from the overview
+        template = self.env.get_template('topology.html')
+        output = template.render(
+            topology_data_url='/static/js/topology',
+            service_count=len(overview['services']),
+            cluster_count=len(overview['clusters']),
+            event_count=sum(cluster[2] for cluster in overview['clusters'])
+        )
+        
+        output_file = self.output_directory / 'topology.html'
+        return self.writer.write_text(output_file, output)
+
+def _event_directory(event_ref, event):
+    """
+    Get the message directory of an event.
+    
+    Args:
+        event_ref (str): AsyncAPI ref of the event, '../../messages/<type>/<directory>/<file>#...'.
+        event (Event): The event.
+    
+    Returns:
+        str: Name of the directory, or the 'Directory:' prefix of the event name if the ref has none.
+    """
+    parts = event_ref.split('#', 1)[0].split('/')
+    if len(parts) >= 6 and parts[2] == 'messages':
+        return parts[4]
+    return event.name.split(':', 1)[0]
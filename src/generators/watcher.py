@@ -0,0 +1,117 @@
+"""
+Watcher module for the photosi-catalog-site-builder.
+Polls the input files and rebuilds the pages affected by every change.
+"""
+
+import os
+import time
+from pathlib import Path
+
+from generators.template_environment import TEMPLATES_DIRECTORY
+
+class CatalogWatcher:
+    """Polling watcher that keeps a site generator in memory and rebuilds incrementally."""
+    
+    def __init__(self, generator, interval=1.0):
+        """
+        Initialize the catalog watcher.
+        
+        Args:
+            generator (SiteGenerator): Generator of the site, kept alive between rebuilds.
+            interval (float): Seconds between two scans of the input files.
+        """
+        self.generator = generator
+        self.interval = interval
+        self.directories = [Path(generator.input_directory), TEMPLATES_DIRECTORY]
+        self.snapshot = {}
+    
+    def scan(self):
+        """
+        Collect the modification time and size of every watched file.
+        
+        Returns:
+            dict: (st_mtime_ns, st_size) by path of the YAML and template files.
+        """
+        snapshot = {}
+        pending = [str(directory) for directory in self.directories if directory.exists()]
+        while pending:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        pending.append(entry.path)
+                    elif entry.name.endswith(('.yaml', '.html')):
+                        stat = entry.stat()
+                        snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+    
+    def changed_files(self):
+        """
+        Scan the watched files and compare them with the previous scan.
+        
+        Returns:
+            list: Sorted paths of the files added, modified or removed since the previous scan.
+        """
+        snapshot = self.scan()
+        changed = {path for path, signature in snapshot.items() if self.snapshot.get(path) != signature}
+        changed.update(path for path in self.snapshot if path not in snapshot)
+        self.snapshot = snapshot
+        return sorted(changed)
+    
+    def rebuild(self, changed_files=None):
+        """
+        Rebuild the pages affected by the changed files.
+        
+        Unchanged documents are reused from the generator's cache, and the
+        build manifest limits the rendering to the outputs whose inputs changed.
+        With staging, the build directory replaced by a rebuild becomes the
+        staging directory of the next one.
+        
+        Args:
+            changed_files (list, optional): Paths of the changed files.
+        
+        Returns:
+            list: Paths to the regenerated pages.
+        """
+        for file_path in changed_files or []:
+            self.generator.document_cache.invalidate(file_path)
+        
+        # The index is rebuilt from the cached documents
+        self.generator.catalog = None
+        self.generator.prepare_output()
+        generated_pages = self.generator.generate_all(incremental=True)
+        
+        # The replaced build is kept, the next rebuild syncs it instead of linking the whole site
+        self.generator.publish_output(keep_previous=True)
+        return generated_pages
+    
+    def run(self, max_rebuilds=None):
+        """
+        Build the site, then rebuild it on every change until interrupted.
+        
+        Args:
+            max_rebuilds (int, optional): Stop after this many rebuilds, used by the tests.
+        """
+        self.changed_files()
+        self.rebuild()
+        print(f"Watching {self.generator.input_directory} for changes, press Ctrl+C to stop")
+        
+        rebuilds = 0
+        try:
+            while max_rebuilds is None or rebuilds < max_rebuilds:
+                time.sleep(self.interval)
+                changed = self.changed_files()
+                if not changed:
+                    continue
+                
+                start = time.perf_counter()
+                for file_path in changed:
+                    print(f"Changed {file_path}")
+                try:
+                    self.rebuild(changed)
+                except Exception as e:
+                    # A broken edit must not stop the watcher, the next change triggers a new rebuild
+                    print(f"Error: {e}")
+                print(f"Rebuilt in {time.perf_counter() - start:.2f}s")
+                rebuilds += 1
+        except KeyboardInterrupt:
+            print("Stopped watching")
@@ -7,10 +7,10 @@ Generates a static site with documentation about service relationships.
 import argparse
 import os
 import sys
-import shutil
-from pathlib import Path
 
 from generators.site_generator import SiteGenerator
+from generators.watcher import CatalogWatcher
+from utils.build_profile import BuildProfile
 
 def parse_args():
     """Parse command line arguments."""
@@ -39,62 +39,106 @@ def parse_args():
         "--event", 
         type=str, 
         default=None,
-        help="Specific event to generate documentation for. Format: 'type:name' (e.g., 'message:userCreated')."
+        help="Specific event to generate documentation for. Format: 'type:name' (e.g., 'message:userCreated') or the AsyncAPI ref of the event."
+    )
+    parser.add_argument(
+        "--cache-dir", 
+        type=str, 
+        default=None,
+        help="Directory for the persistent parse cache. Unchanged YAML files are not parsed again between builds."
+    )
+    parser.add_argument(
+        "--incremental", 
+        action="store_true",
+        help="Regenerate only the pages affected by input changes since the previous build."
+    )
+    parser.add_argument(
+        "--jobs", 
+        type=int, 
+        default=1,
+        help="Number of worker processes used to parse the input files and render the pages."
+    )
+    parser.add_argument(
+        "--write-threads", 
+        type=int, 
+        default=4,
+        help="Number of background threads writing the output files while the pages are rendered, 0 to write them synchronously."
+    )
+    parser.add_argument(
+        "--graph-format", 
+        choices=["full", "compact"],
+        default="full",
+        help="Format of the graph data files. 'compact' stores every node once and refers to nodes by index."
+    )
+    parser.add_argument(
+        "--watch", 
+        action="store_true",
+        help="Keep running and regenerate the affected pages whenever an input file changes."
+    )
+    parser.add_argument(
+        "--watch-interval", 
+        type=float, 
+        default=1.0,
+        help="Seconds between two scans of the input files in watch mode."
+    )
+    parser.add_argument(
+        "--no-staging", 
+        action="store_true",
+        help="Write the site directly in the output directory, instead of building it in a staging directory that replaces the output directory when complete."
+    )
+    parser.add_argument(
+        "--profile", 
+        action="store_true",
+        help="Report the wall and CPU time of every phase, the YAML loads per file, the bytes written and the peak memory. Tracing the memory slows the build down."
+    )
+    parser.add_argument(
+        "--profile-output", 
+        type=str, 
+        default=None,
+        help="File where the cProfile statistics of the build are saved, readable with pstats. Implies --profile."
     )
     
     return parser.parse_args()
 
-def setup_directories(output_dir):
-    """Create necessary output directories if they don't exist."""
+def setup_directories(output_dir, assets, writer):
+    """
+    Create necessary output directories if they don't exist, and write the fingerprinted static files.
+    
+    Args:
+        output_dir (str): Directory of the site.
+        assets (StaticAssets): Static files of the site.
+        writer (OutputWriter): Writer of the site files.
+    """
     os.makedirs(output_dir, exist_ok=True)
     os.makedirs(os.path.join(output_dir, "services"), exist_ok=True)
     os.makedirs(os.path.join(output_dir, "events"), exist_ok=True)
     
-    # Copy static files
-    static_dir = Path(__file__).parent.parent / "static"
-    output_static_dir = Path(output_dir) / "static"
+    # Make sure the graph-data directory exists
+    os.makedirs(os.path.join(output_dir, "static", "js", "graph-data"), exist_ok=True)
     
-    if static_dir.exists():
-        # Create output static directory
-        os.makedirs(output_static_dir, exist_ok=True)
-        
-        # Copy CSS files
-        css_dir = static_dir / "css"
-        if css_dir.exists():
-            output_css_dir = output_static_dir / "css"
-            os.makedirs(output_css_dir, exist_ok=True)
-            for css_file in css_dir.glob("*.css"):
-                shutil.copy2(css_file, output_css_dir)
-        
-        # Copy JS files
-        js_dir = static_dir / "js"
-        if js_dir.exists():
-            output_js_dir = output_static_dir / "js"
-            os.makedirs(output_js_dir, exist_ok=True)
-            for js_file in js_dir.glob("*.js"):
-                shutil.copy2(js_file, output_js_dir)
-            
-            # Make sure the graph-data directory exists
-            graph_data_dir = output_js_dir / "graph-data"
-            os.makedirs(graph_data_dir, exist_ok=True)
-        
-        # Copy images
-        images_dir = static_dir / "images"
-        if images_dir.exists():
-            output_images_dir = output_static_dir / "images"
-            os.makedirs(output_images_dir, exist_ok=True)
-            for image_file in images_dir.glob("*.*"):
-                shutil.copy2(image_file, output_images_dir)
+    # Only new versions of the static files are written, the old ones are deleted
+    for removed_file in assets.write(output_dir, writer):
+        print(f"Removed {removed_file}")
 
 def main():
     """Main entry point for the application."""
     args = parse_args()
     
-    # Setup output directories
-    setup_directories(args.output)
+    profile = None
+    if args.profile or args.profile_output:
+        profile = BuildProfile(trace_memory=True, profile_file=args.profile_output)
+        profile.start()
     
     try:
-        generator = SiteGenerator(args.input, args.output)
+        # A single page is replaced atomically by the writer, staging would copy the whole site
+        targeted = (args.service or args.event) and not args.watch
+        generator = SiteGenerator(args.input, args.output, args.cache_dir, args.jobs, args.graph_format, profile,
+                                  staging=not args.no_staging and not targeted, write_threads=args.write_threads)
+        
+        # Setup output directories, in the staging directory the site is built in
+        generator.prepare_output()
+        with generator.profile.phase('static copy'):
+            setup_directories(generator.output_directory, generator.assets, generator.writer)
         
         # Handle specific service or event requests
         if args.service:
@@ -105,9 +149,23 @@ def main():
             generator.generate_event_page(args.event)
             print(f"Event page for {args.event} generated successfully in {args.output}")
             
-        if not args.service and not args.event:
-            generator.generate_all()
-            print(f"Site generated successfully in {args.output}")
+        if args.watch:
+            # Every rebuild publishes the site
+            CatalogWatcher(generator, args.watch_interval).run()
+        else:
+            if not args.service and not args.event:
+                generator.generate_all(incremental=args.incremental)
+            
+            # Replace the published site with the complete build
+            with generator.profile.phase('publish'):
+                generator.publish_output()
+            
+            if not args.service and not args.event:
+                print(f"Site generated successfully in {args.output}")
+        
+        if profile is not None:
+            profile.stop()
+            print(profile.report(generator.document_cache, generator.writer))
             
         return 0
     except Exception as e:
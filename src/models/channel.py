@@ -3,21 +3,37 @@ Channel model module for the photosi-catalog-site-builder.
 Defines the Channel class representing a channel in the AsyncAPI specification.
 """
 
+from sys import intern
+
 class Channel:
     """Represents a channel in the AsyncAPI specification."""
     
-    def __init__(self, id, address, event_ref):
+    __slots__ = ('id', 'address', 'event_refs', 'file_path')
+    
+    def __init__(self, id, address, event_refs, file_path=None):
         """
         Initialize a channel.
         
         Args:
             id (str): Unique identifier for the channel.
             address (str): Address or topic of the channel.
-            event_ref (str): async api $ref for event
+            event_refs (list): async api $ref of every event of the channel
+            file_path (str, optional): Path to the YAML file the channel was parsed from.
         """
-        self.id = id
+        self.id = intern(id) if isinstance(id, str) else id
         self.address = address
-        self.event_ref = event_ref
+        self.event_refs = event_refs
+        self.file_path = file_path
+    
+    @property
+    def event_ref(self):
+        """
+        Get the ref of the first event of the channel.
+        
+        Returns:
+            str: async api $ref of the event.
+        """
+        return self.event_refs[0]
         
     def to_dict(self):
         """
@@ -29,5 +45,5 @@ class Channel:
         return {
             'id': self.id,
             'address': self.address,
-            'event_ref': self.event_ref,
+            'event_refs': self.event_refs,
         }
@@ -3,10 +3,16 @@ Event model module for the photosi-catalog-site-builder.
 Defines the Event class representing an event in the AsyncAPI specification.
 """
 
+from sys import intern
+
+from utils.graph_utils import GraphBuilder
+
 class Event:
     """Represents an event in the AsyncAPI specification."""
     
-    def __init__(self, id, name, type, description=""):
+    __slots__ = ('id', 'name', 'type', 'description', 'source', '_message')
+    
+    def __init__(self, id, name, type, description="", source=None):
         """
         Initialize an event.
         
@@ -15,11 +21,51 @@ class Event:
             name (str): Display name for the event.
             type (str): Type of the event (message, request, command).
             description (str, optional): Detailed description of the event.
+            source (MessageSource, optional): Location of the message in its YAML file, its
+                payload and examples are loaded from there on first access.
         """
-        self.id = id
-        self.name = name
-        self.type = type
+        # Ids, names and types are repeated across many objects, intern them to share one copy
+        self.id = intern(id) if isinstance(id, str) else id
+        self.name = intern(name) if isinstance(name, str) else name
+        self.type = intern(type)
         self.description = description
+        self.source = source
+        self._message = None
+    
+    @property
+    def payload(self):
+        """
+        Get the payload schema of the event, loaded on first access.
+        
+        Returns:
+            dict: The payload schema, or None if the event has none.
+        """
+        return self._load_message().get('payload')
+    
+    @property
+    def examples(self):
+        """
+        Get the examples of the event, loaded on first access.
+        
+        Returns:
+            list: The examples of the message.
+        """
+        return self._load_message().get('examples', [])
+    
+    def _load_message(self):
+        """
+        Load the message of the event from its source, once.
+        
+        The catalog index, the sidebars and the event table only need the name and
+        the description, read with the headers: only the pages showing the payload
+        load the whole message.
+        
+        Returns:
+            dict: The message, empty if the event has no source.
+        """
+        if self._message is None:
+            self._message = self.source.load() if self.source is not None else {}
+        return self._message
         
     def to_dict(self):
         """
@@ -47,113 +93,15 @@ class Event:
         Returns:
             dict: Dictionary with nodes and edges for graph visualization.
         """
-        nodes = []
-        edges = []
-        
-        # Add the event node in the center
-        event_node = {
-            'id': f"{self.id}-{self.type}",
-            'type': f"{self.type}s",  # pluralize the type
-            'data': {
-                'mode': 'full',
-                'message': {
-                    'id': self.id,
-                    'data': {
-                        'id': self.id,
-                        'name': self.name,
-                    }
-                }
-            },
-            'position': {'x': 525, 'y': 125}
-        }
-        nodes.append(event_node)
+        graph = GraphBuilder()
+        event_node = graph.add_event(self)
         
         # Add nodes and edges for publishing services
-        y_position = 50
-        if publishing_services:
-            for service in publishing_services:
-                service_node = {
-                    'id': f"{service.id}",
-                    'type': 'services',
-                    'data': {
-                        'service': {
-                            'id': service.id,
-                            'data': {
-                                'id': service.id,
-                                'name': service.title,
-                            }
-                        }
-                    },
-                    'position': {'x': 75, 'y': y_position}
-                }
-                nodes.append(service_node)
-                
-                # Add edge from service to event
-                edge = {
-                    'id': f"{service.id}-{self.id}-{self.type}",
-                    'source': f"{service.id}",
-                    'target': f"{self.id}-{self.type}",
-                    'label': 'publishes',
-                    'animated': False,
-                    'data': {
-                        'message': {
-                            'id': self.id,
-                            'data': {
-                                'id': self.id,
-                                'name': self.name,
-                            }
-                        }
-                    }
-                }
-                edges.append(edge)
-                
-                y_position += 100
-                
-        # Add nodes and edges for consuming services
-        y_position = 50
-        if consuming_services:
-            for service in consuming_services:
-                service_node = {
-                    'id': f"{service.id}",
-                    'type': 'services',
-                    'data': {
-                        'service': {
-                            'id': service.id,
-                            'data': {
-                                'id': service.id,
-                                'name': service.title,
-                            }
-                        }
-                    },
-                    'position': {'x': 975, 'y': y_position}
-                }
-                
-                # Only add the node if it's not already in the nodes list
-                if not any(node['id'] == service_node['id'] for node in nodes):
-                    nodes.append(service_node)
-                
-                # Add edge from event to service
-                edge = {
-                    'id': f"{self.id}-{self.type}-{service.id}",
-                    'source': f"{self.id}-{self.type}",
-                    'target': f"{service.id}",
-                    'label': 'consumed by',
-                    'animated': False,
-                    'data': {
-                        'message': {
-                            'id': self.id,
-                            'data': {
-                                'id': self.id,
-                                'name': self.name,
-                            }
-                        }
-                    }
-                }
-                edges.append(edge)
-                
-                y_position += 100
+        for service in publishing_services or ():
+            graph.add_edge(graph.add_service(service), event_node, 'publishes', self)
         
-        return {
-            'nodes': nodes,
-            'edges': edges
-        }
+        # Add nodes and edges for consuming services, a service that also publishes the event has one node
+        for service in consuming_services or ():
+            graph.add_edge(event_node, graph.add_service(service), 'consumed by', self)
+        
+        return graph.build()
@@ -3,9 +3,15 @@ Service model module for the photosi-catalog-site-builder.
 Defines the Service class representing a service in the AsyncAPI specification.
 """
 
+from sys import intern
+
+from utils.graph_utils import GraphBuilder
+
 class Service:
     """Represents a service in the AsyncAPI specification."""
     
+    __slots__ = ('id', 'title', 'description', '_received_events', '_sent_events')
+    
     def __init__(self, id, title, description):
         """
         Initialize a service.
@@ -15,11 +21,23 @@ class Service:
             title (str): Display title for the service.
             description (str): Detailed description of the service.
         """
-        self.id = id
+        self.id = intern(id)
         self.title = title
         self.description = description
-        self.received_events = []
-        self.sent_events = []
+        
+        # Events by id, in insertion order
+        self._received_events = {}
+        self._sent_events = {}
+    
+    @property
+    def received_events(self):
+        """Events received by this service, in the order they were added."""
+        return self._received_events.values()
+    
+    @property
+    def sent_events(self):
+        """Events sent by this service, in the order they were added."""
+        return self._sent_events.values()
         
     def add_received_event(self, event):
         """
@@ -28,9 +46,9 @@ class Service:
         Args:
             event (Event): Event received by the service.
         """
-        # Check if the event already exists in the list
-        if not any(e.id == event.id for e in self.received_events):
-            self.received_events.append(event)
+        # Keep the first event with a given id
+        if event.id not in self._received_events:
+            self._received_events[event.id] = event
         
     def add_sent_event(self, event):
         """
@@ -39,9 +57,9 @@ class Service:
         Args:
             event (Event): Event sent by the service.
         """
-        # Check if the event already exists in the list
-        if not any(e.id == event.id for e in self.sent_events):
-            self.sent_events.append(event)
+        # Keep the first event with a given id
+        if event.id not in self._sent_events:
+            self._sent_events[event.id] = event
             
     def to_dict(self):
         """
@@ -65,109 +83,15 @@ class Service:
         Returns:
             dict: Dictionary with nodes and edges for graph visualization.
         """
-        nodes = []
-        edges = []
-        
-        # Add the service node
-        service_node = {
-            'id': f"{self.id}",
-            'type': 'services',
-            'data': {
-                'service': {
-                    'id': self.id,
-                    'data': {
-                        'id': self.id,
-                        'name': self.title,
-                    }
-                }
-            },
-            'position': {'x': 525, 'y': 125}
-        }
-        nodes.append(service_node)
+        graph = GraphBuilder(display_names=True)
+        service_node = graph.add_service(self)
         
         # Add nodes and edges for received events
-        y_position = 50
         for event in self.received_events:
-            event_node = {
-                'id': f"{event.id}-{event.type}",
-                'type': event.type + 's',  # pluralize the type
-                'data': {
-                    'mode': 'full',
-                    'message': {
-                        'id': event.id,
-                        'data': {
-                            'id': event.id,
-                            'name': event.name,
-                        }
-                    }
-                },
-                'position': {'x': 75, 'y': y_position}
-            }
-            nodes.append(event_node)
-            
-            # Add edge from event to service
-            edge = {
-                'id': f"{event.id}-{event.type}-{self.id}",
-                'source': f"{event.id}-{event.type}",
-                'target': f"{self.id}",
-                'label': 'accepts',
-                'animated': False,
-                'data': {
-                    'message': {
-                        'id': event.id,
-                        'data': {
-                            'id': event.id,
-                            'name': event.name,
-                        }
-                    }
-                }
-            }
-            edges.append(edge)
-            
-            y_position += 100
-            
+            graph.add_edge(graph.add_event(event), service_node, 'accepts', event)
+        
         # Add nodes and edges for sent events
-        y_position = 50
         for event in self.sent_events:
-            event_node = {
-                'id': f"{event.id}-{event.type}",
-                'type': event.type + 's',  # pluralize the type
-                'data': {
-                    'mode': 'full',
-                    'message': {
-                        'id': event.id,
-                        'data': {
-                            'id': event.id,
-                            'name': event.name,
-                        }
-                    }
-                },
-                'position': {'x': 975, 'y': y_position}
-            }
-            nodes.append(event_node)
-            
-            # Add edge from service to event
-            edge = {
-                'id': f"{self.id}-{event.id}-{event.type}",
-                'source': f"{self.id}",
-                'target': f"{event.id}-{event.type}",
-                'label': 'publishes',
-                'animated': False,
-                'data': {
-                    'message': {
-                        'id': event.id,
-                        'data': {
-                            'id': event.id,
-                            'name': event.name,
-                        }
-                    }
-                }
-            }
-            edges.append(edge)
-            
-            y_position += 100
-            
-        return {
-            'nodes': nodes,
-            'edges': edges
-        }
+            graph.add_edge(service_node, graph.add_event(event), 'publishes', event)
+        
+        return graph.build()
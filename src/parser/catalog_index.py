@@ -0,0 +1,267 @@
+"""
+Catalog index module for the photosi-catalog-site-builder.
+Builds, in a single pass over the input files, the index of services, events, channels
+and relations that all the page generators read from.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+
+# Event types, in the order they are scanned
+EVENT_TYPES = ['message', 'request', 'command']
+
+class CatalogIndex:
+    """Index of the whole catalog, built once per run and shared by all the generators."""
+    
+    def __init__(self):
+        """Initialize an empty catalog index."""
+        # Parsed services by name and the input files each one was parsed from
+        self.services = {}
+        self.service_dependencies = {}
+        
+        # Parsed events by AsyncAPI ref and the input files each one was parsed from
+        self.events = {}
+        self.event_dependencies = {}
+        
+        # Parsed channels by AsyncAPI ref
+        self.channels = {}
+        
+        # Message container id -> (event_type, title)
+        self.container_titles = {}
+        
+        # (event_type, event_name) -> publishing and consuming services
+        self.relations = {}
+        
+        # Sorted lists for the sidebars
+        self.service_names = []
+        self.event_keys = []
+        
+        # Errors of the files that could not be parsed, by file path
+        self.parse_errors = {}
+    
+    @classmethod
+    def build(cls, input_directory, service_parser, event_parser, jobs=1, profile=None):
+        """
+        Build the index of a catalog.
+        
+        Every input file is parsed once, in parallel if jobs > 1. Files that
+        cannot be parsed are collected in parse_errors and skipped.
+        
+        Args:
+            input_directory (str): Directory containing the AsyncAPI files.
+            service_parser (ServiceParser): Parser for the service files.
+            event_parser (EventParser): Parser for the event files.
+            jobs (int): Number of worker processes used to parse the files.
+            profile (BuildProfile, optional): Profile the phases of the build are measured in.
+        
+        Returns:
+            CatalogIndex: The index of the catalog.
+        """
+        index = cls()
+        input_directory = Path(input_directory)
+        document_cache = service_parser.document_cache
+        phase = profile.phase if profile is not None else lambda name: nullcontext()
+        
+        with phase('scan'):
+            message_files, service_files, channel_files = cls._scan(input_directory, service_parser)
+        
+        # Parse every service and channel file once, collecting the errors instead of stopping at the
+        # first one; of the message files only the headers are read. Both share one pool of workers
+        pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else nullcontext()
+        with phase('parse yaml'), pool as executor:
+            errors = document_cache.preload(service_files + channel_files, jobs=jobs, executor=executor)
+            errors.update(document_cache.preload_headers([yaml_file for _, _, yaml_file in message_files],
+                                                         jobs=jobs, executor=executor))
+        
+        with phase('parse events'):
+            index._index_events(message_files, event_parser, errors)
+            index._index_channels(channel_files, input_directory / "channels", service_parser.cahnnel_parser, errors)
+        with phase('parse services'):
+            index._index_services(service_parser, errors)
+        with phase('collect relations'):
+            index._collect_relations()
+        
+        index.service_names = sorted(index.services)
+        index.event_keys = sorted(index.relations.keys(), key=lambda x: x[1])  # Sort by event ID
+        index.parse_errors = errors
+        return index
+    
+    @staticmethod
+    def _scan(input_directory, service_parser):
+        """
+        Find the input files of a catalog.
+        
+        Args:
+            input_directory (Path): Directory containing the AsyncAPI files.
+            service_parser (ServiceParser): Parser for the service files.
+        
+        Returns:
+            tuple: Tuples (event_type, directory, yaml_file) of the message files, and the
+                sorted paths of the service and channel files.
+        """
+        # Find all the message files
+        message_files = []
+        for event_type in EVENT_TYPES:
+            type_dir = input_directory / "messages" / event_type
+            if type_dir.exists():
+                for directory in type_dir.iterdir():
+                    if directory.is_dir():
+                        for yaml_file in directory.glob("*.yaml"):
+                            message_files.append((event_type, directory, yaml_file))
+        
+        service_files = sorted(service_parser.services_directory.glob('*.yaml'))
+        channels_directory = input_directory / "channels"
+        channel_files = sorted(channels_directory.rglob('*.yaml')) if channels_directory.exists() else []
+        return message_files, service_files, channel_files
+    
+    def _index_events(self, message_files, event_parser, errors):
+        """
+        Index all the events of the message files and their container ids.
+        
+        Args:
+            message_files (list): Tuples (event_type, directory, yaml_file) of the message files.
+            event_parser (EventParser): Parser for the event files.
+            errors (dict): Errors of the files that could not be parsed.
+        """
+        document_cache = event_parser.document_cache
+        for event_type, directory, yaml_file in message_files:
+            if document_cache.canonical_path(yaml_file) in errors:
+                continue
+            try:
+                headers = document_cache.load_headers(yaml_file)
+            except Exception as e:
+                errors[document_cache.canonical_path(yaml_file)] = str(e)
+                continue
+            for container_id, msg_data in headers.items():
+                event_ref = f"../../messages/{event_type}/{directory.name}/{yaml_file.name}#/components/messages/{container_id}"
+                try:
+                    with document_cache.track() as dependencies:
+                        self.events[event_ref] = event_parser.parse(event_ref)
+                except Exception as e:
+                    errors.setdefault(document_cache.canonical_path(yaml_file), str(e))
+                    continue
+                self.event_dependencies[event_ref] = dependencies
+                if 'title' in msg_data:
+                    self.container_titles[container_id] = (event_type, msg_data['title'])
+    
+    def _index_channels(self, channel_files, channels_directory, channel_parser, errors):
+        """
+        Index all the channels of the channel files, by the ref the services use to point at them.
+        
+        Args:
+            channel_files (list): Paths to the channel files.
+            channels_directory (Path): Directory containing the channel files.
+            channel_parser (ChannelParser): Parser for the channel files.
+            errors (dict): Errors of the files that could not be parsed.
+        """
+        for channel_file in channel_files:
+            if channel_parser.document_cache.canonical_path(channel_file) in errors:
+                continue
+            relative_path = channel_file.relative_to(channels_directory).as_posix()
+            try:
+                channels = channel_parser.parse_file(channel_file)
+            except Exception:
+                # Malformed channel files are reported only if a service uses them
+                continue
+            # Channels without messages are skipped too
+            for channel in channels:
+                self.channels[f"../channels/{relative_path}#/channels/{channel.id}"] = channel
+    
+    def _index_services(self, service_parser, errors):
+        """
+        Index all the services.
+        
+        The channels and events the services refer to are looked up in the index,
+        so parsing a service reads only its own file.
+        
+        Args:
+            service_parser (ServiceParser): Parser for the service files.
+            errors (dict): Errors of the files that could not be parsed.
+        """
+        for service_name in service_parser.list_all_services():
+            try:
+                with service_parser.document_cache.track() as dependencies:
+                    service = service_parser.parse(service_name, self.channels, self.events)
+            except Exception as e:
+                service_file = service_parser.services_directory / f"{service_name}.yaml"
+                errors.setdefault(service_parser.document_cache.canonical_path(service_file), str(e))
+                continue
+            self.services[service_name] = service
+            self.service_dependencies[service_name] = dependencies
+    
+    def _collect_relations(self):
+        """Collect the services that publish and consume every event, from the indexed services."""
+        # Service ids already related to each event, to skip duplicates in constant time
+        related_ids = {}
+        
+        for service in self.services.values():
+            for role, events in (('publishing_services', service.sent_events),
+                                 ('consuming_services', service.received_events)):
+                for event in events:
+                    # Try to map to a proper title if possible
+                    event_key = (event.type, event.name)
+                    
+                    # If event.id is a container ID, look it up
+                    if event.id in self.container_titles:
+                        event_key = self.container_titles[event.id]
+                    
+                    if event_key not in self.relations:
+                        self.relations[event_key] = {'publishing_services': [], 'consuming_services': []}
+                        related_ids[event_key] = {'publishing_services': set(), 'consuming_services': set()}
+                    
+                    # Usa gli ID dei servizi per evitare duplicati
+                    if service.id not in related_ids[event_key][role]:
+                        related_ids[event_key][role].add(service.id)
+                        self.relations[event_key][role].append(service)
+    
+    def get_service(self, service_name):
+        """
+        Get a parsed service.
+        
+        Args:
+            service_name (str): Name of the service.
+        
+        Returns:
+            Service: The parsed service.
+        
+        Raises:
+            FileNotFoundError: If the service doesn't exist.
+        """
+        if service_name not in self.services:
+            raise FileNotFoundError(f"Service not found: {service_name}")
+        return self.services[service_name]
+    
+    def find_event(self, event_reference):
+        """
+        Find a parsed event.
+        
+        Args:
+            event_reference (str): AsyncAPI ref of the event, or 'type:name' (e.g. 'message:Directory:Topic').
+        
+        Returns:
+            Event: The parsed event, or None if it isn't in the catalog.
+        """
+        if event_reference in self.events:
+            return self.events[event_reference]
+        
+        event_type, _, event_name = event_reference.partition(':')
+        for event in self.events.values():
+            if event.type == event_type and event.name == event_name:
+                return event
+        return None
+    
+    def get_relations(self, event):
+        """
+        Get the services that publish and consume an event.
+        
+        Args:
+            event (Event): The event.
+        
+        Returns:
+            tuple: Lists of publishing and consuming services.
+        """
+        relations = self.relations.get((event.type, event.name))
+        if relations is None:
+            return [], []
+        return relations['publishing_services'], relations['consuming_services']
@@ -0,0 +1,473 @@
+"""
+Catalog snapshot module for the photosi-catalog-site-builder.
+Stores the catalog index of a build in a SQLite file, so that generating a single page
+reads only the rows of that page instead of parsing the whole catalog again.
+"""
+
+import hashlib
+import os
+import sqlite3
+from pathlib import Path
+
+from models.event import Event
+from models.service import Service
+from parser.catalog_index import CatalogIndex
+from parser.event_parser import MessageSource
+
+# Bump this whenever the schema or the meaning of the rows changes
+SNAPSHOT_VERSION = 1
+
+SNAPSHOT_FILENAME = '.catalog-snapshot.sqlite'
+
+def snapshot_path(site_directory, cache_directory=None):
+    """
+    Get the path of the snapshot of a site, which is never published with it.
+    
+    Args:
+        site_directory (str): Directory of the published site.
+        cache_directory (str, optional): Directory of the persistent caches, where the snapshots
+            of every site are stored; without it the snapshot is saved next to the site.
+    
+    Returns:
+        Path: Path to the SQLite file.
+    """
+    # The site directory itself may be a link to the directory of the last build
+    site_directory = Path(os.path.realpath(Path(site_directory).parent)) / Path(site_directory).name
+    if cache_directory:
+        digest = hashlib.blake2b(str(site_directory).encode('utf-8'), digest_size=8).hexdigest()
+        return Path(cache_directory) / 'snapshots' / f"{site_directory.name}-{digest}.sqlite"
+    return site_directory.parent / f".{site_directory.name}{SNAPSHOT_FILENAME}"
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE files (path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, hash TEXT);
+CREATE TABLE services (name TEXT PRIMARY KEY, title TEXT, description TEXT);
+CREATE TABLE events (ref TEXT PRIMARY KEY, id TEXT, name TEXT, type TEXT, description TEXT,
+                     file_path TEXT, pointer TEXT);
+CREATE INDEX events_by_name ON events (type, name);
+CREATE TABLE channels (ref TEXT PRIMARY KEY, id TEXT, address TEXT, file_path TEXT);
+CREATE TABLE channel_messages (channel_ref TEXT, position INTEGER, event_ref TEXT,
+                               PRIMARY KEY (channel_ref, position));
+CREATE TABLE service_events (service TEXT, role TEXT, position INTEGER, id TEXT, name TEXT, type TEXT,
+                             description TEXT, file_path TEXT, pointer TEXT,
+                             PRIMARY KEY (service, role, position));
+CREATE TABLE relations (event_type TEXT, event_name TEXT, role TEXT, position INTEGER, service TEXT,
+                        PRIMARY KEY (event_type, event_name, role, position));
+CREATE INDEX relations_by_service ON relations (service);
+CREATE TABLE dependencies (kind TEXT, owner TEXT, path TEXT, PRIMARY KEY (kind, owner, path));
+"""
+
+# Tables of the snapshot, in the order they are written, and the number of leading columns of their primary key
+TABLES = [('meta', 1), ('files', 1), ('services', 1), ('events', 1), ('channels', 1), ('channel_messages', 2),
+          ('service_events', 3), ('relations', 4), ('dependencies', 3)]
+
+class CatalogSnapshot:
+    """
+    SQLite copy of the catalog index of the last build.
+    
+    Besides the services, events, channels and relations, the snapshot records the
+    input files every service and event was parsed from, with their content hash.
+    A page is read from the snapshot only if those files are unchanged, otherwise
+    the catalog must be parsed again.
+    """
+    
+    def __init__(self, snapshot_file, input_directory):
+        """
+        Initialize the snapshot.
+        
+        Args:
+            snapshot_file (str): Path to the SQLite file.
+            input_directory (str): Directory containing the AsyncAPI files.
+        """
+        self.snapshot_file = str(snapshot_file)
+        self.input_directory = os.path.realpath(input_directory)
+        self.services_directory = os.path.join(self.input_directory, 'services')
+        
+        # Rows of the last snapshot saved, and the modification time and size of its file
+        self._saved_rows = None
+        self._saved_signature = None
+    
+    def save(self, catalog, file_hashes=None):
+        """
+        Write the snapshot of a catalog index.
+        
+        The first snapshot of a generator is written to a temporary file that replaces
+        the previous one, and the rows are inserted in the same order by every build
+        of the same catalog. The next ones, e.g. the rebuilds of --watch, only update
+        the rows that changed, in a single transaction, as long as the file is the
+        one this snapshot wrote and no event was added or removed.
+        
+        Args:
+            catalog (CatalogIndex): The full index of the catalog.
+            file_hashes (dict, optional): Content hashes of the input files computed by the
+                build manifest, the files missing from it are hashed.
+        """
+        rows = self._rows(catalog, file_hashes)
+        if not self._update(rows):
+            self._write(rows)
+        self._saved_rows = rows
+        self._saved_signature = _stat_signature(self.snapshot_file)
+    
+    def _rows(self, catalog, file_hashes):
+        """
+        Get the rows of the snapshot of a catalog index.
+        
+        Args:
+            catalog (CatalogIndex): The full index of the catalog.
+            file_hashes (dict): Content hashes of the input files, or None.
+        
+        Returns:
+            dict: Rows of every table by primary key, in insertion order.
+        """
+        rows = {
+            'meta': [
+                ('version', str(SNAPSHOT_VERSION)),
+                ('input_directory', self.input_directory),
+                ('services_mtime', str(_directory_mtime(self.services_directory))),
+            ],
+            'services': [(name, service.title, service.description) for name, service in catalog.services.items()],
+            'events': [(ref,) + _event_row(event) for ref, event in catalog.events.items()],
+            'channels': [(ref, channel.id, channel.address, channel.file_path)
+                         for ref, channel in catalog.channels.items()],
+            'channel_messages': [
+                (ref, position, event_ref)
+                for ref, channel in catalog.channels.items()
+                for position, event_ref in enumerate(channel.event_refs)
+            ],
+            'service_events': [
+                (name, role, position) + _event_row(event)
+                for name, service in catalog.services.items()
+                for role, events in (('sent', service.sent_events), ('received', service.received_events))
+                for position, event in enumerate(events)
+            ],
+            'relations': [
+                (event_type, event_name, role, position, service.id)
+                for (event_type, event_name), related in catalog.relations.items()
+                for role, services in related.items()
+                for position, service in enumerate(services)
+            ],
+        }
+        
+        dependencies = sorted({('service', name, path)
+                               for name, paths in catalog.service_dependencies.items() for path in paths})
+        dependencies += sorted({('event', ref, path)
+                                for ref, paths in catalog.event_dependencies.items() for path in paths})
+        rows['dependencies'] = dependencies
+        rows['files'] = [(path,) + _file_signature(path, file_hashes)
+                         for path in sorted({path for _, _, path in dependencies})]
+        
+        return {table: {row[:key_length]: row for row in rows[table]} for table, key_length in TABLES}
+    
+    def _write(self, rows):
+        """
+        Write a new snapshot file with all the rows.
+        
+        Args:
+            rows (dict): Rows of every table by primary key.
+        """
+        os.makedirs(os.path.dirname(self.snapshot_file), exist_ok=True)
+        temporary_file = f"{self.snapshot_file}.tmp"
+        if os.path.exists(temporary_file):
+            os.remove(temporary_file)
+        
+        connection = sqlite3.connect(temporary_file)
+        try:
+            connection.executescript(SCHEMA)
+            for table, _ in TABLES:
+                table_rows = list(rows[table].values())
+                if table_rows:
+                    placeholders = ', '.join('?' * len(table_rows[0]))
+                    connection.executemany(f"INSERT INTO {table} VALUES ({placeholders})", table_rows)
+            connection.commit()
+        finally:
+            connection.close()
+        os.replace(temporary_file, self.snapshot_file)
+    
+    def _update(self, rows):
+        """
+        Update the rows of the snapshot this object last wrote that differ from the new ones.
+        
+        Changed rows are updated in place, so the events keep the order the
+        snapshot lookups by type and name rely on.
+        
+        Args:
+            rows (dict): Rows of every table by primary key.
+        
+        Returns:
+            bool: False if the snapshot must be written again instead.
+        """
+        previous = self._saved_rows
+        if previous is None or _stat_signature(self.snapshot_file) != self._saved_signature:
+            return False
+        if list(previous['events']) != list(rows['events']):
+            return False
+        
+        connection = sqlite3.connect(self.snapshot_file)
+        try:
+            for table, key_length in TABLES:
+                old_rows, new_rows = previous[table], rows[table]
+                columns = [column for _, column, *_ in connection.execute(f"PRAGMA table_info({table})")]
+                condition = ' AND '.join(f"{column} = ?" for column in columns[:key_length])
+                
+                connection.executemany(f"DELETE FROM {table} WHERE {condition}",
+                                       [key for key in old_rows if key not in new_rows])
+                if len(columns) > key_length:
+                    assignments = ', '.join(f"{column} = ?" for column in columns[key_length:])
+                    connection.executemany(f"UPDATE {table} SET {assignments} WHERE {condition}", [
+                        row[key_length:] + key for key, row in new_rows.items()
+                        if key in old_rows and old_rows[key] != row
+                    ])
+                connection.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * len(columns))})",
+                                       [row for key, row in new_rows.items() if key not in old_rows])
+            connection.commit()
+        finally:
+            connection.close()
+        return True
+    
+    def load_service(self, service_name):
+        """
+        Read a service from the snapshot, if its input files are unchanged.
+        
+        Args:
+            service_name (str): Name of the service.
+        
+        Returns:
+            CatalogIndex: Partial index with the service and the names of all the services
+                for the sidebar, or None if the snapshot can't be used.
+        """
+        connection = self._connect()
+        if connection is None:
+            return None
+        try:
+            row = connection.execute("SELECT name, title, description FROM services WHERE name = ?",
+                                     (service_name,)).fetchone()
+            if row is None:
+                return None
+            
+            paths = self._fresh_dependencies(connection, "kind = 'service' AND owner = ?", (service_name,))
+            if paths is None:
+                return None
+            
+            index = CatalogIndex()
+            index.services[service_name] = _service(connection, row)
+            index.service_dependencies[service_name] = set(paths)
+            index.service_names = [name for name, in connection.execute("SELECT name FROM services ORDER BY name")]
+            return index
+        finally:
+            connection.close()
+    
+    def load_event(self, event_reference):
+        """
+        Read an event and the services related to it from the snapshot, if their input files are unchanged.
+        
+        Any service could start publishing or consuming the event, so the files of
+        all the services are checked too, without parsing them: the cost of the check
+        grows with the number of service files, not only with the files of the event.
+        
+        Args:
+            event_reference (str): AsyncAPI ref of the event, or 'type:name' (e.g. 'message:Directory:Topic').
+        
+        Returns:
+            CatalogIndex: Partial index with the event and its relations, or None if the snapshot
+                can't be used or the event is not in it.
+        """
+        connection = self._connect()
+        if connection is None:
+            return None
+        try:
+            columns = "ref, id, name, type, description, file_path, pointer"
+            row = connection.execute(f"SELECT {columns} FROM events WHERE ref = ?", (event_reference,)).fetchone()
+            if row is None:
+                event_type, _, event_name = event_reference.partition(':')
+                row = connection.execute(f"SELECT {columns} FROM events WHERE type = ? AND name = ? ORDER BY rowid",
+                                         (event_type, event_name)).fetchone()
+            if row is None:
+                return None
+            
+            event_ref = row[0]
+            if self._fresh_dependencies(connection, "(kind = 'event' AND owner = ?) OR kind = 'service'",
+                                        (event_ref,)) is None:
+                return None
+            
+            index = CatalogIndex()
+            event = _event(row[1:])
+            index.events[event_ref] = event
+            index.event_dependencies[event_ref] = {path for path, in connection.execute(
+                "SELECT path FROM dependencies WHERE kind = 'event' AND owner = ?", (event_ref,))}
+            
+            related = {'publishing_services': [], 'consuming_services': []}
+            for role, service_name in connection.execute(
+                    "SELECT role, service FROM relations WHERE event_type = ? AND event_name = ? ORDER BY role, position",
+                    (event.type, event.name)):
+                if service_name not in index.services:
+                    service_row = connection.execute("SELECT name, title, description FROM services WHERE name = ?",
+                                                     (service_name,)).fetchone()
+                    index.services[service_name] = _service(connection, service_row)
+                related[role].append(index.services[service_name])
+            if related['publishing_services'] or related['consuming_services']:
+                index.relations[(event.type, event.name)] = related
+            return index
+        finally:
+            connection.close()
+    
+    def _connect(self):
+        """
+        Open the snapshot, if it exists and was written for this input directory by this version.
+        
+        Returns:
+            Connection: The open database, or None.
+        """
+        if not os.path.exists(self.snapshot_file):
+            return None
+        connection = sqlite3.connect(self.snapshot_file)
+        try:
+            meta = dict(connection.execute("SELECT key, value FROM meta"))
+        except sqlite3.Error:
+            connection.close()
+            return None
+        
+        if (meta.get('version') != str(SNAPSHOT_VERSION) or meta.get('input_directory') != self.input_directory
+                or meta.get('services_mtime') != str(_directory_mtime(self.services_directory))):
+            connection.close()
+            return None
+        return connection
+    
+    def _fresh_dependencies(self, connection, condition, parameters):
+        """
+        Check that the input files of some rows still have the content recorded in the snapshot.
+        
+        Only the files whose modification time or size changed are read and hashed.
+        
+        Args:
+            connection (Connection): The open snapshot.
+            condition (str): SQL condition selecting the rows of the dependencies table.
+            parameters (tuple): Parameters of the condition.
+        
+        Returns:
+            list: Canonical paths of the files, or None if a file changed.
+        """
+        rows = connection.execute(
+            "SELECT DISTINCT dependencies.path, files.mtime_ns, files.size, files.hash "
+            f"FROM dependencies LEFT JOIN files ON files.path = dependencies.path WHERE {condition}",
+            parameters).fetchall()
+        for path, mtime_ns, size, content_hash in rows:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            if content_hash is None or stat.st_size != size:
+                return None
+            if stat.st_mtime_ns != mtime_ns and _file_hash(path) != content_hash:
+                return None
+        return [path for path, _, _, _ in rows]
+
+def _event_row(event):
+    """
+    Get the columns of an event.
+    
+    Args:
+        event (Event): The event.
+    
+    Returns:
+        tuple: Id, name, type, description, file path and JSON pointer of the event.
+    """
+    source = event.source
+    return (event.id, event.name, event.type, event.description,
+            source.file_path if source is not None else None, source.pointer if source is not None else None)
+
+def _event(row):
+    """
+    Create an event from its columns.
+    
+    Args:
+        row (tuple): Id, name, type, description, file path and JSON pointer of the event.
+    
+    Returns:
+        Event: The event, its payload is loaded from the source file on first access.
+    """
+    event_id, name, event_type, description, file_path, pointer = row
+    source = MessageSource(file_path, pointer) if file_path is not None else None
+    return Event(id=event_id, name=name, type=event_type, description=description, source=source)
+
+def _service(connection, row):
+    """
+    Create a service with its events from the snapshot.
+    
+    Args:
+        connection (Connection): The open snapshot.
+        row (tuple): Name, title and description of the service.
+    
+    Returns:
+        Service: The service.
+    """
+    name, title, description = row
+    service = Service(id=name, title=title, description=description)
+    for role, *event_row in connection.execute(
+            "SELECT role, id, name, type, description, file_path, pointer FROM service_events "
+            "WHERE service = ? ORDER BY role, position", (name,)):
+        if role == 'sent':
+            service.add_sent_event(_event(event_row))
+        else:
+            service.add_received_event(_event(event_row))
+    return service
+
+def _file_hash(path):
+    """
+    Hash the content of a file.
+    
+    Args:
+        path (str): Path to the file.
+    
+    Returns:
+        str: The content hash.
+    """
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+def _file_signature(path, file_hashes=None):
+    """
+    Get the modification time, size and content hash of a file.
+    
+    Args:
+        path (str): Path to the file.
+        file_hashes (dict, optional): Content hashes computed by the build manifest, by path.
+    
+    Returns:
+        tuple: Modification time in nanoseconds, size and content hash.
+    """
+    entry = file_hashes.get(path) if file_hashes is not None else None
+    if entry is not None and entry[2] is not None:
+        return entry[2][0], entry[2][1], entry[3]
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size, _file_hash(path)
+
+def _directory_mtime(directory):
+    """
+    Get the modification time of a directory, which changes when a file is added or removed.
+    
+    Args:
+        directory (str): Path to the directory.
+    
+    Returns:
+        int: Modification time in nanoseconds, 0 if the directory doesn't exist.
+    """
+    try:
+        return os.stat(directory).st_mtime_ns
+    except OSError:
+        return 0
+
+def _stat_signature(path):
+    """
+    Get the modification time and size of a file.
+    
+    Args:
+        path (str): Path to the file.
+    
+    Returns:
+        tuple: Modification time in nanoseconds and size, or None if the file doesn't exist.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
@@ -3,23 +3,26 @@ Channel parser module for the photosi-catalog-site-builder.
 Parses channel YAML files into Channel model objects.
 """
 
-import yaml
+import posixpath
 from pathlib import Path
 
 from models.channel import Channel
+from parser.document_cache import DocumentCache
 
 class ChannelParser:
     """Parser for channel files from the AsyncAPI specification."""
     
-    def __init__(self, base_directory):
+    def __init__(self, base_directory, document_cache=None):
         """
         Initialize the channel parser.
         
         Args:
             base_directory (str): Base directory containing the AsyncAPI files.
+            document_cache (DocumentCache, optional): Cache of parsed YAML documents.
         """
         self.base_directory = Path(base_directory)
         self.channels_directory = self.base_directory
+        self.document_cache = document_cache if document_cache is not None else DocumentCache()
         
     def parse(self, channel_ref):
         """
@@ -47,8 +50,7 @@ class ChannelParser:
             raise Exception("Channel file not found")
                 
         # Read and parse the channel file
-        with open(channel_file, 'r', encoding='utf-8') as file:
-            data = yaml.safe_load(file)
+        data = self.document_cache.load(channel_file)
             
         # Extract channel details
         channels_data = data.get('channels', {})
@@ -57,22 +59,61 @@ class ChannelParser:
             
         # Get the first channel in the file
         channel_key = list(channels_data.keys())[0]
-        channel_data = channels_data[channel_key]
+        return self._create_channel(channel_key, channels_data[channel_key], channel_file)
+    
+    def parse_file(self, channel_file):
+        """
+        Parse all the channels of a channel file.
+        
+        Args:
+            channel_file (Path): Path to the channel file.
+        
+        Returns:
+            list: The channels with at least one message, in the order of the file.
+        """
+        data = self.document_cache.load(channel_file)
+        channels = []
+        for channel_key, channel_data in (data.get('channels') or {}).items():
+            if isinstance(channel_data, dict) and channel_data.get('messages'):
+                channels.append(self._create_channel(channel_key, channel_data, channel_file))
+        return channels
+    
+    def _create_channel(self, channel_key, channel_data, channel_file):
+        """
+        Create a channel from its data.
         
+        Args:
+            channel_key (str): Id of the channel.
+            channel_data (dict): Data of the channel in its file.
+            channel_file (Path): Path to the channel file.
         
+        Returns:
+            Channel: The channel, with the refs of all its messages.
+        
+        Raises:
+            Exception: If the channel has no messages.
+        """
         messages = channel_data.get('messages', {})
         if not messages:
             raise Exception("No messages in channel")
         
-        # Get the first message in the file
-        message_key = list(messages.keys())[0]
-        message_data = messages[message_key]
-        
         # Create a Channel object
-        channel = Channel(
+        return Channel(
             id=channel_key,
             address=channel_data.get('address', ''),
-            event_ref=message_data.get('$ref', ''),
+            event_refs=[message_data.get('$ref', '') for message_data in messages.values()],
+            file_path=str(channel_file),
         )
-        
-        return channel
+
+def canonical_channel_ref(channel_ref):
+    """
+    Normalize the ref of a channel used by a service, the key of the channel index.
+    
+    Args:
+        channel_ref (str): Ref relative to the services directory, e.g. '../channels/orders/./file.yaml#/channels/id'.
+    
+    Returns:
+        str: The ref with a normalized path, e.g. '../channels/orders/file.yaml#/channels/id'.
+    """
+    relative_path, _, pointer = channel_ref.partition('#')
+    return f"../{posixpath.normpath(posixpath.join('services', relative_path))}#{pointer}"
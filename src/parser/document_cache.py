@@ -0,0 +1,432 @@
+"""
+Document cache module for the photosi-catalog-site-builder.
+Keeps parsed YAML documents in memory so that every file is loaded only once per build.
+"""
+
+import os
+import yaml
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import repeat
+
+from parser.message_headers import UnsupportedHeaders, message_headers, read_message_headers
+
+class DocumentCache:
+    """Bounded LRU cache of parsed YAML documents shared by all parsers."""
+    
+    def __init__(self, max_entries=16384, parse_cache=None):
+        """
+        Initialize the document cache.
+        
+        Args:
+            max_entries (int): Maximum number of documents kept in memory.
+            parse_cache (ParseCache, optional): On-disk cache consulted before parsing with PyYAML.
+        """
+        self.max_entries = max_entries
+        self.parse_cache = parse_cache
+        self.hits = 0
+        self.misses = 0
+        
+        # Number of times every file was parsed, by canonical path
+        self.parse_counts = {}
+        
+        # Number of message files whose headers were read without loading the document
+        self.header_scans = 0
+        
+        self._entries = OrderedDict()
+        
+        # Canonical path -> (signature, message headers) of the files read with load_headers
+        self._headers = {}
+        self._trackers = []
+        
+        # Canonical path of every path seen, resolving symlinks costs a system call per component
+        self._real_paths = {}
+    
+    def load(self, file_path):
+        """
+        Load a YAML document, reusing the cached copy if the file is unchanged.
+        
+        The cache is keyed by the canonical file path and an entry is valid
+        only while the file keeps the same modification time and size.
+        The returned document is shared and must not be modified by callers.
+        
+        Args:
+            file_path (str): Path to the YAML file.
+        
+        Returns:
+            object: The parsed YAML document.
+        
+        Raises:
+            FileNotFoundError: If the file doesn't exist.
+        """
+        key = self.canonical_path(file_path)
+        for tracker in self._trackers:
+            tracker.add(key)
+        stat = os.stat(key)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == signature:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        
+        self.misses += 1
+        self.parse_counts[key] = self.parse_counts.get(key, 0) + 1
+        if self.parse_cache is not None:
+            with open(key, 'rb') as file:
+                data = self.parse_cache.load(file.read())
+        else:
+            with open(key, 'r', encoding='utf-8') as file:
+                data = yaml.safe_load(file)
+        
+        self._store(key, signature, data)
+        return data
+    
+    def load_headers(self, file_path):
+        """
+        Get the title and description of the messages of a message file.
+        
+        The headers are read from the YAML event stream, so the payload schemas and
+        examples are never built, unless the document is already cached or uses
+        YAML features the stream reader doesn't resolve, such as merge keys.
+        With a parse cache, the headers of unchanged content are not read again.
+        
+        Args:
+            file_path (str): Path to the YAML file.
+        
+        Returns:
+            dict: Header fields of every message, by container id.
+        
+        Raises:
+            FileNotFoundError: If the file doesn't exist.
+        """
+        key = self.canonical_path(file_path)
+        for tracker in self._trackers:
+            tracker.add(key)
+        stat = os.stat(key)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == signature:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return message_headers(entry[1])
+        
+        entry = self._headers.get(key)
+        if entry is not None and entry[0] == signature:
+            self.hits += 1
+            return entry[1]
+        
+        try:
+            if self.parse_cache is not None:
+                with open(key, 'rb') as file:
+                    headers = self.parse_cache.load_headers(file.read())
+            else:
+                with open(key, 'rb') as file:
+                    headers = read_message_headers(file)
+        except UnsupportedHeaders:
+            return message_headers(self.load(key))
+        self.header_scans += 1
+        self._headers[key] = (signature, headers)
+        return headers
+    
+    def canonical_path(self, file_path):
+        """
+        Get the canonical path of a file, the key of its cache entry.
+        
+        Args:
+            file_path (str): Path to the file.
+        
+        Returns:
+            str: The path with symlinks resolved.
+        """
+        path = os.fspath(file_path)
+        real_path = self._real_paths.get(path)
+        if real_path is None:
+            real_path = self._real_paths[path] = os.path.realpath(path)
+        return real_path
+    
+    def _store(self, key, signature, data):
+        """
+        Store a parsed document, evicting the least recently used ones if needed.
+        
+        Args:
+            key (str): Canonical path of the file.
+            signature (tuple): Modification time and size of the file.
+            data (object): The parsed YAML document.
+        """
+        self._entries[key] = (signature, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def preload(self, file_paths, jobs=1, batch_size=64, executor=None):
+        """
+        Load many documents at once, in a pool of worker processes if jobs > 1.
+        
+        Files are parsed in batches and the results are merged in the order of
+        file_paths. A file that cannot be parsed doesn't interrupt the others:
+        its error is collected and returned.
+        
+        Args:
+            file_paths (list): Paths to the YAML files.
+            jobs (int): Number of worker processes.
+            batch_size (int): Number of files parsed by a worker per task.
+            executor (ProcessPoolExecutor, optional): Pool to use instead of starting a new one.
+        
+        Returns:
+            dict: Error messages by canonical path of the files that could not be loaded.
+        """
+        errors = {}
+        if jobs <= 1:
+            for file_path in file_paths:
+                try:
+                    self.load(file_path)
+                except Exception as e:
+                    errors[self.canonical_path(file_path)] = str(e)
+            return errors
+        
+        # Documents already cached and unchanged are not sent to the workers
+        keys = []
+        for file_path in file_paths:
+            key = self.canonical_path(file_path)
+            if self._is_fresh(key):
+                self.hits += 1
+            else:
+                keys.append(key)
+        
+        batches = [keys[i:i + batch_size] for i in range(0, len(keys), batch_size)]
+        with _pool(jobs, executor) as pool:
+            for results in pool.map(_load_batch, batches, repeat(self.parse_cache)):
+                for key, signature, data, error in results:
+                    if error is not None:
+                        errors[key] = error
+                    else:
+                        self.misses += 1
+                        self.parse_counts[key] = self.parse_counts.get(key, 0) + 1
+                        self._store(key, signature, data)
+        
+        return errors
+    
+    def preload_headers(self, file_paths, jobs=1, batch_size=64, executor=None):
+        """
+        Read the message headers of many files at once, in a pool of worker processes if jobs > 1.
+        
+        The workers read the headers like load_headers and the results are stored
+        as if load_headers had been called for every file. A file that cannot be
+        read doesn't interrupt the others: its error is collected and returned.
+        
+        Args:
+            file_paths (list): Paths to the message files.
+            jobs (int): Number of worker processes.
+            batch_size (int): Number of files read by a worker per task.
+            executor (ProcessPoolExecutor, optional): Pool to use instead of starting a new one.
+        
+        Returns:
+            dict: Error messages by canonical path of the files that could not be read.
+        """
+        errors = {}
+        if jobs <= 1:
+            for file_path in file_paths:
+                try:
+                    self.load_headers(file_path)
+                except Exception as e:
+                    errors[self.canonical_path(file_path)] = str(e)
+            return errors
+        
+        # Headers already read, or documents already cached, are not sent to the workers
+        keys = []
+        for file_path in file_paths:
+            key = self.canonical_path(file_path)
+            if self._is_fresh(key) or self._has_fresh_headers(key):
+                self.hits += 1
+            else:
+                keys.append(key)
+        
+        batches = [keys[i:i + batch_size] for i in range(0, len(keys), batch_size)]
+        with _pool(jobs, executor) as pool:
+            for results in pool.map(_load_headers_batch, batches, repeat(self.parse_cache)):
+                for key, signature, headers, parsed, error in results:
+                    if error is not None:
+                        errors[key] = error
+                        continue
+                    if parsed:
+                        # The worker had to load the whole document
+                        self.misses += 1
+                        self.parse_counts[key] = self.parse_counts.get(key, 0) + 1
+                    else:
+                        self.header_scans += 1
+                    self._headers[key] = (signature, headers)
+        
+        return errors
+    
+    def _is_fresh(self, key):
+        """
+        Check whether a document is cached and its file is unchanged.
+        
+        Args:
+            key (str): Canonical path of the file.
+        
+        Returns:
+            bool: True if the cached document can be used.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(key)
+        except OSError:
+            return False
+        return entry[0] == (stat.st_mtime_ns, stat.st_size)
+    
+    def _has_fresh_headers(self, key):
+        """
+        Check whether the headers of a message file are cached and the file is unchanged.
+        
+        Args:
+            key (str): Canonical path of the file.
+        
+        Returns:
+            bool: True if the cached headers can be used.
+        """
+        entry = self._headers.get(key)
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(key)
+        except OSError:
+            return False
+        return entry[0] == (stat.st_mtime_ns, stat.st_size)
+    
+    def track_file(self, file_path):
+        """
+        Record a file in the tracking blocks without loading it.
+        
+        Used for results taken from an index built from the file, e.g. a channel
+        looked up by its ref, so the output still depends on the file.
+        
+        Args:
+            file_path (str): Path to the file.
+        """
+        if self._trackers:
+            key = self.canonical_path(file_path)
+            for tracker in self._trackers:
+                tracker.add(key)
+    
+    @contextmanager
+    def track(self):
+        """
+        Record the files loaded while a block runs.
+        
+        Used to find out which input files an output depends on.
+        
+        Yields:
+            set: Canonical paths of the files loaded inside the block.
+        """
+        loaded = set()
+        self._trackers.append(loaded)
+        try:
+            yield loaded
+        finally:
+            self._trackers.pop()
+        
+    def invalidate(self, file_path):
+        """
+        Drop a document from the cache.
+        
+        Args:
+            file_path (str): Path to the YAML file.
+        """
+        key = self.canonical_path(file_path)
+        self._entries.pop(key, None)
+        self._headers.pop(key, None)
+    
+    def clear(self):
+        """Drop every cached document and reset the counters."""
+        self._entries.clear()
+        self._headers.clear()
+        self._real_paths.clear()
+        self.hits = 0
+        self.misses = 0
+        self.header_scans = 0
+        self.parse_counts.clear()
+    
+    def stats(self):
+        """
+        Get the cache counters.
+        
+        Returns:
+            dict: Number of hits, misses and cached entries.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._entries),
+        }
+    
+    def __len__(self):
+        return len(self._entries)
+
+def _load_batch(keys, parse_cache):
+    """
+    Parse a batch of YAML files in a worker process.
+    
+    Args:
+        keys (list): Canonical paths of the files.
+        parse_cache (ParseCache): On-disk cache to use, or None.
+    
+    Returns:
+        list: Tuples (key, signature, data, error) in the order of keys.
+    """
+    cache = DocumentCache(parse_cache=parse_cache)
+    results = []
+    for key in keys:
+        try:
+            data = cache.load(key)
+            results.append((key, cache._entries[key][0], data, None))
+        except Exception as e:
+            results.append((key, None, None, str(e)))
+    return results
+
+def _load_headers_batch(keys, parse_cache):
+    """
+    Read the message headers of a batch of files in a worker process.
+    
+    Args:
+        keys (list): Canonical paths of the files.
+        parse_cache (ParseCache): On-disk cache to use, or None.
+    
+    Returns:
+        list: Tuples (key, signature, headers, parsed, error) in the order of keys, parsed is
+            True if the whole document had to be loaded.
+    """
+    cache = DocumentCache(parse_cache=parse_cache)
+    results = []
+    for key in keys:
+        try:
+            headers = cache.load_headers(key)
+            signature, _ = cache._headers.get(key) or cache._entries[key]
+            results.append((key, signature, headers, key in cache._entries, None))
+        except Exception as e:
+            results.append((key, None, None, False, str(e)))
+    return results
+
+@contextmanager
+def _pool(jobs, executor=None):
+    """
+    Get a pool of worker processes, starting one if none is given.
+    
+    Args:
+        jobs (int): Number of worker processes of a new pool.
+        executor (ProcessPoolExecutor, optional): Pool to reuse, it is not shut down.
+    
+    Yields:
+        ProcessPoolExecutor: The pool.
+    """
+    if executor is not None:
+        yield executor
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield executor
@@ -3,22 +3,85 @@ Event parser module for the photosi-catalog-site-builder.
 Parses event YAML files into Event model objects.
 """
 
-import yaml
 from pathlib import Path
 
 from models.event import Event
+from parser.document_cache import DocumentCache
+
+class MessageSource:
+    """
+    Location of a message in a YAML file, a file path and a JSON pointer.
+    
+    The handle is small and can be sent to the render worker processes: the
+    document cache it loads the message with is not pickled with it.
+    """
+    
+    __slots__ = ('file_path', 'pointer', 'document_cache')
+    
+    def __init__(self, file_path, pointer, document_cache=None):
+        """
+        Initialize a message source.
+        
+        Args:
+            file_path (str): Path to the YAML file.
+            pointer (str): JSON pointer of the message, e.g. '/components/messages/ordercreated'.
+            document_cache (DocumentCache, optional): Cache the file is loaded with.
+        """
+        self.file_path = str(file_path)
+        self.pointer = pointer
+        self.document_cache = document_cache
+    
+    def __getstate__(self):
+        return self.file_path, self.pointer
+    
+    def __setstate__(self, state):
+        self.file_path, self.pointer = state
+        self.document_cache = None
+    
+    @property
+    def container_id(self):
+        """
+        Get the id of the message in components.messages, or None if the pointer points elsewhere.
+        
+        Returns:
+            str: The container id.
+        """
+        tokens = [token.replace('~1', '/').replace('~0', '~') for token in self.pointer.split('/')[1:]]
+        if len(tokens) == 3 and tokens[:2] == ['components', 'messages']:
+            return tokens[2]
+        return None
+    
+    def load(self):
+        """
+        Load the message.
+        
+        Returns:
+            dict: The message, shared with the document cache, it must not be modified.
+        
+        Raises:
+            KeyError: If the pointer doesn't point to a message in the file.
+        """
+        if self.document_cache is None:
+            self.document_cache = DocumentCache()
+        
+        value = self.document_cache.load(self.file_path)
+        for token in self.pointer.split('/')[1:]:
+            value = value[token.replace('~1', '/').replace('~0', '~')]
+        return value
 
 class EventParser:
     """Parser for event files from the AsyncAPI specification."""
     
-    def __init__(self, base_directory):
+    def __init__(self, base_directory, document_cache=None):
         """
         Initialize the event parser.
         
         Args:
             base_directory (str): Base directory containing the AsyncAPI files.
+            document_cache (DocumentCache, optional): Cache of parsed YAML documents.
         """
         self.base_directory = Path(base_directory)
+        self.document_cache = document_cache if document_cache is not None else DocumentCache()
         
     # TODO: this must be reviewed
     def list_all_events(self):
@@ -41,15 +104,12 @@ class EventParser:
                     if directory.is_dir():
                         for yaml_file in directory.glob("*.yaml"):
                             try:
-                                with open(yaml_file, 'r', encoding='utf-8') as f:
-                                    data = yaml.safe_load(f)
-                                    if 'components' in data and 'messages' in data['components']:
-                                        # Get all messages in the file
-                                        for msg_key, msg_data in data['components']['messages'].items():
-                                            if 'title' in msg_data:
-                                                # Use the title directly - it should already be in Directory:Topic format
-                                                event_name = msg_data['title']
-                                                all_events.append((event_type, event_name))
+                                # Get all messages in the file
+                                for msg_data in self.document_cache.load_headers(yaml_file).values():
+                                    if 'title' in msg_data:
+                                        # Use the title directly - it should already be in Directory:Topic format
+                                        event_name = msg_data['title']
+                                        all_events.append((event_type, event_name))
                             except Exception as e:
                                 print(f"Error parsing {yaml_file}: {e}")
         
@@ -70,7 +130,7 @@ class EventParser:
             raise Exception(f"Invalid event_id'")
         
         # Find the event file containing the specified title
-        event_relative_file = event_id.split('#')[0]
+        event_relative_file, _, pointer = event_id.partition('#')
         event_file = self.base_directory / event_relative_file[6:]
         
         if not event_file:
@@ -80,18 +140,22 @@ class EventParser:
         event_name = event_id.split('/')[-1]
         event_type = event_id.split('/')[3]
         
+        source = MessageSource(event_file, pointer, self.document_cache)
         try:
-            with open(event_file, 'r', encoding='utf-8') as file:
-                data = yaml.safe_load(file)
+            # Only the headers of the messages are read, not their payload
+            headers = self.document_cache.load_headers(event_file)
                 
             description = ""
             
-            # Extract information from the file
-            if 'components' in data and 'messages' in data['components']:
-                for _, msg_data in data['components']['messages'].items():
-                    event_name = msg_data.get('title')
-                    description = msg_data.get('description', '')
-                    break
+            # Extract information from the message the ref points to, a file may contain several
+            container_id = source.container_id
+            if container_id is not None:
+                msg_data = headers.get(container_id)
+            else:
+                msg_data = next(iter(headers.values()), None)
+            if msg_data is not None:
+                event_name = msg_data.get('title')
+                description = msg_data.get('description', '')
                 
         except Exception as e:
             raise Exception(f"Error parsing event file {event_file}: {e}")
@@ -102,6 +166,7 @@ class EventParser:
             name=event_name,  # Name is already in Directory:Topic format
             type=event_type,
             description=description,
+            source=source,
         )
         
         return event
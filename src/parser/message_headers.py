@@ -0,0 +1,172 @@
+"""
+Message headers module for the photosi-catalog-site-builder.
+Reads the title and description of the messages of an AsyncAPI file from the YAML
+event stream, without building the document and its payload schemas.
+"""
+
+import yaml
+from yaml.resolver import Resolver
+
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+
+# Fields of a message read by the catalog index
+HEADER_FIELDS = ('title', 'description')
+
+# Tag of the YAML scalars that load as strings
+STRING_TAG = 'tag:yaml.org,2002:str'
+
+_resolver = Resolver()
+
+class UnsupportedHeaders(Exception):
+    """The headers use YAML features the event stream is not resolved for, the document must be loaded."""
+
+def read_message_headers(stream):
+    """
+    Read the title and description of every message of an AsyncAPI message file.
+    
+    Only the events of components.messages are inspected: the other values, such
+    as payload schemas and examples, are skipped without being built, and the
+    stream is not read past the end of the messages.
+    
+    Args:
+        stream (file): The YAML file, or its content.
+    
+    Returns:
+        dict: Header fields of every message, by container id, in the order of the file.
+    
+    Raises:
+        UnsupportedHeaders: If the headers are aliases, merged or not strings, or a key is not a string.
+        yaml.YAMLError: If the file is not valid YAML.
+    """
+    events = yaml.parse(stream, Loader=_Loader)
+    try:
+        _expect(events, yaml.StreamStartEvent)
+        _expect(events, yaml.DocumentStartEvent)
+        _expect(events, yaml.MappingStartEvent)
+        if not _find_key(events, 'components'):
+            return {}
+        _expect(events, yaml.MappingStartEvent)
+        if not _find_key(events, 'messages'):
+            return {}
+        _expect(events, yaml.MappingStartEvent)
+        
+        headers = {}
+        for container_id in _keys(events):
+            _expect(events, yaml.MappingStartEvent)
+            fields = headers[container_id] = {}
+            for key in _keys(events):
+                if key in HEADER_FIELDS:
+                    fields[key] = _string(next(events))
+                else:
+                    _skip(events)
+        return headers
+    finally:
+        events.close()
+
+def message_headers(data):
+    """
+    Get the title and description of every message of an already loaded message file.
+    
+    Args:
+        data (dict): The YAML document.
+    
+    Returns:
+        dict: Header fields of every message, by container id, in the order of the file.
+    """
+    headers = {}
+    if 'components' in data and 'messages' in data['components']:
+        for container_id, msg_data in data['components']['messages'].items():
+            headers[container_id] = {key: msg_data[key] for key in HEADER_FIELDS if key in msg_data}
+    return headers
+
+def _expect(events, event_class):
+    """
+    Read the next event, which must be of the given class.
+    
+    Args:
+        events (iterator): The YAML events.
+        event_class (type): Expected class of the event.
+    
+    Raises:
+        UnsupportedHeaders: If the event is of another class, or an alias.
+    """
+    event = next(events)
+    if not isinstance(event, event_class):
+        raise UnsupportedHeaders(f"Expected {event_class.__name__}, found {type(event).__name__}")
+
+def _string(event):
+    """
+    Get the value of a scalar event that loads as a string.
+    
+    Args:
+        event (Event): The YAML event.
+    
+    Returns:
+        str: The value.
+    
+    Raises:
+        UnsupportedHeaders: If the event is not a scalar, or would not load as a string.
+    """
+    if not isinstance(event, yaml.ScalarEvent):
+        raise UnsupportedHeaders(f"Expected a string, found {type(event).__name__}")
+    tag = event.tag
+    if tag is None or tag == '!':
+        tag = _resolver.resolve(yaml.ScalarNode, event.value, event.implicit)
+    if tag != STRING_TAG:
+        raise UnsupportedHeaders(f"Expected a string, found {tag}")
+    return event.value
+
+def _keys(events):
+    """
+    Iterate over the keys of a mapping whose start event was read.
+    
+    The caller must read the value of every key before the next one.
+    
+    Args:
+        events (iterator): The YAML events.
+    
+    Yields:
+        str: The keys, until the end of the mapping.
+    """
+    while True:
+        event = next(events)
+        if isinstance(event, yaml.MappingEndEvent):
+            return
+        yield _string(event)
+
+def _find_key(events, name):
+    """
+    Read the events of a mapping up to the value of a key, skipping the other values.
+    
+    Args:
+        events (iterator): The YAML events, after the start of the mapping.
+        name (str): The key.
+    
+    Returns:
+        bool: True if the key was found, False if the mapping ended without it.
+    """
+    for key in _keys(events):
+        if key == name:
+            return True
+        _skip(events)
+    return False
+
+def _skip(events):
+    """
+    Read the events of a value without building it.
+    
+    Args:
+        events (iterator): The YAML events, before the value.
+    """
+    depth = 0
+    while True:
+        event = next(events)
+        if isinstance(event, yaml.CollectionStartEvent):
+            depth += 1
+        elif isinstance(event, yaml.CollectionEndEvent):
+            depth -= 1
+        if depth == 0:
+            return
@@ -0,0 +1,136 @@
+"""
+Parse cache module for the photosi-catalog-site-builder.
+Persists parsed YAML documents on disk so that unchanged files are not parsed again between builds.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+import yaml
+
+from parser.message_headers import read_message_headers
+
+# Bump this whenever the parsed representation changes, so old entries are ignored
+PARSE_CACHE_VERSION = 1
+
+class ParseCache:
+    """On-disk cache of parsed YAML documents keyed by content hash."""
+    
+    def __init__(self, cache_directory):
+        """
+        Initialize the parse cache.
+        
+        Args:
+            cache_directory (str): Directory where the cache entries are stored.
+        """
+        # Entries written by another cache or PyYAML version live in another directory
+        self.cache_directory = Path(cache_directory) / f"v{PARSE_CACHE_VERSION}-pyyaml{yaml.__version__}"
+        os.makedirs(self.cache_directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+    
+    def _entry_path(self, digest, kind=''):
+        """
+        Get the path of the cache entry for a content hash.
+        
+        Args:
+            digest (str): Hexadecimal content hash.
+            kind (str): Suffix of the entries that are not the whole document, e.g. '.headers'.
+        
+        Returns:
+            Path: Path of the cache entry.
+        """
+        return self.cache_directory / digest[:2] / f"{digest}{kind}.pickle"
+    
+    def load(self, content):
+        """
+        Parse YAML content, reusing the stored result if the same content was parsed before.
+        
+        Args:
+            content (bytes): Raw content of the YAML file.
+        
+        Returns:
+            object: The parsed YAML document.
+        """
+        digest = hashlib.blake2b(content, digest_size=20).hexdigest()
+        entry_path = self._entry_path(digest)
+        
+        try:
+            with open(entry_path, 'rb') as file:
+                data = pickle.load(file)
+            self.hits += 1
+            return data
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            # Missing or unreadable entry: parse the YAML again
+            pass
+        
+        self.misses += 1
+        data = yaml.safe_load(content.decode('utf-8'))
+        self._store(entry_path, data)
+        return data
+    
+    def load_headers(self, content):
+        """
+        Read the message headers of YAML content, reusing the stored result if the same content was read before.
+        
+        Args:
+            content (bytes): Raw content of the YAML message file.
+        
+        Returns:
+            dict: Header fields of every message, by container id.
+        
+        Raises:
+            UnsupportedHeaders: If the headers can't be read from the event stream, the
+                document must be loaded.
+        """
+        digest = hashlib.blake2b(content, digest_size=20).hexdigest()
+        entry_path = self._entry_path(digest, '.headers')
+        
+        try:
+            with open(entry_path, 'rb') as file:
+                headers = pickle.load(file)
+            self.hits += 1
+            return headers
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            # Missing or unreadable entry: read the headers again
+            pass
+        
+        self.misses += 1
+        headers = read_message_headers(content)
+        self._store(entry_path, headers)
+        return headers
+    
+    def _store(self, entry_path, data):
+        """
+        Write a cache entry atomically.
+        
+        Args:
+            entry_path (Path): Path of the cache entry.
+            data (object): Parsed YAML document.
+        """
+        os.makedirs(entry_path.parent, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=entry_path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, entry_path)
+        except OSError as e:
+            # The cache is an optimisation only, a failed write must not break the build
+            print(f"Warning: could not write parse cache entry {entry_path}: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    def stats(self):
+        """
+        Get the cache counters.
+        
+        Returns:
+            dict: Number of hits and misses.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -3,36 +3,45 @@ Service parser module for the photosi-catalog-site-builder.
 Parses service YAML files into Service model objects.
 """
 
-import yaml
 from pathlib import Path
 
 from models.service import Service
 from models.event import Event
 
-from parser.channel_parser import ChannelParser
+from parser.channel_parser import ChannelParser, canonical_channel_ref
+from parser.document_cache import DocumentCache
 from parser.event_parser import EventParser
 
 class ServiceParser:
     """Parser for service files from the AsyncAPI specification."""
     
-    def __init__(self, base_directory):
+    def __init__(self, base_directory, document_cache=None):
         """
         Initialize the service parser.
         
         Args:
             base_directory (str): Base directory containing the AsyncAPI files.
+            document_cache (DocumentCache, optional): Cache of parsed YAML documents,
+                shared with the channel and event parsers.
         """
         self.base_directory = Path(base_directory)
         self.services_directory = self.base_directory / "services"
-        self.cahnnel_parser = ChannelParser(base_directory)
-        self.event_parser = EventParser(base_directory)
+        self.document_cache = document_cache if document_cache is not None else DocumentCache()
+        self.cahnnel_parser = ChannelParser(base_directory, self.document_cache)
+        self.event_parser = EventParser(base_directory, self.document_cache)
         
-    def parse(self, service_name):
+    def parse(self, service_name, channels=None, events=None):
         """
         Parse a service file into a Service object.
         
+        A channel and its events are taken from the indexes when given, with a
+        dictionary lookup; the ones not indexed are parsed from their files.
+        An operation sends or receives every message of its channel.
+        
         Args:
             service_name (str): Name of the service to parse.
+            channels (dict, optional): Parsed channels by canonical ref, see canonical_channel_ref.
+            events (dict, optional): Parsed events by AsyncAPI ref.
             
         Returns:
             Service: The parsed service object.
@@ -45,8 +54,7 @@ class ServiceParser:
         if not service_file.exists():
             raise FileNotFoundError(f"Service file not found: {service_file}")
         
-        with open(service_file, 'r', encoding='utf-8') as file:
-            data = yaml.safe_load(file)
+        data = self.document_cache.load(service_file)
             
         # Create a Service object from the file
         service = Service(
@@ -65,16 +73,26 @@ class ServiceParser:
             channel_ref = op_data.get('channel', {}).get('$ref', '')
             
             # Extract the event type and name from the channel reference
-            channel = self.cahnnel_parser.parse(channel_ref)
-                        
-            # Create an Event object
-            event = self.event_parser.parse(channel.event_ref)
+            channel = channels.get(canonical_channel_ref(channel_ref)) if channels and channel_ref else None
+            if channel is None:
+                channel = self.cahnnel_parser.parse(channel_ref)
+            else:
+                # The service still depends on the file of the indexed channel
+                self.document_cache.track_file(channel.file_path)
             
-            # Add the event to the service
-            if action == 'receive':
-                service.add_received_event(event)
-            elif action == 'send':
-                service.add_sent_event(event)
+            for event_ref in channel.event_refs:
+                # Create an Event object
+                event = events.get(event_ref) if events else None
+                if event is None:
+                    event = self.event_parser.parse(event_ref)
+                elif event.source is not None:
+                    self.document_cache.track_file(event.source.file_path)
+                
+                # Add the event to the service
+                if action == 'receive':
+                    service.add_received_event(event)
+                elif action == 'send':
+                    service.add_sent_event(event)
                 
         return service
         
@@ -0,0 +1,140 @@
+"""
+Build profile module for the photosi-catalog-site-builder.
+Measures the wall and CPU time, and optionally the peak memory, of every phase of a build.
+"""
+
+import cProfile
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+class BuildProfile:
+    """Timings and counters of the phases of a build."""
+    
+    def __init__(self, trace_memory=False, profile_file=None):
+        """
+        Initialize an empty profile.
+        
+        Args:
+            trace_memory (bool): Whether to measure the peak memory of every phase with tracemalloc.
+            profile_file (str, optional): File where the cProfile statistics of the build are saved.
+        """
+        self.trace_memory = trace_memory
+        self.profile_file = profile_file
+        
+        # Phase name -> [wall seconds, CPU seconds, peak bytes], in the order the phases first ran
+        self.phases = {}
+        
+        # Counters reported with the phases, e.g. the number of events
+        self.counters = {}
+        
+        self._profiler = None
+        self._peak = 0
+    
+    def start(self):
+        """Start tracing the memory and profiling, if enabled."""
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.profile_file:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+    
+    def stop(self):
+        """Stop tracing the memory and profiling, saving the cProfile statistics."""
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.profile_file)
+            self._profiler = None
+        if tracemalloc.is_tracing():
+            self._peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    
+    @contextmanager
+    def phase(self, name):
+        """
+        Measure a phase of the build, the time of a phase that runs several times is summed.
+        
+        The CPU time includes the worker processes that ended during the phase.
+        
+        Args:
+            name (str): Name of the phase.
+        """
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            self._peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        wall_start, cpu_start = time.perf_counter(), _cpu_time()
+        try:
+            yield
+        finally:
+            totals = self.phases.setdefault(name, [0.0, 0.0, 0])
+            totals[0] += time.perf_counter() - wall_start
+            totals[1] += _cpu_time() - cpu_start
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1]
+                totals[2] = max(totals[2], peak)
+                self._peak = max(self._peak, peak)
+    
+    def count(self, name, value):
+        """
+        Set a counter reported with the phases.
+        
+        Args:
+            name (str): Name of the counter.
+            value (int): Value of the counter.
+        """
+        self.counters[name] = value
+    
+    def report(self, document_cache=None, writer=None):
+        """
+        Format the profile of the build.
+        
+        Args:
+            document_cache (DocumentCache, optional): Cache the YAML files were loaded with.
+            writer (OutputWriter, optional): Writer the output files were written with.
+        
+        Returns:
+            str: The report, one line per phase followed by the counters.
+        """
+        lines = [f"{'phase':<20} {'wall (s)':>9} {'cpu (s)':>9}" + (f" {'peak (MB)':>10}" if self.trace_memory else '')]
+        for name, (wall, cpu, peak) in self.phases.items():
+            line = f"{name:<20} {wall:>9.3f} {cpu:>9.3f}"
+            if self.trace_memory:
+                line += f" {peak / 2**20:>10.1f}"
+            lines.append(line)
+        
+        for name, value in self.counters.items():
+            lines.append(f"{name}: {value}")
+        
+        if document_cache is not None:
+            parse_counts = document_cache.parse_counts
+            parses = sum(parse_counts.values())
+            reparsed = sorted((path for path, count in parse_counts.items() if count > 1),
+                              key=lambda path: (-parse_counts[path], path))
+            lines.append(f"YAML files parsed: {len(parse_counts)}, parses: {parses}, "
+                         f"cache hits: {document_cache.hits}, files parsed more than once: {len(reparsed)}, "
+                         f"message headers scanned: {document_cache.header_scans}")
+            for path in reparsed[:10]:
+                lines.append(f"    {parse_counts[path]} x {path}")
+        
+        if writer is not None:
+            lines.append(f"Files written: {writer.files_written}, bytes written: {writer.bytes_written}, "
+                         f"files unchanged: {writer.files_unchanged}")
+        
+        if self.trace_memory:
+            lines.append(f"Peak memory: {self._peak / 2**20:.1f} MB")
+        if self.profile_file:
+            lines.append(f"Profile saved to {self.profile_file}")
+        
+        return '\n'.join(lines)
+
+def _cpu_time():
+    """
+    Get the CPU time of the process and of its ended child processes.
+    
+    Returns:
+        float: User and system seconds.
+    """
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
@@ -3,6 +3,9 @@ Graph utility module for the photosi-catalog-site-builder.
 Provides helper functions for graph operations.
 """
 
+import hashlib
+from collections import OrderedDict
+
 def get_node_type_color(node_type):
     """
     Get a color for a node type.
@@ -56,3 +59,553 @@ def get_edge_type_style(edge_type):
     
     # Return the style for the edge type, or a default style
     return styles.get(edge_type, styles['default'])
+
+# Version of the compact graph data format, checked by static/js/graph-data-loader.js
+COMPACT_GRAPH_VERSION = 1
+
+def compact_graph_data(graph_data):
+    """
+    Convert graph data to the compact, index-referenced format.
+    
+    Every node is stored once as [id, type, payload_id, name, display_name, x, y],
+    and every edge as [source_index, target_index, label] with a trailing 1 if it
+    is animated. Edge ids and payloads are rebuilt by the client loader: the id is
+    "<source>-<target>" and the payload is the one of the non-service endpoint.
+    
+    Args:
+        graph_data (dict): Dictionary with nodes and edges for graph visualization.
+    
+    Returns:
+        dict: The graph data in the compact format.
+    """
+    nodes = []
+    node_indexes = {}
+    for node in graph_data['nodes']:
+        payload = node['data']['service'] if node['type'] == 'services' else node['data']['message']
+        node_indexes[node['id']] = len(nodes)
+        nodes.append([
+            node['id'],
+            node['type'],
+            payload['id'],
+            payload['data'].get('name'),
+            payload['data'].get('display_name'),
+            node['position']['x'],
+            node['position']['y'],
+        ])
+    
+    edges = []
+    for edge in graph_data['edges']:
+        compact_edge = [node_indexes[edge['source']], node_indexes[edge['target']], edge['label']]
+        if edge.get('animated'):
+            compact_edge.append(1)
+        edges.append(compact_edge)
+    
+    return {
+        'v': COMPACT_GRAPH_VERSION,
+        'n': nodes,
+        'e': edges,
+    }
+
+def expand_graph_data(compact_data):
+    """
+    Convert graph data in the compact format back to the full format.
+    
+    This mirrors expandGraphData in static/js/graph-data-loader.js.
+    
+    Args:
+        compact_data (dict): The graph data in the compact format.
+    
+    Returns:
+        dict: Dictionary with nodes and edges for graph visualization.
+    """
+    nodes = []
+    for node_id, node_type, payload_id, name, display_name, x, y in compact_data['n']:
+        payload_data = {'id': payload_id, 'name': name}
+        if display_name is not None:
+            payload_data['display_name'] = display_name
+        payload = {'id': payload_id, 'data': payload_data}
+        if node_type == 'services':
+            data = {'service': payload}
+        else:
+            data = {'mode': 'full', 'message': payload}
+        nodes.append({'id': node_id, 'type': node_type, 'data': data, 'position': {'x': x, 'y': y}})
+    
+    edges = []
+    for compact_edge in compact_data['e']:
+        source, target = nodes[compact_edge[0]], nodes[compact_edge[1]]
+        message_node = target if source['type'] == 'services' else source
+        message = message_node['data'].get('message', {})
+        edges.append({
+            'id': f"{source['id']}-{target['id']}",
+            'source': source['id'],
+            'target': target['id'],
+            'label': compact_edge[2],
+            'animated': len(compact_edge) > 3 and compact_edge[3] == 1,
+            'data': {
+                'message': {
+                    'id': message.get('id'),
+                    'data': {
+                        'id': message.get('id'),
+                        'name': message.get('data', {}).get('name'),
+                    }
+                }
+            }
+        })
+    
+    return {
+        'nodes': nodes,
+        'edges': edges
+    }
+
+# Prefixes removed from event ids used as display names
+_EVENT_ID_PREFIXES = ('message', 'request', 'command')
+
+class GraphBuilder:
+    """
+    Builder of the graph data of a page, with nodes and edges indexed by id.
+    
+    Adding a node or an edge that already exists is a no-op, so a graph is built
+    in linear time, and the payload of a service or event is created once and
+    shared by its node and edges.
+    """
+    
+    def __init__(self, display_names=False):
+        """
+        Initialize an empty graph.
+        
+        Args:
+            display_names (bool): Whether event nodes carry the display name shown in the graph.
+        """
+        self.display_names = display_names
+        self.nodes = {}
+        self.edges = {}
+        self._event_payloads = {}
+    
+    def add_service(self, service):
+        """
+        Add the node of a service.
+        
+        Args:
+            service (Service): The service.
+        
+        Returns:
+            str: Id of the node.
+        """
+        node_id = f"{service.id}"
+        if node_id not in self.nodes:
+            self.nodes[node_id] = {
+                'id': node_id,
+                'type': 'services',
+                'data': {
+                    'service': {
+                        'id': service.id,
+                        'data': {
+                            'id': service.id,
+                            'name': service.title,
+                        }
+                    }
+                }
+            }
+        return node_id
+    
+    def add_event(self, event):
+        """
+        Add the node of an event.
+        
+        Args:
+            event (Event): The event.
+        
+        Returns:
+            str: Id of the node.
+        """
+        node_id = f"{event.id}-{event.type}"
+        if node_id not in self.nodes:
+            payload_data = {
+                'id': event.id,
+                'name': event.name,
+            }
+            if self.display_names:
+                payload_data['display_name'] = _display_name(event)
+            self.nodes[node_id] = {
+                'id': node_id,
+                'type': event.type + 's',  # pluralize the type
+                'data': {
+                    'mode': 'full',
+                    'message': {
+                        'id': event.id,
+                        'data': payload_data,
+                    }
+                }
+            }
+        return node_id
+    
+    def add_edge(self, source, target, label, event):
+        """
+        Add an edge between two nodes already added.
+        
+        Args:
+            source (str): Id of the source node.
+            target (str): Id of the target node.
+            label (str): Label of the edge, e.g. 'publishes'.
+            event (Event): The event the edge carries.
+        """
+        edge_id = f"{source}-{target}"
+        if edge_id in self.edges:
+            return
+        
+        payload = self._event_payloads.get(event.id)
+        if payload is None:
+            payload = self._event_payloads[event.id] = {
+                'id': event.id,
+                'data': {
+                    'id': event.id,
+                    'name': event.name,
+                }
+            }
+        self.edges[edge_id] = {
+            'id': edge_id,
+            'source': source,
+            'target': target,
+            'label': label,
+            'animated': False,
+            'data': {
+                'message': payload
+            }
+        }
+    
+    def build(self):
+        """
+        Get the graph data, with the nodes laid out.
+        
+        Returns:
+            dict: Dictionary with nodes and edges for graph visualization.
+        """
+        return apply_layered_layout({
+            'nodes': list(self.nodes.values()),
+            'edges': list(self.edges.values())
+        })
+
+def _display_name(event):
+    """
+    Get the name of an event shown in the graph.
+    
+    Args:
+        event (Event): The event.
+    
+    Returns:
+        str: The name of the event, or its id without the type prefix if it has no proper name.
+    """
+    if event.name != event.id:
+        return event.name
+    
+    for prefix in _EVENT_ID_PREFIXES:
+        if event.id.lower().startswith(prefix):
+            return event.id[len(prefix):]
+    return event.id
+
+# Horizontal distance between the layers and vertical distance between the nodes of a layer
+LAYER_SPACING = 360
+NODE_SPACING = 80
+
+# Number of layouts kept in memory, graphs with the same structure share one
+LAYOUT_CACHE_SIZE = 1024
+
+# Number of barycenter sweeps of the crossing minimisation and of the coordinate assignment
+ORDERING_SWEEPS = 8
+COORDINATE_SWEEPS = 8
+
+_layout_cache = OrderedDict()
+
+def layered_layout(node_ids, edges, layer_spacing=LAYER_SPACING, node_spacing=NODE_SPACING):
+    """
+    Lay out a directed graph in layers, from left to right.
+    
+    This is a Sugiyama-style layout: cycles are broken by reversing back edges,
+    nodes are assigned to layers by longest path, edges spanning several layers
+    are split by dummy nodes, the order of the nodes in every layer is chosen by
+    barycenter sweeps to reduce edge crossings, and every node is finally moved
+    as close as possible to its neighbours while keeping the layer order.
+    
+    The positions only depend on the structure of the graph, so they are cached
+    by its hash and graphs with the same shape share the layout.
+    
+    Args:
+        node_ids (list): Ids of the nodes, their order is the initial order in the layers.
+        edges (list): Edges as (source_id, target_id), edges to unknown nodes are ignored.
+        layer_spacing (int): Horizontal distance between the layers.
+        node_spacing (int): Vertical distance between the nodes of a layer.
+    
+    Returns:
+        dict: Position of every node by id, as {'x': x, 'y': y} with the top left node at (0, 0).
+    """
+    node_indexes = {}
+    for node_id in node_ids:
+        node_indexes.setdefault(node_id, len(node_indexes))
+    
+    index_edges = set()
+    for source, target in edges:
+        source_index, target_index = node_indexes.get(source), node_indexes.get(target)
+        if source_index is not None and target_index is not None and source_index != target_index:
+            index_edges.add((source_index, target_index))
+    index_edges = sorted(index_edges)
+    
+    structure = repr((len(node_indexes), index_edges, layer_spacing, node_spacing)).encode()
+    key = hashlib.blake2b(structure, digest_size=16).digest()
+    positions = _layout_cache.get(key)
+    if positions is None:
+        positions = _compute_layout(len(node_indexes), index_edges, layer_spacing, node_spacing)
+        _layout_cache[key] = positions
+        if len(_layout_cache) > LAYOUT_CACHE_SIZE:
+            _layout_cache.popitem(last=False)
+    else:
+        _layout_cache.move_to_end(key)
+    
+    return {node_id: {'x': positions[index][0], 'y': positions[index][1]}
+            for node_id, index in node_indexes.items()}
+
+def apply_layered_layout(graph_data):
+    """
+    Set the position of every node of graph data with the layered layout.
+    
+    Args:
+        graph_data (dict): Dictionary with nodes and edges for graph visualization.
+    
+    Returns:
+        dict: The same graph data, with the positions set.
+    """
+    positions = layered_layout(
+        [node['id'] for node in graph_data['nodes']],
+        [(edge['source'], edge['target']) for edge in graph_data['edges']]
+    )
+    for node in graph_data['nodes']:
+        node['position'] = positions[node['id']]
+    return graph_data
+
+def _compute_layout(num_nodes, edges, layer_spacing, node_spacing):
+    """
+    Compute the layered layout of a graph given by node indexes.
+    
+    Args:
+        num_nodes (int): Number of nodes.
+        edges (list): Sorted edges as (source_index, target_index), without self loops.
+        layer_spacing (int): Horizontal distance between the layers.
+        node_spacing (int): Vertical distance between the nodes of a layer.
+    
+    Returns:
+        list: Position of every node as (x, y).
+    """
+    if num_nodes == 0:
+        return []
+    
+    successors = [[] for _ in range(num_nodes)]
+    for source, target in edges:
+        successors[source].append(target)
+    
+    # Break the cycles, reversing the edges that go back to a node being visited
+    state = [0] * num_nodes  # 0 not visited, 1 being visited, 2 done
+    dag_edges = set()
+    for root in range(num_nodes):
+        if state[root]:
+            continue
+        state[root] = 1
+        stack = [(root, iter(successors[root]))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if state[child] == 1:
+                    dag_edges.add((child, node))
+                else:
+                    dag_edges.add((node, child))
+                    if state[child] == 0:
+                        state[child] = 1
+                        stack.append((child, iter(successors[child])))
+                        break
+            else:
+                state[node] = 2
+                stack.pop()
+    
+    dag_successors = [[] for _ in range(num_nodes)]
+    dag_predecessors = [[] for _ in range(num_nodes)]
+    for source, target in sorted(dag_edges):
+        dag_successors[source].append(target)
+        dag_predecessors[target].append(source)
+    
+    # Longest path layering in topological order
+    layer = [0] * num_nodes
+    in_degree = [len(predecessors) for predecessors in dag_predecessors]
+    queue = [node for node in range(num_nodes) if in_degree[node] == 0]
+    topological_order = []
+    while queue:
+        node = queue.pop()
+        topological_order.append(node)
+        for child in dag_successors[node]:
+            layer[child] = max(layer[child], layer[node] + 1)
+            in_degree[child] -= 1
+            if in_degree[child] == 0:
+                queue.append(child)
+    
+    # Move the sources next to their closest successor, so they don't all stack in the first layer
+    for node in reversed(topological_order):
+        if not dag_predecessors[node] and dag_successors[node]:
+            layer[node] = min(layer[child] for child in dag_successors[node]) - 1
+    
+    # Split the edges spanning several layers with dummy nodes
+    layer_of = list(layer)
+    upper = [[] for _ in range(num_nodes)]
+    lower = [[] for _ in range(num_nodes)]
+    for source, target in sorted(dag_edges):
+        previous = source
+        for dummy_layer in range(layer_of[source] + 1, layer_of[target]):
+            dummy = len(layer_of)
+            layer_of.append(dummy_layer)
+            upper.append([previous])
+            lower.append([])
+            lower[previous].append(dummy)
+            previous = dummy
+        lower[previous].append(target)
+        upper[target].append(previous)
+    
+    num_layers = max(layer_of) + 1
+    layers = [[] for _ in range(num_layers)]
+    for node, node_layer in enumerate(layer_of):
+        layers[node_layer].append(node)
+    
+    # Reduce the crossings with barycenter sweeps, keeping the best order found
+    rank = [0] * len(layer_of)
+    for nodes in layers:
+        for index, node in enumerate(nodes):
+            rank[node] = index
+    
+    best_layers = [list(nodes) for nodes in layers]
+    best_crossings = _count_crossings(layers, lower, rank)
+    for sweep in range(ORDERING_SWEEPS):
+        if best_crossings == 0:
+            break
+        if sweep % 2 == 0:
+            layer_range, neighbours = range(1, num_layers), upper
+        else:
+            layer_range, neighbours = range(num_layers - 2, -1, -1), lower
+        for layer_index in layer_range:
+            layers[layer_index] = _order_by_barycenter(layers[layer_index], neighbours, rank)
+        
+        crossings = _count_crossings(layers, lower, rank)
+        if crossings < best_crossings:
+            best_crossings = crossings
+            best_layers = [list(nodes) for nodes in layers]
+    
+    layers = best_layers
+    for nodes in layers:
+        for index, node in enumerate(nodes):
+            rank[node] = index
+    
+    # Move every node towards its neighbours, keeping the order and the spacing of the layers
+    y = [rank[node] * node_spacing for node in range(len(layer_of))]
+    for sweep in range(COORDINATE_SWEEPS):
+        if sweep % 2 == 0:
+            layer_range, neighbours = range(num_layers), upper
+        else:
+            layer_range, neighbours = range(num_layers - 1, -1, -1), lower
+        for layer_index in layer_range:
+            nodes = layers[layer_index]
+            targets = []
+            for node in nodes:
+                adjacent = neighbours[node] or upper[node] + lower[node]
+                targets.append(sum(y[other] for other in adjacent) / len(adjacent) if adjacent else y[node])
+            for node, node_y in zip(nodes, _place_in_order(targets, node_spacing)):
+                y[node] = node_y
+    
+    top = min(y[:num_nodes])
+    return [(layer_of[node] * layer_spacing, round(y[node] - top)) for node in range(num_nodes)]
+
+def _order_by_barycenter(nodes, neighbours, rank):
+    """
+    Sort the nodes of a layer by the mean rank of their neighbours in the adjacent layer.
+    
+    Nodes without neighbours keep their rank, and the new ranks are stored in rank.
+    
+    Args:
+        nodes (list): Nodes of the layer.
+        neighbours (list): Neighbours of every node in the adjacent layer.
+        rank (list): Rank of every node in its layer.
+    
+    Returns:
+        list: The nodes in the new order.
+    """
+    def barycenter(node):
+        adjacent = neighbours[node]
+        if not adjacent:
+            return rank[node]
+        return sum(rank[other] for other in adjacent) / len(adjacent)
+    
+    ordered = sorted(nodes, key=lambda node: (barycenter(node), rank[node]))
+    for index, node in enumerate(ordered):
+        rank[node] = index
+    return ordered
+
+def _count_crossings(layers, lower, rank):
+    """
+    Count the edge crossings between all the pairs of adjacent layers.
+    
+    The edges between two layers are sorted by the rank of their upper end and
+    the crossings are the inversions of the ranks of their lower end, counted
+    with a Fenwick tree in O(E log V).
+    
+    Args:
+        layers (list): Nodes of every layer, in order.
+        lower (list): Neighbours of every node in the following layer.
+        rank (list): Rank of every node in its layer.
+    
+    Returns:
+        int: Number of crossings.
+    """
+    crossings = 0
+    for layer_index in range(len(layers) - 1):
+        size = len(layers[layer_index + 1])
+        tree = [0] * (size + 1)
+        seen = 0
+        for node in layers[layer_index]:
+            for target_rank in sorted(rank[other] for other in lower[node]):
+                # Edges seen so far that end below this one cross it
+                index = target_rank + 1
+                not_above = 0
+                while index > 0:
+                    not_above += tree[index]
+                    index -= index & -index
+                crossings += seen - not_above
+                
+                index = target_rank + 1
+                while index <= size:
+                    tree[index] += 1
+                    index += index & -index
+                seen += 1
+    return crossings
+
+def _place_in_order(targets, spacing):
+    """
+    Place the nodes of a layer as close as possible to their target positions.
+    
+    The nodes keep their order and are at least spacing apart: this is an isotonic
+    regression of the targets shifted by the spacing, solved by pooling adjacent
+    violators in linear time.
+    
+    Args:
+        targets (list): Target position of every node, in layer order.
+        spacing (int): Minimum distance between consecutive nodes.
+    
+    Returns:
+        list: Positions of the nodes.
+    """
+    blocks = []  # [sum, count] of pooled shifted targets
+    for index, target in enumerate(targets):
+        blocks.append([target - index * spacing, 1])
+        while len(blocks) > 1 and blocks[-2][0] * blocks[-1][1] > blocks[-1][0] * blocks[-2][1]:
+            total, count = blocks.pop()
+            blocks[-1][0] += total
+            blocks[-1][1] += count
+    
+    positions = []
+    for total, count in blocks:
+        value = total / count
+        for _ in range(count):
+            positions.append(value + len(positions) * spacing)
+    return positions
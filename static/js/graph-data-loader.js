@@ -0,0 +1,60 @@
+/**
+ * Graph data loader for the Photosì Service Documentation site.
+ * Expands graph data written in the compact format (nodes stored once, edges
+ * referring to node indices) into the format used by the graph pages.
+ * Graph data already in the full format is returned unchanged.
+ */
+
+const COMPACT_GRAPH_VERSION = 1;
+
+function expandGraphData(data) {
+    if (!data || data.v === undefined) {
+        return data;
+    }
+    if (data.v !== COMPACT_GRAPH_VERSION) {
+        throw new Error(`Unsupported graph data version: ${data.v}`);
+    }
+
+    const nodes = data.n.map(([id, type, payloadId, name, displayName, x, y]) => {
+        const payloadData = { id: payloadId, name: name };
+        if (displayName !== null) {
+            payloadData.display_name = displayName;
+        }
+        const payload = { id: payloadId, data: payloadData };
+        const nodeData = type === 'services'
+            ? { service: payload }
+            : { mode: 'full', message: payload };
+        return { id: id, type: type, data: nodeData, position: { x: x, y: y } };
+    });
+
+    const edges = data.e.map(([sourceIndex, targetIndex, label, animated]) => {
+        const source = nodes[sourceIndex];
+        const target = nodes[targetIndex];
+        // The edge carries the message of its non-service endpoint
+        const messageNode = source.type === 'services' ? target : source;
+        const message = messageNode.data.message || {};
+        return {
+            id: `${source.id}-${target.id}`,
+            source: source.id,
+            target: target.id,
+            label: label,
+            animated: animated === 1,
+            data: {
+                message: {
+                    id: message.id,
+                    data: { id: message.id, name: message.data ? message.data.name : undefined }
+                }
+            }
+        };
+    });
+
+    return { nodes: nodes, edges: edges };
+}
+
+async function loadGraphData(url) {
+    const response = await fetch(url);
+    if (!response.ok) {
+        throw new Error('Failed to fetch graph data');
+    }
+    return expandGraphData(await response.json());
+}
@@ -0,0 +1,155 @@
+/**
+ * Site search for the Photosì Service Documentation site.
+ * The search index is built with the site and split in shards by term prefix:
+ * a query fetches only the shards of its words and the documents it shows.
+ */
+
+const SEARCH_MAX_RESULTS = 20;
+
+class SearchIndex {
+    constructor(url) {
+        this.url = url;
+        this.index = null;
+        this.files = {};
+    }
+    
+    fetchFile(name) {
+        if (!this.files[name]) {
+            this.files[name] = fetch(`${this.url}/${name}.json`).then(response => {
+                if (!response.ok) {
+                    throw new Error(`Failed to fetch search data: ${name}`);
+                }
+                return response.json();
+            });
+        }
+        return this.files[name];
+    }
+    
+    async loadIndex() {
+        if (!this.index) {
+            this.index = await this.fetchFile('index');
+        }
+        return this.index;
+    }
+    
+    // Scores of the documents with a term starting with the word
+    async matchWord(word) {
+        const index = await this.loadIndex();
+        const prefix = word.slice(0, index.prefix_length);
+        const scores = new Map();
+        if (!index.shards.includes(prefix)) {
+            return scores;
+        }
+        
+        const terms = await this.fetchFile(`terms/${prefix}`);
+        for (const [term, postings] of Object.entries(terms)) {
+            if (!term.startsWith(word)) {
+                continue;
+            }
+            // Exact matches rank above prefix matches
+            const bonus = term === word ? 1 : 0;
+            for (const [documentId, weight] of postings) {
+                scores.set(documentId, Math.max(scores.get(documentId) || 0, weight + bonus));
+            }
+        }
+        return scores;
+    }
+    
+    // Documents matching every word of the query, best first
+    async search(query) {
+        const index = await this.loadIndex();
+        const words = query.toLowerCase().match(/[a-z0-9]+/g) || [];
+        const longWords = words.filter(word => word.length >= index.prefix_length);
+        if (longWords.length === 0) {
+            return [];
+        }
+        
+        const matches = await Promise.all(longWords.map(word => this.matchWord(word)));
+        const totals = new Map();
+        for (const [documentId, score] of matches[0]) {
+            let total = score;
+            for (const other of matches.slice(1)) {
+                if (!other.has(documentId)) {
+                    total = null;
+                    break;
+                }
+                total += other.get(documentId);
+            }
+            if (total !== null) {
+                totals.set(documentId, total);
+            }
+        }
+        
+        const ranked = [...totals.entries()]
+            .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+            .slice(0, SEARCH_MAX_RESULTS);
+        
+        return Promise.all(ranked.map(async ([documentId]) => {
+            const shard = Math.floor(documentId / index.documents_per_shard);
+            const documents = await this.fetchFile(`documents-${shard}`);
+            const [title, url, kind] = documents[documentId % index.documents_per_shard];
+            return { title: title, url: url, kind: kind };
+        }));
+    }
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    const input = document.getElementById('site-search');
+    const resultsList = document.getElementById('site-search-results');
+    if (!input || !resultsList) {
+        return;
+    }
+    
+    const searchIndex = new SearchIndex(input.dataset.searchUrl);
+    let searchToken = 0;
+    let debounceTimer = null;
+    
+    function renderResults(results) {
+        const items = results.map(result => {
+            const kind = document.createElement('span');
+            kind.className = 'search-result-kind';
+            kind.textContent = result.kind;
+            
+            const link = document.createElement('a');
+            link.href = result.url;
+            link.append(kind, ` ${result.title}`);
+            
+            const item = document.createElement('li');
+            item.appendChild(link);
+            return item;
+        });
+        
+        if (items.length === 0) {
+            const empty = document.createElement('li');
+            empty.className = 'search-no-results';
+            empty.textContent = 'No results';
+            items.push(empty);
+        }
+        resultsList.replaceChildren(...items);
+        resultsList.hidden = false;
+    }
+    
+    async function runSearch() {
+        const token = ++searchToken;
+        const query = input.value.trim();
+        if (!query) {
+            resultsList.hidden = true;
+            return;
+        }
+        
+        try {
+            const results = await searchIndex.search(query);
+            // Ignore the results of a query that was changed in the meantime
+            if (token === searchToken) {
+                renderResults(results);
+            }
+        } catch (error) {
+            console.error('Error searching:', error);
+        }
+    }
+    
+    input.addEventListener('input', () => {
+        clearTimeout(debounceTimer);
+        debounceTimer = setTimeout(runSearch, 150);
+    });
+});
@@ -0,0 +1,75 @@
+/**
+ * Sidebar loader for the Photosì Service Documentation site.
+ * The navigation lists are written once per build in a shared JSON file;
+ * every page fills its sidebar from it instead of embedding the lists.
+ * The data is kept in sessionStorage so it is fetched once per session;
+ * its URL contains the hash of its content, so a new build is never hidden
+ * by a copy of the old data.
+ */
+
+async function loadSidebarData(url) {
+    const cached = sessionStorage.getItem(url);
+    if (cached !== null) {
+        return JSON.parse(cached);
+    }
+
+    const response = await fetch(url);
+    if (!response.ok) {
+        throw new Error('Failed to fetch sidebar data');
+    }
+    const text = await response.text();
+    try {
+        // Drop the copies of the previous versions of the data
+        const prefix = url.replace(/\.[0-9a-f]{10}\.json$/, '.');
+        for (let index = sessionStorage.length - 1; index >= 0; index--) {
+            const key = sessionStorage.key(index);
+            if (key !== url && key.startsWith(prefix)) {
+                sessionStorage.removeItem(key);
+            }
+        }
+        sessionStorage.setItem(url, text);
+    } catch (error) {
+        // Storage full or disabled, the data is fetched again on the next page
+    }
+    return JSON.parse(text);
+}
+
+function renderServicesDropdown(dropdown, services) {
+    const currentPath = window.location.pathname;
+    const list = dropdown.querySelector('.services-dropdown-content');
+
+    dropdown.querySelector('.services-count').textContent = services.length;
+    for (const serviceName of services) {
+        const href = `/services/${serviceName}.html`;
+
+        const icon = document.createElement('span');
+        icon.className = 'service-icon';
+        icon.textContent = '⬚';
+
+        const link = document.createElement('a');
+        link.href = href;
+        if (currentPath === href) {
+            link.className = 'active';
+        }
+        link.append(icon, ` ${serviceName}`);
+
+        const item = document.createElement('li');
+        item.appendChild(link);
+        list.appendChild(item);
+    }
+    dropdown.hidden = services.length === 0;
+}
+
+document.addEventListener('DOMContentLoaded', async () => {
+    const dropdown = document.querySelector('.services-dropdown[data-sidebar-url]');
+    if (!dropdown) {
+        return;
+    }
+
+    try {
+        const sidebarData = await loadSidebarData(dropdown.dataset.sidebarUrl);
+        renderServicesDropdown(dropdown, sidebarData.services || []);
+    } catch (error) {
+        console.error('Error loading sidebar data:', error);
+    }
+});
@@ -0,0 +1,93 @@
+"""
+Pytest configuration for the photosi-catalog-site-builder tests.
+Makes the modules under src importable the same way main.py imports them.
+"""
+
+import sys
+import pytest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+SERVICE_YAML = """
+info:
+  title: Order Service
+  description: Handles orders https://github.com/photosi/order-service
+operations:
+  sendOrderCreated:
+    action: send
+    channel:
+      $ref: '../channels/orders/message.ordercreated.yaml#/channels/messageordersordercreated'
+  receivePrintRequested:
+    action: receive
+    channel:
+      $ref: '../channels/printing/request.printrequested.yaml#/channels/requestprintingprintrequested'
+"""
+
+PRINTER_YAML = """
+info:
+  title: Printer Service
+  description: Prints things
+operations:
+  receiveOrderCreated:
+    action: receive
+    channel:
+      $ref: '../channels/orders/message.ordercreated.yaml#/channels/messageordersordercreated'
+  sendPrintRequested:
+    action: send
+    channel:
+      $ref: '../channels/printing/request.printrequested.yaml#/channels/requestprintingprintrequested'
+"""
+
+CHANNEL_ORDER_CREATED_YAML = """
+channels:
+  messageordersordercreated:
+    address: orders.ordercreated
+    messages:
+      ordercreated:
+        $ref: '../../messages/message/orders/message.ordercreated.yaml#/components/messages/ordercreated'
+"""
+
+CHANNEL_PRINT_REQUESTED_YAML = """
+channels:
+  requestprintingprintrequested:
+    address: printing.printrequested
+    messages:
+      printrequested:
+        $ref: '../../messages/request/printing/request.printrequested.yaml#/components/messages/printrequested'
+"""
+
+MESSAGE_ORDER_CREATED_YAML = """
+components:
+  messages:
+    ordercreated:
+      title: Orders:OrderCreated
+      description: An order was created
+"""
+
+MESSAGE_PRINT_REQUESTED_YAML = """
+components:
+  messages:
+    printrequested:
+      title: Printing:PrintRequested
+      description: A print was requested
+"""
+
+CATALOG_FILES = {
+    'services/order-service.yaml': SERVICE_YAML,
+    'services/printer-service.yaml': PRINTER_YAML,
+    'channels/orders/message.ordercreated.yaml': CHANNEL_ORDER_CREATED_YAML,
+    'channels/printing/request.printrequested.yaml': CHANNEL_PRINT_REQUESTED_YAML,
+    'messages/message/orders/message.ordercreated.yaml': MESSAGE_ORDER_CREATED_YAML,
+    'messages/request/printing/request.printrequested.yaml': MESSAGE_PRINT_REQUESTED_YAML,
+}
+
+@pytest.fixture
+def catalog_dir(tmp_path):
+    """Create a small AsyncAPI catalog with two services and two events."""
+    root = tmp_path / 'catalog'
+    for relative_path, content in CATALOG_FILES.items():
+        file_path = root / relative_path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(content, encoding='utf-8')
+    return root
@@ -2,16 +2,31 @@
 Test module for the generator classes.
 """
 
+import json
 import os
+import random
+import sqlite3
+import sys
+import threading
+import time
 import pytest
 from pathlib import Path
 
 from src.generators.site_generator import SiteGenerator
 from src.generators.service_page import ServicePageGenerator
 from src.generators.event_page import EventPageGenerator
+from src.generators.event_table import EventTableGenerator
+from src.generators.search_index import SearchIndexGenerator, tokenize
+from src.generators.topology import TopologyGenerator
+from src.generators.output_writer import OutputWriter
+from src.generators.static_assets import StaticAssets, minify_css, minify_js
+from src.generators.watcher import CatalogWatcher
 
 from src.models.service import Service
 from src.models.event import Event
+from benchmarks.synthetic_catalog import generate_catalog
+from src.utils.build_profile import BuildProfile
+from src.utils.graph_utils import COMPACT_GRAPH_VERSION, expand_graph_data, layered_layout
 
 # Base directory for test files
 TEST_FILES_DIR = Path(__file__).parent / 'test_files'
@@ -32,3 +47,606 @@ def test_site_generator():
     """Test the SiteGenerator class."""
     # This is a placeholder for actual tests
     pass
+
+def test_site_generator_incremental_build(catalog_dir, tmp_path):
+    """Test that an incremental build regenerates only the affected pages."""
+    output_dir = tmp_path / 'output'
+    
+    full_build = SiteGenerator(catalog_dir, output_dir).generate_all(incremental=True)
+    assert len(full_build) == 6
+    
+    # Nothing changed: nothing is regenerated
+    assert SiteGenerator(catalog_dir, output_dir).generate_all(incremental=True) == []
+    
+    # A message change affects its event page, the services using it and the table
+    message_file = catalog_dir / 'messages/request/printing/request.printrequested.yaml'
+    message_file.write_text(message_file.read_text().replace('A print was requested', 'A print job was requested'))
+    rebuilt = SiteGenerator(catalog_dir, output_dir).generate_all(incremental=True)
+    assert sorted(Path(page).name for page in rebuilt) == [
+        'order-service.html', 'printer-service.html', 'request_Printing_PrintRequested.html', 'table.html',
+        'topology.html',
+    ]
+    assert 'A print job was requested' in (output_dir / 'events/request_Printing_PrintRequested.html').read_text()
+    
+    # A removed service loses its page and graph data
+    (catalog_dir / 'services/printer-service.yaml').unlink()
+    SiteGenerator(catalog_dir, output_dir).generate_all(incremental=True)
+    assert not (output_dir / 'services/printer-service.html').exists()
+    assert not (output_dir / 'static/js/graph-data/printer-service.json').exists()
+    assert (output_dir / 'services/order-service.html').exists()
+
+def test_manifest_records_every_data_file(catalog_dir, tmp_path):
+    """Test that a missing data file is regenerated, and that full builds remove the stale outputs."""
+    output_dir = tmp_path / 'output'
+    SiteGenerator(catalog_dir, output_dir).generate_all()
+    
+    manifest = json.loads((output_dir / '.build-manifest.json').read_text())
+    search_files = sorted(path.relative_to(output_dir).as_posix()
+                          for path in (output_dir / 'static/search').rglob('*.json'))
+    assert manifest['outputs']['static/search/index.json']['files'] == search_files
+    assert 'static/js/topology/cluster-orders.json' in manifest['outputs']['topology.html']['files']
+    assert 'events/table-data/request-0.json' in manifest['outputs']['events/table.html']['files']
+    
+    # A deleted shard or cluster makes its output dirty
+    for relative_path in ('static/search/terms/cr.json', 'static/js/topology/cluster-orders.json'):
+        (output_dir / relative_path).unlink()
+    rebuilt = SiteGenerator(catalog_dir, output_dir).generate_all(incremental=True)
+    assert [Path(page).name for page in rebuilt] == ['topology.html']
+    assert (output_dir / 'static/search/terms/cr.json').exists()
+    assert (output_dir / 'static/js/topology/cluster-orders.json').exists()
+    
+    # A full build removes the pages of the previous build it doesn't produce anymore
+    (catalog_dir / 'services/printer-service.yaml').unlink()
+    SiteGenerator(catalog_dir, output_dir).generate_all()
+    assert not (output_dir / 'services/printer-service.html').exists()
+    assert not (output_dir / 'static/js/graph-data/printer-service.json').exists()
+
+def test_site_generator_shared_sidebar_data(catalog_dir, tmp_path):
+    """Test that the sidebar lists are written once, under a name that changes with the list."""
+    output_dir = tmp_path / 'output'
+    SiteGenerator(catalog_dir, output_dir).generate_all(incremental=True)
+    
+    def sidebar_file():
+        files = list((output_dir / 'static/js').glob('sidebar-data.*.json'))
+        assert len(files) == 1
+        return files[0]
+    
+    first_file = sidebar_file()
+    assert json.loads(first_file.read_text()) == {'services': ['order-service', 'printer-service']}
+    page = (output_dir / 'services/order-service.html').read_text()
+    assert f'data-sidebar-url="/static/js/{first_file.name}"' in page and 'printer-service' not in page
+    
+    # The pages refer to the new data file, and the old one is removed
+    (catalog_dir / 'services/billing-service.yaml').write_text("info:\n  title: Billing Service\n")
+    rebuilt = SiteGenerator(catalog_dir, output_dir).generate_all(incremental=True)
+    assert sorted(Path(page).name for page in rebuilt) == [
+        'billing-service.html', 'order-service.html', 'printer-service.html', 'table.html', 'topology.html']
+    
+    second_file = sidebar_file()
+    assert second_file != first_file
+    assert json.loads(second_file.read_text())['services'] == ['billing-service', 'order-service', 'printer-service']
+    assert f"/static/js/{second_file.name}" in (output_dir / 'services/order-service.html').read_text()
+
+def test_site_generator_parallel_build_matches_serial(catalog_dir, tmp_path):
+    """Test that rendering with a process pool produces the same files as a serial build."""
+    serial_dir = tmp_path / 'serial'
+    parallel_dir = tmp_path / 'parallel'
+    
+    SiteGenerator(catalog_dir, serial_dir).generate_all()
+    SiteGenerator(catalog_dir, parallel_dir, jobs=2).generate_all()
+    
+    serial_files = sorted(p.relative_to(serial_dir) for p in serial_dir.rglob('*') if p.is_file())
+    parallel_files = sorted(p.relative_to(parallel_dir) for p in parallel_dir.rglob('*') if p.is_file())
+    assert serial_files == parallel_files
+    for relative_path in serial_files:
+        assert (serial_dir / relative_path).read_bytes() == (parallel_dir / relative_path).read_bytes()
+
+def test_parallel_build_reads_message_headers_in_workers(catalog_dir, tmp_path, monkeypatch):
+    """Test that with jobs > 1 the headers of the message files are read by the worker processes."""
+    module = sys.modules['parser.document_cache']
+    scans = tmp_path / 'scans'
+    scans.mkdir()
+    
+    def recording_read(file, read=module.read_message_headers):
+        (scans / f"{os.getpid()}-{os.path.basename(file.name)}").touch()
+        return read(file)
+    
+    monkeypatch.setattr(module, 'read_message_headers', recording_read)
+    generator = SiteGenerator(catalog_dir, tmp_path / 'output', jobs=2)
+    generator.generate_all()
+    
+    message_files = sorted(path.name for path in (catalog_dir / 'messages').rglob('*.yaml'))
+    assert sorted(path.name.partition('-')[2] for path in scans.iterdir()) == message_files
+    assert all(not path.name.startswith(f"{os.getpid()}-") for path in scans.iterdir())
+    assert generator.document_cache.header_scans == len(message_files)
+
+def test_render_workers_reuse_the_asset_manifest(catalog_dir, tmp_path, monkeypatch):
+    """Test that the render workers don't minify and fingerprint the static files again."""
+    assets_class = sys.modules['generators.static_assets'].StaticAssets
+    added = tmp_path / 'added'
+    added.mkdir()
+    
+    def recording_add(self, source, asset_path, add=assets_class._add):
+        (added / f"{os.getpid()}-{source.name}").touch()
+        return add(self, source, asset_path)
+    
+    monkeypatch.setattr(assets_class, '_add', recording_add)
+    generator = SiteGenerator(catalog_dir, tmp_path / 'output', jobs=2)
+    generator.generate_all()
+    
+    assert list(added.iterdir())
+    assert all(path.name.startswith(f"{os.getpid()}-") for path in added.iterdir())
+    page = (tmp_path / 'output/services/order-service.html').read_text()
+    assert generator.assets.url('js/graph-zoom-pan.js') in page
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_site_generator_collects_parse_errors(catalog_dir, tmp_path, jobs):
+    """Test that files that cannot be parsed are reported without stopping the build."""
+    (catalog_dir / 'messages/message/orders/message.broken.yaml').write_text("components: [unclosed\n")
+    (catalog_dir / 'services/broken-service.yaml').write_text("info: {title: Broken\n")
+    
+    generator = SiteGenerator(catalog_dir, tmp_path / 'output', jobs=jobs)
+    pages = generator.generate_all()
+    
+    assert sorted(Path(error_file).name for error_file in generator.catalog.parse_errors) == [
+        'broken-service.yaml', 'message.broken.yaml',
+    ]
+    assert sorted(generator.catalog.services) == ['order-service', 'printer-service']
+    assert len(pages) == 6
+
+def test_site_generator_compact_graph_format(catalog_dir, tmp_path):
+    """Test that the compact graph data expands back to the full graph data."""
+    full_dir = tmp_path / 'full'
+    compact_dir = tmp_path / 'compact'
+    
+    SiteGenerator(catalog_dir, full_dir).generate_all()
+    SiteGenerator(catalog_dir, compact_dir, graph_format='compact').generate_all()
+    
+    graph_files = sorted(p.name for p in (full_dir / 'static/js/graph-data').glob('*.json'))
+    assert graph_files
+    for name in graph_files:
+        full = json.loads((full_dir / 'static/js/graph-data' / name).read_text())
+        compact = json.loads((compact_dir / 'static/js/graph-data' / name).read_text())
+        assert compact['v'] == COMPACT_GRAPH_VERSION
+        assert expand_graph_data(compact) == full
+
+def test_site_generator_shares_template_environment(catalog_dir, tmp_path):
+    """Test that the page generators share one environment and compiled templates are cached on disk."""
+    generator = SiteGenerator(catalog_dir, tmp_path / 'output', cache_directory=tmp_path / 'cache')
+    assert generator.service_page_generator.env is generator.template_environment
+    assert generator.event_page_generator.env is generator.template_environment
+    assert generator.event_table_generator.env is generator.template_environment
+    
+    generator.generate_all()
+    assert len(list((tmp_path / 'cache' / 'templates').glob('*.cache'))) == 5
+
+def test_catalog_watcher_rebuilds_changed_files(catalog_dir, tmp_path):
+    """Test that the watcher detects changed files and rebuilds only the affected pages."""
+    output_dir = tmp_path / 'output'
+    watcher = CatalogWatcher(SiteGenerator(catalog_dir, output_dir), interval=0)
+    watcher.changed_files()
+    assert len(watcher.rebuild()) == 6
+    assert watcher.changed_files() == []
+    
+    message_file = catalog_dir / 'messages/message/orders/message.ordercreated.yaml'
+    message_file.write_text(message_file.read_text().replace('An order was created', 'An order was placed'))
+    changed = watcher.changed_files()
+    assert changed == [str(message_file)]
+    
+    rebuilt = watcher.rebuild(changed)
+    assert sorted(Path(page).name for page in rebuilt) == [
+        'message_Orders_OrderCreated.html', 'order-service.html', 'printer-service.html', 'table.html',
+        'topology.html',
+    ]
+    assert 'An order was placed' in (output_dir / 'events/message_Orders_OrderCreated.html').read_text()
+
+def test_staged_watch_rebuilds_reuse_the_previous_build(catalog_dir, tmp_path):
+    """Test that staged rebuilds sync the replaced build and update the snapshot in place."""
+    site_dir = tmp_path / 'site'
+    watcher = CatalogWatcher(SiteGenerator(catalog_dir, site_dir, staging=True), interval=0)
+    watcher.changed_files()
+    watcher.rebuild()
+    
+    message_file = catalog_dir / 'messages/message/orders/message.ordercreated.yaml'
+    for description in ('An order was placed', 'An order was placed again'):
+        message_file.write_text(message_file.read_text().replace('An order was', description, 1))
+        watcher.rebuild(watcher.changed_files())
+    
+    # The replaced build is kept for the next rebuild, next to the published one
+    assert len(list(tmp_path.glob('.site.build-*'))) == 2
+    
+    # The site and the snapshot are the ones a new build writes
+    SiteGenerator(catalog_dir, tmp_path / 'fresh').generate_all()
+    fresh_files = sorted(path.relative_to(tmp_path / 'fresh') for path in (tmp_path / 'fresh').rglob('*')
+                         if path.is_file() and path.name != '.build-manifest.json')
+    assert fresh_files == sorted(path.relative_to(site_dir) for path in site_dir.rglob('*')
+                                 if path.is_file() and path.name != '.build-manifest.json')
+    for relative_path in fresh_files:
+        assert (site_dir / relative_path).read_bytes() == (tmp_path / 'fresh' / relative_path).read_bytes()
+    
+    def snapshot_rows(name):
+        connection = sqlite3.connect(tmp_path / f".{name}.catalog-snapshot.sqlite")
+        tables = [table for table, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        rows = {table: sorted(connection.execute(f"SELECT * FROM {table}")) for table in tables}
+        connection.close()
+        return rows
+    
+    assert snapshot_rows('site') == snapshot_rows('fresh')
+    
+    # A file saved without changes doesn't rewrite the snapshot
+    snapshot_file = tmp_path / '.site.catalog-snapshot.sqlite'
+    before = snapshot_file.stat().st_mtime_ns
+    os.utime(message_file, ns=(time.time_ns(), time.time_ns()))
+    watcher.rebuild(watcher.changed_files())
+    assert snapshot_file.stat().st_mtime_ns == before
+
+def test_event_table_sharded_data(catalog_dir, tmp_path):
+    """Test that the event table rows are written as JSON shards instead of into the page."""
+    output_dir = tmp_path / 'output'
+    SiteGenerator(catalog_dir, output_dir).generate_all()
+    
+    data_dir = output_dir / 'events/table-data'
+    index = json.loads((data_dir / 'index.json').read_text())
+    assert index['types']['message'] == {'count': 1, 'shards': 1}
+    assert index['types']['command'] == {'count': 0, 'shards': 0}
+    assert json.loads((data_dir / 'request-0.json').read_text()) == [
+        ['Printing:PrintRequested', 'Printing_PrintRequested',
+         [['printer-service', 'Printer Service']], [['order-service', 'Order Service']]],
+    ]
+    assert 'Printing:PrintRequested' not in (output_dir / 'events/table.html').read_text()
+    
+    # Shards that are no longer needed are removed
+    (data_dir / 'message-7.json').write_text('[]')
+    generator = SiteGenerator(catalog_dir, output_dir)
+    generator.event_table_generator.shard_size = 1
+    generator.generate_all()
+    assert sorted(p.name for p in data_dir.glob('*.json')) == ['index.json', 'message-0.json', 'request-0.json']
+    assert json.loads((data_dir / 'index.json').read_text())['shard_size'] == 1
+
+def test_event_table_splits_rows_in_shards(tmp_path):
+    """Test that the rows of an event type are split in shards sorted by name."""
+    events = [Event(f"msg{i}", f"Dir:Event{i}", 'message') for i in (3, 1, 2)]
+    EventTableGenerator(tmp_path, shard_size=2).generate(events, {})
+    
+    data_dir = tmp_path / 'events/table-data'
+    assert [row[0] for row in json.loads((data_dir / 'message-0.json').read_text())] == ['Dir:Event1', 'Dir:Event2']
+    assert [row[0] for row in json.loads((data_dir / 'message-1.json').read_text())] == ['Dir:Event3']
+
+def test_search_index_tokenize():
+    """Test that words are indexed whole and by their camel case parts."""
+    assert tokenize("Orders:OrderCreated v2") == {'orders', 'ordercreated', 'order', 'created', 'v2'}
+
+def test_search_index_shards(catalog_dir, tmp_path):
+    """Test that the search index is split by term prefix and points to the pages."""
+    output_dir = tmp_path / 'output'
+    SiteGenerator(catalog_dir, output_dir).generate_all()
+    
+    search_dir = output_dir / 'static/search'
+    index = json.loads((search_dir / 'index.json').read_text())
+    assert index['document_count'] == 4
+    assert 'or' in index['shards']
+    
+    documents = json.loads((search_dir / 'documents-0.json').read_text())
+    terms = json.loads((search_dir / 'terms/cr.json').read_text())
+    assert all(term.startswith('cr') for term in terms)
+    assert [documents[document_id] for document_id, _ in terms['created']] == [
+        ['Orders:OrderCreated', '/events/message_Orders_OrderCreated.html', 'message'],
+    ]
+
+def test_search_index_rewrites_changed_shards(catalog_dir, tmp_path):
+    """Test that regenerating the search index writes only the shards of the changed documents."""
+    generator = SiteGenerator(catalog_dir, tmp_path / 'output')
+    catalog = generator.build_catalog()
+    services, events = list(catalog.services.values()), list(catalog.events.values())
+    search_generator = SearchIndexGenerator(tmp_path / 'output')
+    search_generator.generate(services, events)
+    
+    shard_count = len(list((tmp_path / 'output/static/search').rglob('*.json')))
+    
+    events[0].description = 'An order was created by a brand new client'
+    search_generator.writer = writer = OutputWriter()
+    search_generator.generate(services, events)
+    assert writer.files_written + writer.files_unchanged < shard_count
+    assert 'brand' in json.loads((tmp_path / 'output/static/search/terms/br.json').read_text())
+    
+    # The index is the one a new generator would write
+    SearchIndexGenerator(tmp_path / 'fresh').generate(services, events)
+    for path in (tmp_path / 'fresh').rglob('*.json'):
+        assert (tmp_path / 'output' / path.relative_to(tmp_path / 'fresh')).read_text() == path.read_text()
+
+def test_topology_clusters_by_directory(catalog_dir, tmp_path):
+    """Test that the topology groups the events by message directory with aggregated edges."""
+    generator = SiteGenerator(catalog_dir, tmp_path / 'output')
+    overview, clusters = TopologyGenerator(tmp_path / 'output').build(generator.build_catalog())
+    
+    assert overview['services'] == [['order-service', 'Order Service'], ['printer-service', 'Printer Service']]
+    assert overview['clusters'] == [['orders', 'Orders', 1], ['printing', 'Printing', 1]]
+    assert overview['edges'] == [[0, 0, 1, 0], [1, 0, 0, 1], [0, 1, 0, 1], [1, 1, 1, 0]]
+    assert clusters['orders']['events'] == [
+        ['message', 'Orders:OrderCreated', '/events/message_Orders_OrderCreated.html'],
+    ]
+    assert clusters['orders']['edges'] == [['order-service', 0, 'publishes'], ['printer-service', 0, 'consumes']]
+
+def test_topology_cluster_ids_are_unique(catalog_dir, tmp_path):
+    """Test that message directories with the same sanitised name get different cluster ids."""
+    for directory, name in (('a.b', 'Dotted'), ('a_b', 'Underscored')):
+        message_dir = catalog_dir / 'messages/message' / directory
+        message_dir.mkdir()
+        (message_dir / 'message.yaml').write_text(
+            f"components:\n  messages:\n    {name.lower()}:\n      title: '{name}:Happened'\n")
+    
+    generator = SiteGenerator(catalog_dir, tmp_path / 'output')
+    overview, clusters = TopologyGenerator(tmp_path / 'output').build(generator.build_catalog())
+    assert [cluster[0] for cluster in overview['clusters']] == ['a_b', 'a_b-2', 'orders', 'printing']
+    assert [clusters[cluster_id]['events'][0][1] for cluster_id in ('a_b', 'a_b-2')] == [
+        'Dotted:Happened', 'Underscored:Happened']
+
+def test_layered_layout_orders_layers():
+    """Test that edges go left to right, and that nodes of a layer don't overlap."""
+    service = Service('order-service', 'Order Service', '')
+    for i in range(3):
+        service.add_received_event(Event(f"in{i}", f"Orders:In{i}", 'message'))
+    service.add_sent_event(Event('out', 'Orders:Out', 'message'))
+    graph_data = service.to_graph_data()
+    
+    positions = {node['id']: node['position'] for node in graph_data['nodes']}
+    assert all(positions[edge['source']]['x'] < positions[edge['target']]['x'] for edge in graph_data['edges'])
+    inputs = sorted(positions[f"in{i}-message"]['y'] for i in range(3))
+    assert inputs[1] - inputs[0] >= 80 and inputs[2] - inputs[1] >= 80
+    # The service is centered on its inputs, and its only output is aligned to it
+    assert positions['order-service']['y'] == inputs[1] == positions['out-message']['y']
+
+def test_layered_layout_breaks_cycles_and_caches():
+    """Test that cyclic graphs are laid out, and that graphs with the same structure share the layout."""
+    positions = layered_layout(['a', 'b', 'c'], [('a', 'b'), ('b', 'c'), ('c', 'a')])
+    assert positions['a']['x'] < positions['b']['x'] < positions['c']['x']
+    
+    renamed = layered_layout(['x', 'y', 'z'], [('x', 'y'), ('y', 'z'), ('z', 'x')])
+    assert list(renamed.values()) == list(positions.values())
+
+def test_layered_layout_large_graph():
+    """Test that every edge of a graph of 500 nodes goes left to right, its timing is in benchmarks/."""
+    rnd = random.Random(1)
+    nodes = [f"n{i}" for i in range(500)]
+    edges = []
+    for _ in range(1000):
+        source, target = sorted(rnd.sample(range(500), 2))
+        edges.append((nodes[source], nodes[target]))
+    
+    positions = layered_layout(nodes, edges)
+    assert all(positions[source]['x'] < positions[target]['x'] for source, target in edges)
+
+def test_graph_builder_deduplicates_nodes():
+    """Test that a service both publishing and consuming an event has one node and two edges."""
+    event = Event('message0', 'message0', 'message')
+    services = [Service(f"service-{i}", f"Service {i}", '') for i in range(3)]
+    graph_data = event.to_graph_data(services[:1], services)
+    
+    assert [node['id'] for node in graph_data['nodes']] == ['message0-message', 'service-0', 'service-1', 'service-2']
+    assert len(graph_data['edges']) == 4
+    assert graph_data['edges'][0]['data']['message'] is graph_data['edges'][1]['data']['message']
+    
+    # Events named after their id are shown without the type prefix
+    services[0].add_received_event(event)
+    message_node = services[0].to_graph_data()['nodes'][1]
+    assert message_node['data']['message']['data']['display_name'] == '0'
+
+def test_synthetic_catalog_is_parsed(tmp_path):
+    """Test that the synthetic catalog of the benchmarks has the layout the parsers expect."""
+    counts = generate_catalog(tmp_path / 'catalog', num_services=5, events_per_type=4, skew=1.0, num_directories=2)
+    assert counts == {'services': 5, 'events': 12, 'files': 29}
+    
+    catalog = SiteGenerator(tmp_path / 'catalog', tmp_path / 'output').build_catalog()
+    assert not catalog.parse_errors
+    assert len(catalog.services) == 5 and len(catalog.events) == 12
+    
+    event_keys = {(event.type, event.name) for event in catalog.events.values()}
+    assert catalog.relations and set(catalog.relations) <= event_keys
+
+def test_build_profile_phases_and_counters(catalog_dir, tmp_path):
+    """Test that the profile times every phase and counts the YAML parses and the bytes written."""
+    output_dir = tmp_path / 'output'
+    profile = BuildProfile(trace_memory=True)
+    profile.start()
+    generator = SiteGenerator(catalog_dir, output_dir, profile=profile)
+    generator.generate_all()
+    profile.stop()
+    
+    expected = ['scan', 'parse yaml', 'parse services', 'collect relations', 'service pages', 'event pages',
+                'event table']
+    assert [phase for phase in profile.phases if phase in expected] == expected
+    assert all(peak > 0 for _, _, peak in profile.phases.values())
+    assert profile.counters['events with publishers'] == 2
+    
+    # Every service and channel file is parsed once, of the message files only the headers are read
+    assert sorted(generator.document_cache.parse_counts.values()) == [1] * 4
+    assert generator.document_cache.header_scans == 2
+    
+    written = [path for path in output_dir.rglob('*')
+               if path.is_file() and path.name != '.build-manifest.json']
+    assert generator.writer.files_written == len(written)
+    assert generator.writer.bytes_written == sum(path.stat().st_size for path in written)
+    
+    report = profile.report(generator.document_cache, generator.writer)
+    assert 'files parsed more than once: 0' in report
+
+def test_staging_build_keeps_unchanged_files(catalog_dir, tmp_path):
+    """Test that a staged build is published in place and doesn't touch the unchanged files."""
+    site_dir = tmp_path / 'site'
+    
+    def build():
+        generator = SiteGenerator(catalog_dir, site_dir, staging=True)
+        generator.prepare_output()
+        generator.generate_all()
+        generator.publish_output()
+        return generator
+    
+    build()
+    assert (site_dir / 'services/order-service.html').exists()
+    page = site_dir / 'services/printer-service.html'
+    before = page.stat()
+    
+    # Only the page of the changed service is written again
+    service_file = catalog_dir / 'services/order-service.yaml'
+    service_file.write_text(service_file.read_text().replace('Handles orders', 'Handles all the orders'))
+    generator = build()
+    
+    # The output path is a link to the only build directory left
+    build_directories = [path.name for path in tmp_path.glob('.site.build-*')]
+    assert len(build_directories) == 1 and os.readlink(site_dir) == build_directories[0]
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+        ['.site.catalog-snapshot.sqlite', 'catalog', 'site'] + build_directories)
+    assert 'Handles all the orders' in (site_dir / 'services/order-service.html').read_text()
+    assert (page.stat().st_ino, page.stat().st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+    assert generator.writer.files_written < generator.writer.files_unchanged
+
+def test_staging_build_replaces_a_plain_output_directory(catalog_dir, tmp_path):
+    """Test that publishing over a site written in place turns the output path into a link."""
+    site_dir = tmp_path / 'site'
+    SiteGenerator(catalog_dir, site_dir).generate_all()
+    assert not site_dir.is_symlink()
+    
+    generator = SiteGenerator(catalog_dir, site_dir, staging=True)
+    generator.prepare_output()
+    generator.generate_all()
+    generator.publish_output()
+    assert site_dir.is_symlink() and (site_dir / 'services/order-service.html').exists()
+    assert not (tmp_path / '.site.previous').exists() and not (tmp_path / '.site.staging').exists()
+
+def test_background_writes_match_synchronous_build(catalog_dir, tmp_path):
+    """Test that writing in background threads produces the same site as writing synchronously."""
+    sites = {}
+    for threads in (0, 3):
+        output_dir = tmp_path / f"out-{threads}"
+        generator = SiteGenerator(catalog_dir, output_dir, write_threads=threads)
+        generator.generate_all()
+        sites[threads] = {str(path.relative_to(output_dir)): path.read_bytes()
+                          for path in output_dir.rglob('*') if path.is_file()}
+    
+    assert sites[3] == sites[0]
+    assert not any(name.endswith('.tmp') for name in sites[3])
+
+def test_writer_threads_are_stopped_before_forking(catalog_dir, tmp_path, monkeypatch):
+    """Test that no writer thread is running when the parse and render workers are forked."""
+    running_writers = []
+    
+    def recording_pool(pool_class):
+        def create(*args, **kwargs):
+            running_writers.append([thread.name for thread in threading.enumerate()
+                                    if thread.name.startswith('output-writer')])
+            return pool_class(*args, **kwargs)
+        return create
+    
+    for module_name in ('parser.catalog_index', 'src.generators.site_generator'):
+        module = sys.modules[module_name]
+        monkeypatch.setattr(module, 'ProcessPoolExecutor', recording_pool(module.ProcessPoolExecutor))
+    
+    generator = SiteGenerator(catalog_dir, tmp_path / 'output', jobs=2, write_threads=2)
+    generator.writer.write_text(tmp_path / 'output.txt', 'queued before the build')
+    generator.generate_all()
+    assert running_writers == [[], []]
+
+def test_output_writer_reports_failed_background_writes(tmp_path):
+    """Test that flush waits for the queued files and reports the ones that could not be written."""
+    writer = OutputWriter(threads=2, max_pending=2)
+    for i in range(10):
+        writer.write_text(tmp_path / f"page-{i}.html", f"page {i}")
+    writer.write_text(tmp_path / 'missing' / 'page.html', 'page')
+    
+    with pytest.raises(OSError, match='Failed to write 1 files'):
+        writer.flush()
+    assert writer.files_written == 10
+    assert (tmp_path / 'page-9.html').read_text() == 'page 9'
+    
+    # The errors are reported once, the writer can be used again
+    writer.write_text(tmp_path / 'page-0.html', 'page 0')
+    writer.flush()
+    assert writer.files_unchanged == 1
+
+def test_static_assets_are_minified_and_fingerprinted(tmp_path):
+    """Test that the static files get content-hashed names and only new versions are written."""
+    static_dir = tmp_path / 'static'
+    (static_dir / 'css').mkdir(parents=True)
+    (static_dir / 'js').mkdir()
+    (static_dir / 'css' / 'style.css').write_text('/* Layout */\nbody {\n    color: #333;\n}\n')
+    (static_dir / 'js' / 'app.js').write_text('// Start\nconst url = "https://example.com";\n\n    run(url);\n')
+    output_dir = tmp_path / 'site'
+    
+    assets = StaticAssets(static_dir)
+    assets.write(output_dir, OutputWriter())
+    style_url = assets.url('css/style.css')
+    assert style_url.startswith('/static/css/style.') and style_url != '/static/css/style.css'
+    assert (output_dir / style_url.lstrip('/')).read_text() == 'body{color:#333}'
+    assert (output_dir / assets.url('js/app.js').lstrip('/')).read_text() == 'const url = "https://example.com";\nrun(url);\n'
+    assert json.loads((output_dir / 'static/assets.json').read_text()) == assets.manifest
+    assert minify_css('a :hover { color: red; }') == 'a :hover{color:red}'
+    assert minify_js('/**\n * Doc\n */\nf();') == 'f();\n'
+    
+    # Code after a comment, strings and template literals are not changed
+    assert minify_js('/* init */ start();') == '/* init */ start();\n'
+    assert minify_js('/* a\n b */ go();\n    f(); // c\n') == 'go();\nf(); // c\n'
+    template = 'const html = `<p>\n// not a comment\n    indented\n`;\n'
+    assert minify_js(template) == template
+    assert minify_js('const pattern = /"/;\n// c\nrun("a\\\n// b");') == 'const pattern = /"/;\nrun("a\\\n// b");\n'
+    assert minify_css('a::before { content: "a  b; }"; }') == 'a::before{content:"a  b; }"}'
+    
+    # An unchanged asset is not written again, a changed one replaces its old version
+    (static_dir / 'js' / 'app.js').write_text('run();\n')
+    (output_dir / 'static/js/data.0123456789.json').write_text('{}')
+    writer = OutputWriter()
+    assets = StaticAssets(static_dir)
+    removed = assets.write(output_dir, writer)
+    assert assets.url('css/style.css') == style_url
+    assert [Path(path).parent.name for path in removed] == ['js']
+    assert sorted(path.name for path in (output_dir / 'static/js').iterdir()) == [
+        assets.manifest['js/app.js'][3:], 'data.0123456789.json']
+    assert writer.files_unchanged == 1
+
+def test_pages_refer_to_fingerprinted_assets(catalog_dir, tmp_path):
+    """Test that the pages load the fingerprinted static files."""
+    generator = SiteGenerator(catalog_dir, tmp_path / 'out')
+    generator.generate_all()
+    
+    page = (tmp_path / 'out/services/order-service.html').read_text()
+    assert generator.assets.url('css/style.css') in page
+    assert generator.assets.url('js/graph-zoom-pan.js') in page
+    assert '/static/js/search.js' not in page
+
+def test_targeted_pages_are_read_from_the_snapshot(catalog_dir, tmp_path):
+    """Test that single pages are generated from the catalog snapshot while their files are unchanged."""
+    output_dir = tmp_path / 'out'
+    SiteGenerator(catalog_dir, output_dir).generate_all()
+    service_page = (output_dir / 'services/order-service.html').read_text()
+    
+    # The snapshot is not published with the site, and is the same for every build of the catalog
+    snapshot_file = tmp_path / '.out.catalog-snapshot.sqlite'
+    assert not list(output_dir.glob('*.sqlite'))
+    snapshot = snapshot_file.read_bytes()
+    SiteGenerator(catalog_dir, output_dir).generate_all()
+    assert snapshot_file.read_bytes() == snapshot
+    event_page = (output_dir / 'events/message_Orders_OrderCreated.html').read_text()
+    
+    def generate(kind, key):
+        generator = SiteGenerator(catalog_dir, output_dir)
+        getattr(generator, f"generate_{kind}_page")(key)
+        return generator
+    
+    generator = generate('service', 'order-service')
+    assert generator.document_cache.misses == 0 and generator.catalog is None
+    assert (output_dir / 'services/order-service.html').read_text() == service_page
+    
+    generator = generate('event', 'message:Orders:OrderCreated')
+    assert generator.document_cache.misses == 0 and generator.catalog is None
+    assert (output_dir / 'events/message_Orders_OrderCreated.html').read_text() == event_page
+    
+    # A change in a file of the page makes the run parse the catalog again
+    service_file = catalog_dir / 'services/printer-service.yaml'
+    service_file.write_text(service_file.read_text().replace('Prints things', 'Prints all the things'))
+    generator = generate('event', 'message:Orders:OrderCreated')
+    assert generator.catalog is not None
+    assert (output_dir / 'events/message_Orders_OrderCreated.html').read_text() == event_page
+    
+    # The files of the other services are not checked for a service page
+    service_file.write_text(service_file.read_text().replace('Prints all the things', 'Prints'))
+    assert generate('service', 'order-service').catalog is None
+    assert generate('service', 'printer-service').catalog is not None
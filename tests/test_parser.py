@@ -3,12 +3,17 @@ Test module for the parser classes.
 """
 
 import os
+import pickle
 import pytest
 from pathlib import Path
 
 from src.parser.service_parser import ServiceParser
 from src.parser.event_parser import EventParser
+from src.parser.catalog_index import CatalogIndex
 from src.parser.channel_parser import ChannelParser
+from src.parser.document_cache import DocumentCache
+from src.parser.parse_cache import ParseCache, PARSE_CACHE_VERSION
+from src.parser.message_headers import UnsupportedHeaders, read_message_headers
 
 from src.models.service import Service
 from src.models.event import Event
@@ -32,3 +37,215 @@ def test_channel_parser():
     """Test the ChannelParser class."""
     # This is a placeholder for actual tests
     pass
+
+def test_document_cache_reuses_unchanged_files(catalog_dir):
+    """Test that the DocumentCache loads each unchanged file only once."""
+    cache = DocumentCache()
+    message_file = catalog_dir / 'messages/message/orders/message.ordercreated.yaml'
+    
+    first = cache.load(message_file)
+    second = cache.load(message_file)
+    
+    assert first is second
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'entries': 1}
+    
+    # A change in size invalidates the entry
+    message_file.write_text(message_file.read_text() + "\n# changed\n")
+    cache.load(message_file)
+    assert cache.misses == 2
+
+def test_document_cache_evicts_least_recently_used(catalog_dir):
+    """Test the bounded LRU eviction of the DocumentCache."""
+    cache = DocumentCache(max_entries=2)
+    files = sorted((catalog_dir / 'services').glob('*.yaml')) + [catalog_dir / 'channels/orders/message.ordercreated.yaml']
+    
+    cache.load(files[0])
+    cache.load(files[1])
+    cache.load(files[0])
+    cache.load(files[2])
+    
+    assert cache.stats()['entries'] == 2
+    cache.load(files[0])
+    assert cache.hits == 2
+    cache.load(files[1])
+    assert cache.misses == 4
+
+def test_parsers_share_document_cache(catalog_dir):
+    """Test that a full service scan parses each YAML file at most once."""
+    cache = DocumentCache()
+    service_parser = ServiceParser(catalog_dir, cache)
+    
+    for service_name in service_parser.list_all_services():
+        service_parser.parse(service_name)
+    
+    # Of the message files only the headers are read
+    message_files = list((catalog_dir / 'messages').rglob('*.yaml'))
+    assert cache.misses == len(list(catalog_dir.rglob('*.yaml'))) - len(message_files)
+    assert cache.header_scans == len(message_files)
+    assert cache.hits == 4
+
+def test_parse_cache_persists_between_builds(catalog_dir, tmp_path):
+    """Test that a warm ParseCache skips YAML parsing for unchanged files."""
+    cache_dir = tmp_path / 'cache'
+    
+    cold = ParseCache(cache_dir)
+    ServiceParser(catalog_dir, DocumentCache(parse_cache=cold)).parse('order-service')
+    # The service and channel files, and the headers of the two message files
+    assert cold.hits == 0 and cold.misses == 5
+    
+    warm = ParseCache(cache_dir)
+    service = ServiceParser(catalog_dir, DocumentCache(parse_cache=warm)).parse('order-service')
+    assert warm.hits == 5 and warm.misses == 0
+    assert [event.name for event in service.sent_events] == ['Orders:OrderCreated']
+    
+    # Entries are stored under a versioned directory
+    assert all(path.name.startswith(f"v{PARSE_CACHE_VERSION}-") for path in cache_dir.iterdir())
+
+def test_catalog_index(catalog_dir):
+    """Test that the CatalogIndex collects services, events and relations in one pass."""
+    cache = DocumentCache()
+    service_parser = ServiceParser(catalog_dir, cache)
+    index = CatalogIndex.build(catalog_dir, service_parser, EventParser(catalog_dir, cache))
+    
+    # Every service and channel file is parsed exactly once, of the message files only the headers are read
+    message_files = list((catalog_dir / 'messages').rglob('*.yaml'))
+    assert cache.misses == len(list(catalog_dir.rglob('*.yaml'))) - len(message_files)
+    assert cache.header_scans == len(message_files)
+    
+    assert index.service_names == ['order-service', 'printer-service']
+    assert index.event_keys == [('message', 'Orders:OrderCreated'), ('request', 'Printing:PrintRequested')]
+    assert index.container_titles['ordercreated'] == ('message', 'Orders:OrderCreated')
+    assert sorted(index.channels) == [
+        '../channels/orders/message.ordercreated.yaml#/channels/messageordersordercreated',
+        '../channels/printing/request.printrequested.yaml#/channels/requestprintingprintrequested',
+    ]
+    
+    event = index.find_event('message:Orders:OrderCreated')
+    assert event is index.find_event('../../messages/message/orders/message.ordercreated.yaml#/components/messages/ordercreated')
+    publishing_services, consuming_services = index.get_relations(event)
+    assert [service.id for service in publishing_services] == ['order-service']
+    assert [service.id for service in consuming_services] == ['printer-service']
+
+def test_service_keeps_first_event_per_id():
+    """Test that a Service keeps one event per id, in insertion order."""
+    service = Service('order-service', 'Order Service', '')
+    first = Event('Orders:OrderCreated', 'Orders:OrderCreated', 'message')
+    
+    service.add_sent_event(first)
+    service.add_sent_event(Event('Orders:OrderCreated', 'Orders:OrderCreated', 'message', 'duplicate'))
+    service.add_sent_event(Event('Orders:OrderDeleted', 'Orders:OrderDeleted', 'message'))
+    
+    assert [event.name for event in service.sent_events] == ['Orders:OrderCreated', 'Orders:OrderDeleted']
+    assert next(iter(service.sent_events)) is first
+    assert service.to_dict()['sent_events'][0]['description'] == ''
+    assert not hasattr(service, '__dict__')
+
+def test_message_headers_skip_the_payload():
+    """Test that the message headers are read from the YAML events, without building the rest of the file."""
+    content = """
+components:
+  schemas:
+    order: {type: object}
+  messages:
+    ordercreated:
+      payload: &payload
+        type: object
+        properties: {id: {type: string}}
+      title: Orders:OrderCreated
+      description: 'An order was created'
+    orderupdated:
+      title: Orders:OrderUpdated
+      payload: *payload
+  examples: [this is not read, {
+"""
+    assert read_message_headers(content) == {
+        'ordercreated': {'title': 'Orders:OrderCreated', 'description': 'An order was created'},
+        'orderupdated': {'title': 'Orders:OrderUpdated'},
+    }
+    assert read_message_headers("info: {title: x}\n") == {}
+    
+    # Headers that don't load as plain strings need the whole document
+    for content in ["components:\n  messages:\n    a: {title: 2024}\n",
+                    "components:\n  messages:\n    a: {<<: {title: A}}\n"]:
+        with pytest.raises(UnsupportedHeaders):
+            read_message_headers(content)
+
+def test_document_cache_loads_message_headers(catalog_dir):
+    """Test that the headers of a message file are cached and fall back to loading unusual files."""
+    cache = DocumentCache()
+    message_file = catalog_dir / 'messages/message/orders/message.ordercreated.yaml'
+    
+    headers = cache.load_headers(message_file)
+    assert headers == {'ordercreated': {'title': 'Orders:OrderCreated', 'description': 'An order was created'}}
+    assert cache.load_headers(message_file) is headers
+    assert (len(cache), cache.header_scans, cache.hits) == (0, 1, 1)
+    
+    message_file.write_text("components:\n  messages:\n    ordercreated:\n      <<: {title: 'Orders:Merged'}\n")
+    assert cache.load_headers(message_file) == {'ordercreated': {'title': 'Orders:Merged'}}
+    assert (len(cache), cache.misses) == (1, 1)
+
+def test_parse_cache_stores_message_headers(catalog_dir, tmp_path):
+    """Test that the headers of unchanged message content are read from the parse cache."""
+    message_file = catalog_dir / 'messages/message/orders/message.ordercreated.yaml'
+    headers = DocumentCache(parse_cache=ParseCache(tmp_path / 'cache')).load_headers(message_file)
+    
+    parse_cache = ParseCache(tmp_path / 'cache')
+    assert DocumentCache(parse_cache=parse_cache).load_headers(message_file) == headers
+    assert parse_cache.stats() == {'hits': 1, 'misses': 0}
+
+def test_event_payload_is_loaded_on_first_access(catalog_dir):
+    """Test that an event loads its payload from its message file only when it is used."""
+    message_file = catalog_dir / 'messages/message/orders/message.ordercreated.yaml'
+    message_file.write_text(message_file.read_text() + "      payload:\n        type: object\n")
+    cache = DocumentCache()
+    event = EventParser(catalog_dir, cache).parse(
+        '../../messages/message/orders/message.ordercreated.yaml#/components/messages/ordercreated')
+    
+    assert event.description == 'An order was created'
+    assert cache.misses == 0
+    
+    assert event.payload == {'type': 'object'}
+    assert event.examples == []
+    assert cache.misses == 1
+    
+    # The handle is sent to the render workers without the cache
+    copy = pickle.loads(pickle.dumps(event))
+    assert copy.source.document_cache is None
+    assert copy.payload == {'type': 'object'}
+
+def test_event_parser_reads_the_pointed_message(catalog_dir):
+    """Test that an event of a file with several messages gets the headers of the message of its ref."""
+    message_file = catalog_dir / 'messages/message/orders/message.ordercreated.yaml'
+    message_file.write_text(message_file.read_text() + (
+        "    orderdeleted:\n      title: Orders:OrderDeleted\n      description: An order was deleted\n"
+        "      payload:\n        type: string\n"))
+    event = EventParser(catalog_dir).parse(
+        '../../messages/message/orders/message.ordercreated.yaml#/components/messages/orderdeleted')
+    
+    assert (event.name, event.description) == ('Orders:OrderDeleted', 'An order was deleted')
+    assert event.payload == {'type': 'string'}
+
+def test_catalog_index_resolves_channels_from_the_index(catalog_dir):
+    """Test that services resolve channels with more than one message from the channel index."""
+    channel_file = catalog_dir / 'channels/orders/message.ordercreated.yaml'
+    channel_file.write_text(channel_file.read_text() + """      ordercancelled:
+        $ref: '../../messages/message/orders/message.ordercancelled.yaml#/components/messages/ordercancelled'
+""")
+    (catalog_dir / 'messages/message/orders/message.ordercancelled.yaml').write_text(
+        "components:\n  messages:\n    ordercancelled:\n      title: Orders:OrderCancelled\n")
+    
+    cache = DocumentCache()
+    service_parser = ServiceParser(catalog_dir, cache)
+    index = CatalogIndex.build(catalog_dir, service_parser, EventParser(catalog_dir, cache))
+    
+    channel = index.channels['../channels/orders/message.ordercreated.yaml#/channels/messageordersordercreated']
+    assert len(channel.event_refs) == 2
+    
+    # The services share the indexed events, and depend on the files of their channels
+    order_service = index.get_service('order-service')
+    assert [event.name for event in order_service.sent_events] == ['Orders:OrderCreated', 'Orders:OrderCancelled']
+    indexed_events = list(index.events.values())
+    assert all(any(event is indexed for indexed in indexed_events) for event in order_service.sent_events)
+    assert cache.canonical_path(channel_file) in index.service_dependencies['order-service']
+    publishing_services, _ = index.get_relations(index.find_event('message:Orders:OrderCancelled'))
+    assert [service.id for service in publishing_services] == ['order-service']